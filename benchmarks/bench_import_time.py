@@ -0,0 +1,72 @@
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+STATEMENT = "from llm_json_adapter import LLMJsonAdapter, Response"
+DEFERRED_MODULES = ("jsonschema", "sqlite3", "openai", "boto3", "ollama",
+                    "google.generativeai")
+
+
+def measure_once() -> Tuple[float, List[str]]:
+    check = (
+        f"{STATEMENT}\n"
+        "import sys\n"
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        capture_output=True,
+        text=True,
+        check=True)
+    total_us = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        if name.startswith(" ") and not name.startswith("  "):
+            total_us += int(cumulative)
+    loaded = [
+        module for module in completed.stdout.strip().split(",") if module
+    ]
+    return total_us / 1000.0, loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure cold import time of llm_json_adapter")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--threshold-ms",
+                        type=float,
+                        default=float(
+                            os.environ.get(
+                                "LLM_JSON_ADAPTER_IMPORT_THRESHOLD_MS",
+                                "400")))
+    arguments = parser.parse_args()
+
+    results = [measure_once() for _ in range(arguments.runs)]
+    timings = sorted(result[0] for result in results)
+    loaded = results[0][1]
+
+    print(f"statement: {STATEMENT}")
+    print(
+        f"min {timings[0]:.1f} ms, median {timings[len(timings) // 2]:.1f} ms, "
+        f"threshold {arguments.threshold_ms:.1f} ms")
+
+    failed = False
+    if loaded:
+        print(
+            f"FAIL: modules that should be deferred were imported: {', '.join(loaded)}"
+        )
+        failed = True
+    if timings[len(timings) // 2] > arguments.threshold_ms:
+        print("FAIL: import time regressed past the threshold")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
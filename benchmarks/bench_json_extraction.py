@@ -0,0 +1,93 @@
+import json
+import random
+import re
+import timeit
+from typing import Dict, List, Tuple
+
+from llm_json_adapter.utilities import JsonRepair, JsonUtility
+
+SIZES = {
+    "1KB": 1_000,
+    "10KB": 10_000,
+    "100KB": 100_000,
+    "500KB": 500_000,
+}
+
+
+def legacy_extract_json_block(text: str) -> Dict:
+    code_blocks = re.findall(r'```(.*?)\n(.*?)```', text, re.DOTALL)
+    if len(code_blocks) == 0:
+        return None
+    return json.loads(code_blocks[0][1])
+
+
+def generate_payload(size: int) -> str:
+    generator = random.Random(size)
+    items = []
+    payload = {"data": items}
+    while len(json.dumps(payload)) < size:
+        items.append({
+            "title":
+            f"Item {len(items)}",
+            "description":
+            " ".join(
+                generator.choice(
+                    ["alpha", "beta", "gamma", "delta", "epsilon"])
+                for _ in range(20)),
+            "score":
+            generator.random(),
+            "tags": [generator.choice(["a", "b", "c"]) for _ in range(3)],
+        })
+    return json.dumps(payload, indent=2, ensure_ascii=False)
+
+
+def build_corpus() -> List[Tuple[str, str, str]]:
+    corpus = []
+    for size_name, size in SIZES.items():
+        payload = generate_payload(size)
+        corpus.append((size_name, "fenced",
+                       f"Here is the result:\n```json\n{payload}\n```\n"))
+        corpus.append(
+            (size_name, "fenced+notes",
+             f"```json\n{payload}\n```\n\nNotes:\n```text\nnothing\n```\n"))
+        corpus.append((size_name, "unfenced",
+                       f"Sure! {payload} Let me know if you need more."))
+    return corpus
+
+
+def measure(function, text: str) -> float:
+    number = max(1, 200_000 // len(text))
+    return min(timeit.repeat(lambda: function(text), number=number,
+                             repeat=5)) / number
+
+
+def main():
+    corpus = build_corpus()
+    backends = JsonUtility.get_available_backends()
+    previous_backend = JsonUtility.backend
+
+    header = f"{'size':<6} {'style':<13} {'legacy regex':>14}"
+    for backend in backends:
+        header += f" {'scan+' + backend:>14}"
+    header += f" {'recovery':>14}"
+    print(header + "   (us/call)")
+
+    for size_name, style, text in corpus:
+        row = f"{size_name:<6} {style:<13}"
+        if style == "unfenced":
+            row += f" {'-':>14}"
+        else:
+            row += f" {measure(legacy_extract_json_block, text) * 1e6:>14.1f}"
+        for backend in backends:
+            JsonUtility.set_backend(backend)
+            if style == "unfenced":
+                row += f" {'-':>14}"
+            else:
+                row += f" {measure(JsonUtility.extract_json_block, text) * 1e6:>14.1f}"
+        JsonUtility.set_backend(previous_backend)
+        row += f" {measure(JsonRepair.extract_value, text) * 1e6:>14.1f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
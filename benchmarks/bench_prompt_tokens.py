@@ -0,0 +1,54 @@
+import timeit
+
+from llm_json_adapter.objects import Response
+from llm_json_adapter.utilities import SchemaSerializer
+
+from .bench_schema_validation import SCHEMA as SMALL_SCHEMA
+from .stubs import BenchmarkProvider
+
+LARGE_SCHEMA = {
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "$id": "https://example.com/invoice.schema.json",
+    "type": "object",
+    "properties": {
+        f"field_{index}": {
+            "type": "string",
+            "description": f"Field number {index} of the invoice",
+            "examples": [f"value {index}", f"other value {index}"],
+        }
+        for index in range(30)
+    },
+    "required": [f"field_{index}" for index in range(30)],
+}
+
+SCHEMAS = {
+    "small": SMALL_SCHEMA,
+    "large": LARGE_SCHEMA,
+}
+
+
+def main():
+    print(
+        f"{'schema':<8} {'default tok':>12} {'compact tok':>12} {'saved':>8}")
+    for name, schema in SCHEMAS.items():
+        savings = SchemaSerializer.get_savings(schema)
+        print(f"{name:<8} {savings['default_tokens']:>12} "
+              f"{savings['compact_tokens']:>12} {savings['saved_tokens']:>8}")
+
+    print()
+    provider = BenchmarkProvider()
+    for name, schema in SCHEMAS.items():
+        function = Response(name=name, description=name, parameters=schema)
+        render = timeit.timeit(lambda: provider.render_chat_system_messages(
+            function, "en", "analyst"),
+                               number=2000) / 2000
+        provider.clear_prompt_templates()
+        cached = timeit.timeit(lambda: provider.generate_chat_prompt(
+            "prompt", function, "en", "analyst"),
+                               number=2000) / 2000
+        print(f"{name:<8} render {render * 1e6:8.1f} us/call, "
+              f"cached {cached * 1e6:8.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
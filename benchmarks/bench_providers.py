@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import contextlib
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+from llm_json_adapter import LLMJsonAdapter, Request, Response
+from llm_json_adapter.exceptions import ExceededMaxRetryCountError
+from llm_json_adapter.scheduling import RetryPolicy
+
+from .mock_servers import (Behavior, FakeOllamaServer, FakeOpenAIServer,
+                           StubBedrockClient, StubGeminiModel)
+
+BACKENDS = ("openai", "ollama", "bedrock", "google")
+MODES = ("generate", "generate_async", "generate_many")
+
+FUNCTION = Response(
+    name="extract",
+    description="Extract a title and tags",
+    parameters={
+        "type": "object",
+        "properties": {
+            "title": {
+                "type": "string"
+            },
+            "tags": {
+                "type": "array",
+                "items": {
+                    "type": "string"
+                },
+            },
+        },
+        "required": ["title", "tags"],
+    },
+)
+
+
+class Result(object):
+
+    def __init__(self, backend: str, mode: str, requests: int, calls: int,
+                 errors: int, elapsed: float, latencies: List[float],
+                 peak_memory: Optional[int]):
+        self.backend = backend
+        self.mode = mode
+        self.requests = requests
+        self.calls = calls
+        self.errors = errors
+        self.elapsed = elapsed
+        self.latencies = sorted(latencies)
+        self.peak_memory = peak_memory
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def retry_amplification(self) -> float:
+        return self.calls / self.requests if self.requests > 0 else 0.0
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        index = max(0, int(len(self.latencies) * percentile / 100.0 + 0.5) - 1)
+        return self.latencies[min(index, len(self.latencies) - 1)]
+
+    def format(self) -> str:
+
+        def milliseconds(value: Optional[float]) -> str:
+            return "-" if value is None else f"{value * 1e3:.1f}"
+
+        memory = ("-" if self.peak_memory is None else
+                  f"{self.peak_memory / 1024:.0f}")
+        return (f"{self.backend:<8} {self.mode:<15} {self.throughput:>9.1f} "
+                f"{milliseconds(self.percentile(50)):>9} "
+                f"{milliseconds(self.percentile(99)):>9} "
+                f"{self.retry_amplification:>7.2f} {self.errors:>6} "
+                f"{memory:>10}")
+
+
+@contextlib.contextmanager
+def create_adapter(backend: str, behavior: Behavior, max_retry_count: int,
+                   retry_policy: RetryPolicy):
+    if backend == "openai":
+        with FakeOpenAIServer(behavior) as server:
+            yield LLMJsonAdapter(provider_name="openai",
+                                 attributes={
+                                     "api_key": "benchmark",
+                                     "model": "gpt-4o-mini",
+                                     "base_url": server.url + "/v1",
+                                     "max_retries": 0,
+                                 },
+                                 max_retry_count=max_retry_count,
+                                 retry_policy=retry_policy)
+    elif backend == "ollama":
+        with FakeOllamaServer(behavior) as server:
+            yield LLMJsonAdapter(provider_name="ollama",
+                                 attributes={"url": server.url},
+                                 max_retry_count=max_retry_count,
+                                 retry_policy=retry_policy)
+    elif backend == "bedrock":
+        adapter = LLMJsonAdapter(provider_name="bedrock",
+                                 attributes={
+                                     "access_key_id": "benchmark",
+                                     "secret_access_key": "benchmark",
+                                 },
+                                 max_retry_count=max_retry_count,
+                                 retry_policy=retry_policy)
+        adapter._provider._client = StubBedrockClient(behavior)
+        yield adapter
+    elif backend == "google":
+        adapter = LLMJsonAdapter(provider_name="google",
+                                 attributes={"api_key": "benchmark"},
+                                 max_retry_count=max_retry_count,
+                                 retry_policy=retry_policy)
+        adapter._provider._client = StubGeminiModel(behavior)
+        yield adapter
+    else:
+        raise ValueError(f"Unknown backend: {backend}")
+
+
+def run_generate(adapter: LLMJsonAdapter, requests: int,
+                 concurrency: int) -> Dict:
+    latencies, errors = [], 0
+    for index in range(requests):
+        started_at = time.perf_counter()
+        try:
+            adapter.generate(f"Request {index}", FUNCTION)
+            latencies.append(time.perf_counter() - started_at)
+        except ExceededMaxRetryCountError:
+            errors += 1
+    adapter.close()
+    return {"latencies": latencies, "errors": errors}
+
+
+def run_generate_async(adapter: LLMJsonAdapter, requests: int,
+                       concurrency: int) -> Dict:
+    latencies, errors = [], 0
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(index: int):
+            nonlocal errors
+            async with semaphore:
+                started_at = time.perf_counter()
+                try:
+                    await adapter.generate_async(f"Request {index}", FUNCTION)
+                    latencies.append(time.perf_counter() - started_at)
+                except ExceededMaxRetryCountError:
+                    errors += 1
+
+        await asyncio.gather(*(call(index) for index in range(requests)))
+        await adapter.aclose()
+
+    asyncio.run(main())
+    return {"latencies": latencies, "errors": errors}
+
+
+def run_generate_many(adapter: LLMJsonAdapter, requests: int,
+                      concurrency: int) -> Dict:
+    results = adapter.generate_many(
+        (Request(prompt=f"Request {index}", function=FUNCTION)
+         for index in range(requests)),
+        concurrency=concurrency)
+    adapter.close()
+    return {
+        "latencies": [],
+        "errors": sum(1 for result in results if not result.succeeded),
+    }
+
+
+RUNNERS: Dict[str, Callable[[LLMJsonAdapter, int, int], Dict]] = {
+    "generate": run_generate,
+    "generate_async": run_generate_async,
+    "generate_many": run_generate_many,
+}
+
+
+def run(backend: str,
+        mode: str,
+        requests: int = 100,
+        concurrency: int = 16,
+        latency: float = 0.05,
+        latency_sigma: float = 0.5,
+        failure_rate: float = 0.0,
+        malformed_rate: float = 0.0,
+        max_retry_count: int = 3,
+        retry_delay: float = 0.01,
+        measure_memory: bool = False,
+        seed: int = 0) -> Result:
+    behavior = Behavior(latency=latency,
+                        latency_sigma=latency_sigma,
+                        failure_rate=failure_rate,
+                        malformed_rate=malformed_rate,
+                        seed=seed)
+    retry_policy = RetryPolicy(base_delay=retry_delay,
+                               max_delay=retry_delay * 8)
+    with create_adapter(backend, behavior, max_retry_count,
+                        retry_policy) as adapter:
+        if measure_memory:
+            tracemalloc.start()
+        started_at = time.perf_counter()
+        try:
+            outcome = RUNNERS[mode](adapter, requests, concurrency)
+            elapsed = time.perf_counter() - started_at
+        finally:
+            peak_memory = None
+            if measure_memory:
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+    return Result(backend=backend,
+                  mode=mode,
+                  requests=requests,
+                  calls=behavior.calls,
+                  errors=outcome["errors"],
+                  elapsed=elapsed,
+                  latencies=outcome["latencies"],
+                  peak_memory=peak_memory)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure adapter overhead against local provider stand-ins."
+    )
+    parser.add_argument("--backends",
+                        nargs="+",
+                        choices=BACKENDS,
+                        default=list(BACKENDS))
+    parser.add_argument("--modes",
+                        nargs="+",
+                        choices=MODES,
+                        default=list(MODES))
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency",
+                        type=float,
+                        default=0.05,
+                        help="median provider latency in seconds")
+    parser.add_argument("--latency-sigma",
+                        type=float,
+                        default=0.5,
+                        help="sigma of the log-normal latency distribution")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--max-retry-count", type=int, default=3)
+    parser.add_argument("--retry-delay", type=float, default=0.01)
+    parser.add_argument("--memory",
+                        action="store_true",
+                        help="trace peak Python memory (slows the run down)")
+    arguments = parser.parse_args()
+
+    print(f"{'backend':<8} {'mode':<15} {'req/s':>9} {'p50 ms':>9} "
+          f"{'p99 ms':>9} {'calls/r':>7} {'errors':>6} {'peak KiB':>10}")
+    for backend in arguments.backends:
+        for mode in arguments.modes:
+            result = run(backend,
+                         mode,
+                         requests=arguments.requests,
+                         concurrency=arguments.concurrency,
+                         latency=arguments.latency,
+                         latency_sigma=arguments.latency_sigma,
+                         failure_rate=arguments.failure_rate,
+                         malformed_rate=arguments.malformed_rate,
+                         max_retry_count=arguments.max_retry_count,
+                         retry_delay=arguments.retry_delay,
+                         measure_memory=arguments.memory)
+            print(result.format())
+
+
+if __name__ == "__main__":
+    main()
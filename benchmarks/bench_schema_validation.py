@@ -0,0 +1,90 @@
+import json
+import timeit
+from pathlib import Path
+
+from jsonschema import validate
+from jsonschema.exceptions import ValidationError
+
+from llm_json_adapter.utilities import SchemaValidator
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "data": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {
+                        "type": "string",
+                    },
+                    "description": {
+                        "type": "string",
+                    },
+                },
+                "required": ["title", "description"],
+            },
+        },
+    },
+    "required": ["data"]
+}
+
+INSTANCE = {
+    "data": [{
+        "title": f"title {i}",
+        "description": f"description {i}",
+    } for i in range(20)]
+}
+
+META_SCHEMA_PATH = Path(__file__).parent.parent.joinpath(
+    "llm_json_adapter", "schemas", "2020-12.schema.json")
+
+
+def uncached_schema_check() -> bool:
+    meta_schema = json.loads(META_SCHEMA_PATH.read_text())
+    try:
+        validate(instance=SCHEMA, schema=meta_schema)
+        return True
+    except ValidationError:
+        return False
+
+
+def uncached_schema_and_result_check() -> bool:
+    if not uncached_schema_check():
+        return False
+    try:
+        validate(instance=INSTANCE, schema=SCHEMA)
+        return True
+    except ValidationError:
+        return False
+
+
+def cached_schema_check() -> bool:
+    return SchemaValidator.is_valid_schema(SCHEMA)
+
+
+def cached_schema_and_result_check() -> bool:
+    return SchemaValidator.get_error_message(INSTANCE, SCHEMA) is None
+
+
+def measure(function, number: int) -> float:
+    function()
+    return min(timeit.repeat(function, number=number, repeat=5)) / number
+
+
+def main():
+    number = 200
+    rows = [
+        ("schema check (before)", measure(uncached_schema_check, number)),
+        ("schema check (after)", measure(cached_schema_check, number)),
+        ("schema + result check (before)",
+         measure(uncached_schema_and_result_check, number)),
+        ("schema + result check (after)",
+         measure(cached_schema_and_result_check, number)),
+    ]
+    for name, seconds in rows:
+        print(f"{name:<32} {seconds * 1_000_000:>12.1f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+import asyncio
+import io
+import itertools
+import json
+import math
+import random
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, Optional, Tuple
+
+PAYLOAD = {"title": "benchmark", "tags": ["alpha", "beta", "gamma"]}
+
+MALFORMED_TEXT = "I am sorry, but I can not answer that in JSON."
+
+
+class Behavior(object):
+    """Latency and error profile shared by the local provider stand-ins.
+
+    Latencies follow a log-normal distribution around ``latency`` seconds.
+    Each call fails with ``failure_rate`` and returns text without any JSON
+    with ``malformed_rate``.
+    """
+
+    def __init__(self,
+                 latency: float = 0.05,
+                 latency_sigma: float = 0.5,
+                 failure_rate: float = 0.0,
+                 malformed_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.failure_rate = failure_rate
+        self.malformed_rate = malformed_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def next(self) -> Tuple[str, float]:
+        with self._lock:
+            self.calls += 1
+            value = self._random.random()
+            latency = 0.0
+            if self.latency > 0:
+                latency = self._random.lognormvariate(math.log(self.latency),
+                                                      self.latency_sigma)
+        if value < self.failure_rate:
+            return "failure", latency
+        if value < self.failure_rate + self.malformed_rate:
+            return "malformed", latency
+        return "ok", latency
+
+    @staticmethod
+    def render(outcome: str, fenced: bool = True) -> str:
+        if outcome == "malformed":
+            return MALFORMED_TEXT
+        text = json.dumps(PAYLOAD)
+        return f"```json\n{text}\n```" if fenced else text
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class FakeServer(object):
+
+    def __init__(self, behavior: Behavior):
+        self.behavior = behavior
+        self._server: Optional[_HTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle(self, path: str, body: Dict) -> Tuple[int, Dict]:
+        raise NotImplementedError()
+
+    def handle_request(self, method: str, path: str, content_type: str,
+                       data: bytes) -> Tuple[int, str, bytes]:
+        if method != "POST":
+            return 404, "application/json", b'{"error": "not found"}'
+        status, response = self.handle(path, json.loads(data or b"{}"))
+        return status, "application/json", json.dumps(response).encode("utf-8")
+
+    def start(self) -> "FakeServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def respond(self):
+                length = int(self.headers.get("Content-Length", 0))
+                status, content_type, data = server.handle_request(
+                    self.command, self.path,
+                    self.headers.get("Content-Type", ""),
+                    self.rfile.read(length))
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = respond
+            do_POST = respond
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = _HTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class FakeOpenAIServer(FakeServer):
+    """Serves ``POST /v1/chat/completions`` with a forced tool call."""
+
+    def handle(self, path: str, body: Dict) -> Tuple[int, Dict]:
+        outcome, latency = self.behavior.next()
+        time.sleep(latency)
+        if outcome == "failure":
+            return 500, {
+                "error": {
+                    "message": "The server had an error",
+                    "type": "server_error",
+                }
+            }
+        return 200, self.render_completion(outcome, body)
+
+    @staticmethod
+    def render_completion(outcome: str, body: Dict) -> Dict:
+        name = body["tools"][0]["function"]["name"]
+        arguments = Behavior.render(outcome, fenced=False)
+        return {
+            "id":
+            "chatcmpl-benchmark",
+            "object":
+            "chat.completion",
+            "created":
+            int(time.time()),
+            "model":
+            body.get("model"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "tool_calls",
+                "message": {
+                    "role":
+                    "assistant",
+                    "content":
+                    None,
+                    "tool_calls": [{
+                        "id": "call_benchmark",
+                        "type": "function",
+                        "function": {
+                            "name": name,
+                            "arguments": arguments,
+                        },
+                    }],
+                },
+            }],
+            "usage": {
+                "prompt_tokens": len(json.dumps(body)) // 4,
+                "completion_tokens": len(arguments) // 4,
+                "total_tokens": (len(json.dumps(body)) + len(arguments)) // 4,
+            },
+        }
+
+
+class FakeOpenAIBatchServer(FakeOpenAIServer):
+    """Serves the file and batch endpoints of the OpenAI Batch API.
+
+    A batch completes after it has been polled ``polls_until_complete``
+    times; each line is answered as ``FakeOpenAIServer`` would answer it,
+    without the latency.
+    """
+
+    def __init__(self, behavior: Behavior, polls_until_complete: int = 1):
+        super().__init__(behavior)
+        self.polls_until_complete = polls_until_complete
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict] = {}
+        self._polls: Dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def handle_request(self, method: str, path: str, content_type: str,
+                       data: bytes) -> Tuple[int, str, bytes]:
+        with self._lock:
+            if method == "GET" and path.startswith("/v1/files/"):
+                file_id = path.split("/")[3]
+                if file_id in self.files:
+                    return 200, "application/octet-stream", self.files[file_id]
+                status, response = 404, {"error": {"message": "No such file"}}
+            elif method == "POST" and path == "/v1/files":
+                status, response = 200, self.create_file(content_type, data)
+            elif method == "POST" and path == "/v1/batches":
+                status, response = 200, self.create_batch(json.loads(data))
+            elif method == "GET" and path.startswith("/v1/batches/"):
+                batch_id = path.split("/")[3]
+                if batch_id in self.batches:
+                    status, response = 200, self.poll_batch(batch_id)
+                else:
+                    status, response = 404, {
+                        "error": {
+                            "message": "No such batch"
+                        }
+                    }
+            else:
+                status, response = 404, {"error": {"message": "Not found"}}
+        return status, "application/json", json.dumps(response).encode("utf-8")
+
+    def create_file(self, content_type: str, data: bytes) -> Dict:
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode("utf-8") + data)
+        content = b""
+        for part in message.iter_parts():
+            if part.get_param("name", header="content-disposition") == "file":
+                content = part.get_payload(decode=True)
+        file_id = f"file-{next(self._ids)}"
+        self.files[file_id] = content
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": f"{file_id}.jsonl",
+            "purpose": "batch",
+            "status": "processed",
+        }
+
+    def create_batch(self, body: Dict) -> Dict:
+        batch_id = f"batch-{next(self._ids)}"
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"],
+            "completion_window": body["completion_window"],
+            "metadata": body.get("metadata"),
+            "status": "validating",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+        }
+        self._polls[batch_id] = 0
+        return self.batches[batch_id]
+
+    def poll_batch(self, batch_id: str) -> Dict:
+        batch = self.batches[batch_id]
+        self._polls[batch_id] += 1
+        if (batch["status"] != "completed"
+                and self._polls[batch_id] >= self.polls_until_complete):
+            self.complete_batch(batch)
+        elif batch["status"] == "validating":
+            batch["status"] = "in_progress"
+        return batch
+
+    def complete_batch(self, batch: Dict):
+        outputs, errors = [], []
+        for line in self.files[batch["input_file_id"]].splitlines():
+            request = json.loads(line)
+            outcome, _ = self.behavior.next()
+            if outcome == "failure":
+                errors.append({
+                    "id": f"request-{next(self._ids)}",
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 500,
+                        "body": {
+                            "error": {
+                                "message": "The server had an error",
+                            }
+                        },
+                    },
+                    "error": None,
+                })
+                continue
+            outputs.append({
+                "id": f"request-{next(self._ids)}",
+                "custom_id": request["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "body": self.render_completion(outcome, request["body"]),
+                },
+                "error": None,
+            })
+        for key, records in (("output_file_id", outputs), ("error_file_id",
+                                                           errors)):
+            if records:
+                file_id = f"file-{next(self._ids)}"
+                self.files[file_id] = "".join(
+                    json.dumps(record) + "\n"
+                    for record in records).encode("utf-8")
+                batch[key] = file_id
+        batch["status"] = "completed"
+
+
+class FakeOllamaServer(FakeServer):
+    """Serves ``POST /api/chat`` without streaming."""
+
+    def handle(self, path: str, body: Dict) -> Tuple[int, Dict]:
+        outcome, latency = self.behavior.next()
+        time.sleep(latency)
+        if outcome == "failure":
+            return 503, {"error": "server busy, please try again"}
+        content = Behavior.render(outcome)
+        return 200, {
+            "model": body.get("model"),
+            "created_at": "2024-01-01T00:00:00Z",
+            "message": {
+                "role": "assistant",
+                "content": content,
+            },
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": len(json.dumps(body)) // 4,
+            "eval_count": len(content) // 4,
+        }
+
+
+class StubBedrockClient(object):
+    """Stand-in for the ``bedrock-runtime`` client of Anthropic models."""
+
+    def __init__(self, behavior: Behavior):
+        self.behavior = behavior
+
+    def close(self):
+        pass
+
+    def invoke_model(self, modelId: str, body: str) -> Dict:
+        from botocore.exceptions import ClientError
+
+        outcome, latency = self.behavior.next()
+        time.sleep(latency)
+        if outcome == "failure":
+            raise ClientError(
+                {
+                    "Error": {
+                        "Code": "ThrottlingException",
+                        "Message": "Too many requests",
+                    }
+                }, "InvokeModel")
+        text = Behavior.render(outcome)
+        response = {
+            "content": [{
+                "type": "text",
+                "text": text,
+            }],
+            "stop_reason": "end_turn",
+            "usage": {
+                "input_tokens": len(body) // 4,
+                "output_tokens": len(text) // 4,
+            },
+        }
+        return {"body": io.BytesIO(json.dumps(response).encode("utf-8"))}
+
+
+class StubGeminiModel(object):
+    """Stand-in for ``google.generativeai.GenerativeModel``."""
+
+    def __init__(self, behavior: Behavior):
+        self.behavior = behavior
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        from google.api_core import exceptions as google_exceptions
+
+        outcome, latency = self.behavior.next()
+        await asyncio.sleep(latency)
+        if outcome == "failure":
+            raise google_exceptions.ServiceUnavailable("Model is overloaded")
+        text = Behavior.render(outcome)
+        return SimpleNamespace(text=text,
+                               usage_metadata=SimpleNamespace(
+                                   prompt_token_count=len(prompt) // 4,
+                                   candidates_token_count=len(text) // 4))
@@ -0,0 +1,7 @@
+from llm_json_adapter.providers import Provider
+
+
+class BenchmarkProvider(Provider):
+
+    def __init__(self, **attributes):
+        super().__init__(attributes=attributes)
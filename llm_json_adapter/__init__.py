@@ -1,6 +1,32 @@
-from .llm_json_adapter import LLMJsonAdapter
-from .objects import Response
+import importlib
+from typing import TYPE_CHECKING, Any
 
-__all__ = ['LLMJsonAdapter', "Response", "__version__"]
+__all__ = [
+    'LLMJsonAdapter', "Response", "Request", "BatchResult", "__version__"
+]
 
 __version__ = '0.2.0'
+
+_lazy_attributes = {
+    'LLMJsonAdapter': '.llm_json_adapter',
+    'Response': '.objects',
+    'Request': '.objects',
+    'BatchResult': '.objects',
+}
+
+if TYPE_CHECKING:
+    from .llm_json_adapter import LLMJsonAdapter
+    from .objects import BatchResult, Request, Response
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _lazy_attributes.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + list(_lazy_attributes.keys()))
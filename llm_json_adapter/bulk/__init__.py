@@ -0,0 +1,2 @@
+from .bulk_backend import BulkBackend
+from .bulk_job import BulkJob
@@ -0,0 +1,28 @@
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from ..objects import Request
+
+# custom_id -> (response body, error message)
+BulkOutput = Dict[str, Tuple[Optional[Dict], Optional[str]]]
+
+
+class BulkBackend(object):
+    # Smallest batch the service accepts.
+    min_batch_size = 1
+
+    def render_line(self, custom_id: str, request: Request,
+                    language: str) -> Dict:
+        raise NotImplementedError()
+
+    async def submit(self, path: Path, name: str) -> str:
+        raise NotImplementedError()
+
+    async def is_finished(self, batch_id: str) -> bool:
+        raise NotImplementedError()
+
+    async def fetch_results(self, batch_id: str) -> BulkOutput:
+        raise NotImplementedError()
+
+    def extract_result(self, body: Dict, request: Request) -> Dict:
+        raise NotImplementedError()
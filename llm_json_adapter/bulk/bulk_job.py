@@ -0,0 +1,243 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import (AsyncIterator, Awaitable, Callable, Dict, Iterable, List,
+                    Optional, Tuple, Union)
+
+from ..exceptions import ExceededMaxRetryCountError, RetryableError
+from ..objects import BatchResult, Request
+from ..utilities import SchemaValidator
+from .bulk_backend import BulkBackend
+
+# (request index, attempt)
+QueuedItem = Tuple[int, int]
+
+
+class BulkJob(object):
+    """Runs requests through a batch inference backend with checkpoints.
+
+    Failed items are pooled across batches and resubmitted together with
+    new requests. A batch smaller than ``min_batch_size`` (default: the
+    backend's minimum) waits for the running batches; once nothing else
+    is running, its items are generated online through ``fallback``.
+    """
+
+    def __init__(self,
+                 backend: BulkBackend,
+                 checkpoint_path: Union[str, Path],
+                 work_dir: Optional[Union[str, Path]] = None,
+                 batch_size: int = 50000,
+                 max_pending_batches: int = 1,
+                 poll_interval: float = 60.0,
+                 max_attempts: int = 3,
+                 language: str = 'en',
+                 name: Optional[str] = None,
+                 logger: Optional[logging.Logger] = None,
+                 min_batch_size: Optional[int] = None,
+                 fallback: Optional[Callable[[Request],
+                                             Awaitable[Dict]]] = None):
+        if batch_size < 1:
+            raise ValueError('batch_size must be greater than 0')
+        self._backend = backend
+        self._checkpoint_path = Path(checkpoint_path)
+        self._work_dir = Path(
+            work_dir) if work_dir is not None else self._checkpoint_path.parent
+        self._batch_size = batch_size
+        self._max_pending_batches = max_pending_batches
+        self._poll_interval = poll_interval
+        self._max_attempts = max_attempts
+        self._language = language
+        self._name = name or self._checkpoint_path.stem
+        self._logger = logger
+        self._min_batch_size = (min_batch_size if min_batch_size is not None
+                                else backend.min_batch_size)
+        self._fallback = fallback
+
+    def load_checkpoint(self) -> Dict:
+        if not self._checkpoint_path.exists():
+            return {
+                "next_index": 0,
+                "sequence": 0,
+                "batches": [],
+                "queued": []
+            }
+        return json.loads(self._checkpoint_path.read_text())
+
+    def save_checkpoint(self, state: Dict):
+        self._checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(
+            dir=self._checkpoint_path.parent,
+            prefix=self._checkpoint_path.name)
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(state, file)
+        os.replace(temporary_path, self._checkpoint_path)
+
+    async def submit(self, state: Dict, items: List[QueuedItem],
+                     pending: Dict[int, Request]):
+        state["sequence"] += 1
+        name = f'{self._name}-{state["sequence"]}'
+        self._work_dir.mkdir(parents=True, exist_ok=True)
+        path = self._work_dir / f'{name}.jsonl'
+        with path.open('w') as file:
+            for index, _ in items:
+                request = pending[index]
+                line = self._backend.render_line(
+                    str(index), request, request.language or self._language)
+                file.write(json.dumps(line, ensure_ascii=False) + '\n')
+        try:
+            batch_id = await self._backend.submit(path, name)
+        finally:
+            path.unlink()
+        if self._logger is not None:
+            self._logger.info('Submitted batch %s with %d items', batch_id,
+                              len(items))
+        state["batches"].append({
+            "id": batch_id,
+            "name": name,
+            "indices": [index for index, _ in items],
+            "attempts": [attempt for _, attempt in items],
+        })
+
+    async def generate_online(
+            self, items: List[QueuedItem],
+            pending: Dict[int, Request]) -> AsyncIterator[BatchResult]:
+        if self._logger is not None:
+            self._logger.info(
+                'Generating %d items online, below the minimum batch size',
+                len(items))
+        requests = [pending.pop(index) for index, _ in items]
+        results = await asyncio.gather(*(self._fallback(request)
+                                         for request in requests),
+                                       return_exceptions=True)
+        for (index, _), request, result in zip(items, requests, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                yield BatchResult(index=index, request=request, error=result)
+            else:
+                yield BatchResult(index=index, request=request, result=result)
+
+    def extract_result(self, output, request: Request) -> Dict:
+        body, error = output
+        if error is not None:
+            raise RetryableError(error)
+        result = self._backend.extract_result(body, request)
+        error_message = SchemaValidator.get_error_message(
+            result, request.function.parameters)
+        if error_message is not None:
+            raise RetryableError(
+                f'Response does not match the JSON schema: {error_message}')
+        return result
+
+    async def run(
+        self, requests: Iterable[Union[Request,
+                                       Dict]]) -> AsyncIterator[BatchResult]:
+        state = self.load_checkpoint()
+        state.setdefault("queued", [])
+        outstanding = {
+            index
+            for batch in state["batches"]
+            for index in batch["indices"]
+        }
+        outstanding.update(index for index, _ in state["queued"])
+        pending: Dict[int, Request] = {}
+        items = enumerate(requests)
+
+        # Restore the requests of batches submitted before a restart and
+        # skip the ones that were already reported.
+        if state["next_index"] > 0:
+            for index, request in items:
+                if index in outstanding:
+                    pending[index] = request if isinstance(
+                        request, Request) else Request(**request)
+                if index + 1 >= state["next_index"]:
+                    break
+
+        exhausted = False
+        while True:
+            while len(state["batches"]) < self._max_pending_batches:
+                # Items to resubmit go first, topped up with new requests.
+                group = [tuple(item) for item in state["queued"]]
+                del group[self._batch_size:]
+                del state["queued"][:len(group)]
+                wanted = self._batch_size - len(group)
+                chunk = [] if exhausted or wanted == 0 else list(
+                    itertools.islice(items, wanted))
+                if len(chunk) < wanted:
+                    exhausted = True
+                for index, request in chunk:
+                    try:
+                        pending[index] = request if isinstance(
+                            request, Request) else Request(**request)
+                    except (TypeError, ValueError) as e:
+                        yield BatchResult(index=index,
+                                          request=request,
+                                          error=e)
+                        continue
+                    group.append((index, 1))
+                if chunk:
+                    state["next_index"] = chunk[-1][0] + 1
+                if not group:
+                    self.save_checkpoint(state)
+                    break
+
+                if len(group) < self._min_batch_size:
+                    if state["batches"]:
+                        # Wait for the running batches, whose failed items
+                        # may fill this one up.
+                        state["queued"][:0] = [list(item) for item in group]
+                        self.save_checkpoint(state)
+                        break
+                    if self._fallback is not None:
+                        async for batch_result in self.generate_online(
+                                group, pending):
+                            yield batch_result
+                        self.save_checkpoint(state)
+                        continue
+                await self.submit(state, group, pending)
+                self.save_checkpoint(state)
+
+            if not state["batches"]:
+                return
+
+            finished = False
+            for batch in list(state["batches"]):
+                if not await self._backend.is_finished(batch["id"]):
+                    continue
+                finished = True
+                outputs = await self._backend.fetch_results(batch["id"])
+                attempts = batch.get("attempts") or [batch["attempt"]] * len(
+                    batch["indices"])
+                for index, attempt in zip(batch["indices"], attempts):
+                    request = pending[index]
+                    try:
+                        result = self.extract_result(
+                            outputs.get(str(index),
+                                        (None, 'Missing from batch output')),
+                            request)
+                    except RetryableError as e:
+                        if attempt < self._max_attempts:
+                            state["queued"].append([index, attempt + 1])
+                            continue
+                        del pending[index]
+                        yield BatchResult(
+                            index=index,
+                            request=request,
+                            error=ExceededMaxRetryCountError(
+                                f'Exceeded max attempt count: {self._max_attempts} Latest exception is: {e}'
+                            ))
+                        continue
+                    del pending[index]
+                    yield BatchResult(index=index,
+                                      request=request,
+                                      result=result)
+
+                state["batches"].remove(batch)
+                self.save_checkpoint(state)
+
+            if not finished:
+                await asyncio.sleep(self._poll_interval)
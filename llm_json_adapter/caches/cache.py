@@ -0,0 +1,72 @@
+import threading
+from typing import Dict, Optional
+
+
+class Cache(object):
+
+    def __init__(self,
+                 ttl: Optional[float] = None,
+                 max_size: Optional[int] = 1024):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._hits = 0
+        self._misses = 0
+        self._stats_lock = threading.Lock()
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "size": self.size(),
+        }
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.count_lookup(self.load(key))
+
+    def set(self, key: str, value: Dict):
+        self.store(key, value)
+
+    async def aget(self, key: str) -> Optional[Dict]:
+        return self.count_lookup(await self.aload(key))
+
+    async def aset(self, key: str, value: Dict):
+        await self.astore(key, value)
+
+    def count_lookup(self, value: Optional[Dict]) -> Optional[Dict]:
+        with self._stats_lock:
+            if value is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return value
+
+    def load(self, key: str) -> Optional[Dict]:
+        raise NotImplementedError()
+
+    def store(self, key: str, value: Dict):
+        raise NotImplementedError()
+
+    # Backends doing blocking I/O override these to keep it off the event
+    # loop.
+    async def aload(self, key: str) -> Optional[Dict]:
+        return self.load(key)
+
+    async def astore(self, key: str, value: Dict):
+        self.store(key, value)
+
+    def size(self) -> int:
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+    def close(self):
+        pass
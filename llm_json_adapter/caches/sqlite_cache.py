@@ -0,0 +1,123 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from ..utilities import ThreadPool
+from .cache import Cache
+
+
+class SqliteCache(Cache):
+    """Persistent cache in a SQLite file, shared between processes.
+
+    The row count is tracked per instance and re-read from the file
+    before evicting, so eviction only runs once ``max_size`` is exceeded, and expired rows are purged every
+    ``purge_interval`` stores. The async API runs the SQLite I/O in the
+    shared thread pool.
+    """
+
+    purge_interval = 1000
+
+    def __init__(self,
+                 path: Union[str, Path],
+                 ttl: Optional[float] = None,
+                 max_size: Optional[int] = 100000,
+                 timeout: float = 30.0):
+        super().__init__(ttl=ttl, max_size=max_size)
+        self._path = str(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self._path,
+                                           timeout=timeout,
+                                           isolation_level=None,
+                                           check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS responses ("
+                                 "key TEXT PRIMARY KEY, "
+                                 "value TEXT NOT NULL, "
+                                 "created_at REAL NOT NULL, "
+                                 "accessed_at REAL NOT NULL)")
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+            "ON responses (accessed_at)")
+        self._count = self._connection.execute(
+            "SELECT COUNT(*) FROM responses").fetchone()[0]
+        self._stores = 0
+
+    def load(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?",
+                (key, )).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self._ttl is not None and now - created_at > self._ttl:
+                self._count -= self._connection.execute(
+                    "DELETE FROM responses WHERE key = ?", (key, )).rowcount
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (now, key))
+        return json.loads(value)
+
+    def store(self, key: str, value: Dict):
+        now = time.time()
+        text = json.dumps(value)
+        with self._lock:
+            inserted = self._connection.execute(
+                "INSERT OR IGNORE INTO responses "
+                "(key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, text, now, now)).rowcount
+            if not inserted:
+                self._connection.execute(
+                    "UPDATE responses SET value = ?, created_at = ?, "
+                    "accessed_at = ? WHERE key = ?", (text, now, now, key))
+            self._count += inserted
+            self._stores += 1
+            if self._ttl is not None and self._stores % self.purge_interval == 0:
+                self.purge_expired()
+            if self._max_size is not None and self._count > self._max_size:
+                self.evict()
+
+    async def aload(self, key: str) -> Optional[Dict]:
+        return await ThreadPool.run(self.load, key)
+
+    async def astore(self, key: str, value: Dict):
+        await ThreadPool.run(self.store, key, value)
+
+    def purge_expired(self):
+        self._count -= self._connection.execute(
+            "DELETE FROM responses WHERE created_at < ?",
+            (time.time() - self._ttl, )).rowcount
+
+    def evict(self):
+        # The tracked count only says when to look: other processes sharing
+        # the file insert and delete rows too, so the real count is re-read
+        # before the least recently used rows above max_size are removed
+        # through the accessed_at index.
+        self._count = self._connection.execute(
+            "SELECT COUNT(*) FROM responses").fetchone()[0]
+        if self._count <= self._max_size:
+            return
+        self._count -= self._connection.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+            (self._count - self._max_size, )).rowcount
+
+    def size(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._count = 0
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
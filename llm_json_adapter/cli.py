@@ -0,0 +1,352 @@
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import tempfile
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                wait)
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .llm_json_adapter import LLMJsonAdapter
+from .objects import Request, Response
+from .providers import ProviderRegistry
+
+Line = Tuple[int, str]
+
+# State of a worker process, set up once by initialize_worker.
+_adapter: Optional[LLMJsonAdapter] = None
+_schemas: Dict[str, Response] = {}
+_concurrency = 8
+
+
+def parse_attribute(text: str) -> Tuple[str, Any]:
+    key, separator, value = text.partition('=')
+    if not separator:
+        raise argparse.ArgumentTypeError(
+            f'Attribute must be KEY=VALUE: {text}')
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def parse_schema(text: str) -> Tuple[str, str]:
+    name, separator, path = text.partition('=')
+    if not separator:
+        raise argparse.ArgumentTypeError(f'Schema must be NAME=PATH: {text}')
+    return name, path
+
+
+def load_schema(name: str, path: str) -> Dict:
+    data = json.loads(Path(path).read_text())
+    if 'parameters' in data:
+        return {'name': name, 'description': name, **data}
+    return {'name': name, 'description': name, 'parameters': data}
+
+
+def create_request(data: Dict) -> Request:
+    function = data.get('function')
+    if function is None:
+        name = data.get('schema')
+        if name not in _schemas:
+            raise KeyError(f'Unknown schema: {name}')
+        function = _schemas[name]
+    return Request(prompt=data['prompt'],
+                   function=function,
+                   language=data.get('language'),
+                   act_as=data.get('act_as'))
+
+
+def initialize_worker(config: Dict):
+    global _adapter, _schemas, _concurrency
+    provider = config['provider']
+    if ':' in provider:
+        ProviderRegistry.register(provider, provider)
+    logger = logging.getLogger('llm_json_adapter')
+    _adapter = LLMJsonAdapter(
+        provider_name=provider,
+        attributes=dict(config['attributes']),
+        language=config['language'],
+        max_retry_count=config['max_retry_count'],
+        logger=logger if config['verbose'] else None,
+        requests_per_minute=config['requests_per_minute'],
+        max_concurrency=config['max_concurrency'])
+    _schemas = {
+        name: Response(**schema)
+        for name, schema in config['schemas'].items()
+    }
+    _concurrency = config['concurrency']
+
+
+def process_chunk(lines: List[Line]) -> Tuple[List[str], int]:
+    """Answers one chunk of input lines.
+
+    Returns the output lines and how many of them are errors.
+    """
+    records: List[Dict] = []
+    requests: List[Request] = []
+    pending: List[Dict] = []
+    for line_number, text in lines:
+        record: Dict[str, Any] = {'line': line_number}
+        records.append(record)
+        try:
+            data = json.loads(text)
+            record['id'] = data.get('id')
+            requests.append(create_request(data))
+            pending.append(record)
+        except Exception as e:
+            record['error'] = f'{type(e).__name__}: {e}'
+
+    for batch_result in _adapter.generate_many(requests, _concurrency):
+        record = pending[batch_result.index]
+        if batch_result.succeeded:
+            record['result'] = batch_result.result
+        else:
+            record['error'] = (f'{type(batch_result.error).__name__}: '
+                               f'{batch_result.error}')
+    output_lines = [
+        json.dumps(record, ensure_ascii=False) + '\n' for record in records
+    ]
+    return output_lines, sum('error' in record for record in records)
+
+
+class Checkpoint(object):
+    """Tracks finished chunks and the output size that covers them.
+
+    Chunks below ``watermark`` are all finished; ``completed`` holds the
+    finished chunks above it, which is never more than the chunks in
+    flight.
+    """
+
+    def __init__(self, path: Path, chunk_size: int):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.watermark = 0
+        self.completed: Set[int] = set()
+        self.output_offset = 0
+
+    def load(self) -> bool:
+        if not self.path.exists():
+            return False
+        state = json.loads(self.path.read_text())
+        if state['chunk_size'] != self.chunk_size:
+            raise ValueError(f'Checkpoint was written with --chunk-size '
+                             f'{state["chunk_size"]}')
+        self.watermark = state['watermark']
+        self.completed = set(state['completed'])
+        self.output_offset = state['output_offset']
+        return True
+
+    def is_done(self, chunk_index: int) -> bool:
+        return chunk_index < self.watermark or chunk_index in self.completed
+
+    def mark(self, chunk_index: int, output_offset: int):
+        self.completed.add(chunk_index)
+        while self.watermark in self.completed:
+            self.completed.remove(self.watermark)
+            self.watermark += 1
+        self.output_offset = output_offset
+        self.save()
+
+    def save(self):
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.path.parent,
+                                                      prefix=self.path.name)
+        with os.fdopen(descriptor, 'w') as file:
+            json.dump(
+                {
+                    'chunk_size': self.chunk_size,
+                    'watermark': self.watermark,
+                    'completed': sorted(self.completed),
+                    'output_offset': self.output_offset,
+                }, file)
+        os.replace(temporary_path, self.path)
+
+
+def read_chunks(path: Path, chunk_size: int,
+                checkpoint: Checkpoint) -> Iterator[Tuple[int, List[Line]]]:
+    with path.open(encoding='utf-8') as file:
+        lines = ((line_number, text)
+                 for line_number, text in enumerate(file, start=1))
+        for chunk_index in itertools.count():
+            chunk = list(itertools.islice(lines, chunk_size))
+            if not chunk:
+                return
+            if checkpoint.is_done(chunk_index):
+                continue
+            chunk = [(number, text) for number, text in chunk if text.strip()]
+            yield chunk_index, chunk
+
+
+def run(arguments: argparse.Namespace) -> int:
+    input_path = Path(arguments.input)
+    output_path = Path(arguments.output)
+    checkpoint = Checkpoint(
+        Path(arguments.checkpoint or f'{arguments.output}.checkpoint'),
+        arguments.chunk_size)
+    try:
+        resumed = checkpoint.load()
+    except ValueError as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 2
+
+    attributes = {}
+    if arguments.attributes is not None:
+        attributes.update(json.loads(Path(arguments.attributes).read_text()))
+    attributes.update(dict(arguments.attribute))
+    processes = max(arguments.workers, 1)
+    config = {
+        'provider':
+        arguments.provider,
+        'attributes':
+        attributes,
+        'schemas': {
+            name: load_schema(name, path)
+            for name, path in arguments.schema
+        },
+        'language':
+        arguments.language,
+        'max_retry_count':
+        arguments.max_retry_count,
+        'concurrency':
+        arguments.concurrency,
+        'verbose':
+        arguments.verbose,
+        # Rate limits are enforced per process.
+        'requests_per_minute':
+        (arguments.requests_per_minute /
+         processes if arguments.requests_per_minute else None),
+        'max_concurrency':
+        arguments.max_concurrency,
+    }
+
+    if resumed and (not output_path.exists()
+                    or output_path.stat().st_size < checkpoint.output_offset):
+        print(f'error: {output_path} is shorter than its checkpoint',
+              file=sys.stderr)
+        return 2
+    # Drop output written after the last checkpoint, so that a resumed
+    # run does not repeat lines.
+    with output_path.open('ab') as output:
+        output.truncate(checkpoint.output_offset if resumed else 0)
+    if resumed:
+        print(f'Resuming from {checkpoint.path}', file=sys.stderr)
+
+    executor = None
+    if arguments.workers > 0:
+        executor = ProcessPoolExecutor(
+            max_workers=arguments.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=initialize_worker,
+            initargs=(config, ))
+    else:
+        initialize_worker(config)
+
+    counts = {'lines': 0, 'errors': 0}
+
+    def write(chunk_index: int, processed: Tuple[List[str], int]):
+        output_lines, errors = processed
+        output.write(''.join(output_lines).encode('utf-8'))
+        output.flush()
+        os.fsync(output.fileno())
+        checkpoint.mark(chunk_index, output.tell())
+        counts['lines'] += len(output_lines)
+        counts['errors'] += errors
+        print(f'{counts["lines"]} lines, {counts["errors"]} errors',
+              file=sys.stderr)
+
+    chunks = read_chunks(input_path, arguments.chunk_size, checkpoint)
+    try:
+        with output_path.open('ab') as output:
+            if executor is None:
+                for chunk_index, chunk in chunks:
+                    write(chunk_index, process_chunk(chunk))
+                return 0
+
+            max_pending = arguments.workers * 2
+            pending: Dict[Future, int] = {}
+            while True:
+                for chunk_index, chunk in itertools.islice(
+                        chunks, max_pending - len(pending)):
+                    pending[executor.submit(process_chunk,
+                                            chunk)] = chunk_index
+                if not pending:
+                    return 0
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(pending.pop(future), future.result())
+    except KeyboardInterrupt:
+        print('Interrupted; run the same command again to resume',
+              file=sys.stderr)
+        return 130
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='llm-json-adapter')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser(
+        'run', help='answer a JSONL file of prompts into a JSONL file')
+    run_parser.add_argument('input', help='input JSONL file')
+    run_parser.add_argument('output', help='output JSONL file')
+    run_parser.add_argument('--provider',
+                            required=True,
+                            help='provider name or module:Class')
+    run_parser.add_argument('--attributes',
+                            help='JSON file with provider attributes')
+    run_parser.add_argument('--attribute',
+                            '-a',
+                            action='append',
+                            type=parse_attribute,
+                            default=[],
+                            metavar='KEY=VALUE',
+                            help='provider attribute; VALUE may be JSON')
+    run_parser.add_argument('--schema',
+                            '-s',
+                            action='append',
+                            type=parse_schema,
+                            default=[],
+                            metavar='NAME=PATH',
+                            help='schema that lines refer to by "schema"')
+    run_parser.add_argument('--workers',
+                            type=int,
+                            default=os.cpu_count(),
+                            help='worker processes; 0 runs in-process')
+    run_parser.add_argument('--concurrency',
+                            type=int,
+                            default=8,
+                            help='concurrent requests per worker')
+    run_parser.add_argument('--chunk-size',
+                            type=int,
+                            default=100,
+                            help='lines per checkpointed chunk')
+    run_parser.add_argument(
+        '--checkpoint', help='checkpoint file (default: OUTPUT.checkpoint)')
+    run_parser.add_argument('--language', default='en')
+    run_parser.add_argument('--max-retry-count', type=int, default=3)
+    run_parser.add_argument('--requests-per-minute',
+                            type=float,
+                            help='total across all workers')
+    run_parser.add_argument('--max-concurrency',
+                            type=int,
+                            help='adaptive in-flight limit per worker')
+    run_parser.add_argument('--verbose', '-v', action='store_true')
+    run_parser.set_defaults(handler=run)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arguments = create_parser().parse_args(argv)
+    if arguments.verbose:
+        logging.basicConfig(level=logging.INFO)
+    return arguments.handler(arguments)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
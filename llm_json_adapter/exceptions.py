@@ -1,6 +1,24 @@
+from typing import Optional
+
+
 class RetryableError(Exception):
     pass
 
 
+class RateLimitError(RetryableError):
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TransportError(RetryableError):
+    pass
+
+
 class ExceededMaxRetryCountError(Exception):
     pass
+
+
+class UnknownProviderError(Exception):
+    pass
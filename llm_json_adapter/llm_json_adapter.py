@@ -1,18 +1,29 @@
 import asyncio
-import json
+import contextlib
+import copy
 import logging
+import time
 from pathlib import Path
-from typing import Dict, Optional
+from typing import (TYPE_CHECKING, AsyncIterator, Awaitable, Dict, Iterable,
+                    List, Optional, Tuple, Union)
 
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
+from .bulk import BulkJob
+from .exceptions import (ExceededMaxRetryCountError, RateLimitError,
+                         RetryableError, TransportError)
+from .objects import BatchResult, Request, Response, StreamEvent
+from .providers import Provider, ProviderRegistry
+from .scheduling import (ConcurrencyController, RateLimiter, RequestPacker,
+                         RetryPolicy, SingleFlight, SpeculationPolicy)
+from .utilities import (EventLoopRunner, Instrumentation, JsonUtility,
+                        SchemaPartitioner, SchemaValidator, TokenEstimator)
 
-from .exceptions import ExceededMaxRetryCountError, RetryableError
-from .objects import Response
-from .providers import Provider
+if TYPE_CHECKING:
+    from .caches import Cache
 
 
 class LLMJsonAdapter(object):
+    _cache_ignored_attributes = ('api_key', 'access_key_id',
+                                 'secret_access_key')
 
     def __init__(
         self,
@@ -21,43 +32,144 @@ class LLMJsonAdapter(object):
         language: str = 'en',
         max_retry_count: int = 3,
         logger: Optional[logging.Logger] = None,
+        cache: Optional['Cache'] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        instrumentation: Optional[Instrumentation] = None,
+        single_flight: Union[bool, SingleFlight] = False,
+        speculation: Optional[SpeculationPolicy] = None,
     ):
         self._max_retry_count = max_retry_count
         self._logger = logger
         self._attributes = attributes
         self._language = language
+        self._cache = cache
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._provider_name = provider_name.lower()
+        self._instrumentation = instrumentation or Instrumentation()
+        self._speculation = speculation
+        self._single_flight: Optional[SingleFlight] = None
+        if isinstance(single_flight, SingleFlight):
+            self._single_flight = single_flight
+        elif single_flight:
+            self._single_flight = SingleFlight()
         self._provider: Provider = self.get_provider(provider_name)
+        self._provider.set_instrumentation(self._instrumentation)
+        self._runner = EventLoopRunner.get_shared()
+
+        limiter_key = self.get_limiter_key()
+        self._rate_limiter: Optional[RateLimiter] = None
+        if requests_per_minute is not None or tokens_per_minute is not None:
+            self._rate_limiter = RateLimiter.get(
+                limiter_key,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute)
+        self._concurrency_controller: Optional[ConcurrencyController] = None
+        if max_concurrency is not None:
+            self._concurrency_controller = ConcurrencyController.get(
+                limiter_key, max_concurrency=max_concurrency)
+
+    @property
+    def cache(self) -> Optional['Cache']:
+        return self._cache
+
+    @property
+    def instrumentation(self) -> Instrumentation:
+        return self._instrumentation
+
+    @property
+    def recovery_stats(self) -> Dict[str, int]:
+        return dict(self._provider.recovery_stats)
 
     def get_provider(self, provider_name: str) -> Provider:
-        if provider_name.lower() == 'google':
-            from .providers.google import Provider as GoogleProvider
-            return GoogleProvider(logger=self._logger,
-                                  attributes=self._attributes)
-        elif provider_name.lower() == 'openai':
-            from .providers.openai import Provider as OpenAIProvider
-            return OpenAIProvider(logger=self._logger,
-                                  attributes=self._attributes)
-        elif provider_name.lower() == 'ollama':
-            from .providers.ollama import Provider as OllamaProvider
-            return OllamaProvider(logger=self._logger,
-                                  attributes=self._attributes)
-        elif provider_name.lower() == 'bedrock':
-            from .providers.bedrock import Provider as BedrockProvider
-            return BedrockProvider(logger=self._logger,
-                                   attributes=self._attributes)
-        else:
-            raise Exception(f'Unknown provider: {provider_name}')
+        provider_class = ProviderRegistry.get(provider_name)
+        return provider_class(logger=self._logger, attributes=self._attributes)
 
     @staticmethod
     def validate_jsonschema(json_schema: dict) -> bool:
-        meta_schema_path = Path(
-            __file__).parent / 'schemas' / '2020-12.schema.json'
-        meta_schema = json.loads(meta_schema_path.read_text())
+        return SchemaValidator.is_valid_schema(json_schema)
+
+    @staticmethod
+    def validate_result(result: Dict, function: Response):
+        error_message = SchemaValidator.get_error_message(
+            result, function.parameters)
+        if error_message is not None:
+            raise RetryableError(
+                f'Response does not match the JSON schema: {error_message}')
+
+    def validate_result_with_span(self, result: Dict, function: Response):
+        with self._instrumentation.span('validation',
+                                        provider=self._provider_name):
+            self.validate_result(result, function)
+
+    def on_retry(self, retry_count: int, error: Exception):
+        if self._logger is not None:
+            self._logger.error('Failed to generate response: %s', error)
+        if self._instrumentation.enabled:
+            self._instrumentation.emit('retry',
+                                       provider=self._provider_name,
+                                       attempt=retry_count,
+                                       reason=type(error).__name__,
+                                       message=str(error))
+
+    def get_limiter_key(self) -> str:
+        model = (self._attributes or {}).get('model')
+        return f'{self._provider_name}:{model}'
+
+    @staticmethod
+    def estimate_tokens(prompt: str, function: Response) -> int:
+        return TokenEstimator.estimate(
+            prompt + JsonUtility.canonical_dumps(function.parameters))
+
+    @contextlib.asynccontextmanager
+    async def provider_slot(self, prompt: str, function: Response):
+        controller = self._concurrency_controller
+        with self._instrumentation.span('queue_wait',
+                                        provider=self._provider_name):
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire(
+                    self.estimate_tokens(prompt, function))
+            if controller is not None:
+                await controller.acquire()
+
+        if controller is None:
+            yield
+            return
+
         try:
-            validate(instance=json_schema, schema=meta_schema)
-            return True
-        except ValidationError as e:
-            return False
+            yield
+        except RateLimitError:
+            controller.on_throttle()
+            raise
+        else:
+            controller.on_success()
+        finally:
+            controller.release()
+
+    async def wait_before_retry(self, retry_count: int, error: Exception):
+        delay = self._retry_policy.get_delay(retry_count, error)
+        if delay > 0:
+            if self._logger is not None:
+                self._logger.info(f'Retrying in {delay:.2f} seconds')
+            await asyncio.sleep(delay)
+
+    def get_cache_key(self, prompt: str, function: Response,
+                      language: Optional[str], act_as: Optional[str]) -> str:
+        attributes = {
+            key: value
+            for key, value in (self._attributes or {}).items()
+            if key not in self._cache_ignored_attributes
+        }
+        return JsonUtility.stable_hash({
+            "prompt": prompt,
+            "function": function.model_dump(),
+            "language": language,
+            "act_as": act_as,
+            "provider": self._provider_name,
+            "attributes": attributes,
+        })
 
     async def generate_async(self,
                              prompt: str,
@@ -70,18 +182,53 @@ class LLMJsonAdapter(object):
         if language is None:
             language = self._language
 
+        cache_key = None
+        if self._cache is not None or self._single_flight is not None:
+            cache_key = self.get_cache_key(prompt, function, language, act_as)
+        if self._cache is not None:
+            cached_result = await self._cache.aget(cache_key)
+            if cached_result is not None:
+                return cached_result
+
+        if self._single_flight is None:
+            return await self.generate_with_retries(prompt, function, language,
+                                                    act_as, cache_key)
+        result, shared = await self._single_flight.run(
+            cache_key, lambda: self.generate_with_retries(
+                prompt, function, language, act_as, cache_key))
+        if shared and self._instrumentation.enabled:
+            self._instrumentation.emit('deduplicated',
+                                       provider=self._provider_name)
+        # Every caller, the one that started the call included, gets its own
+        # copy of the shared result.
+        return copy.deepcopy(result)
+
+    async def generate_with_retries(self, prompt: str, function: Response,
+                                    language: str, act_as: Optional[str],
+                                    cache_key: Optional[str]) -> Dict:
         retry_count = 0
         latest_message = ""
         while retry_count < self._max_retry_count:
             retry_count += 1
             try:
-                return await self._provider.generate(prompt, function,
-                                                     language, act_as)
+                samples = 1
+                if self._speculation is not None:
+                    samples = self._speculation.get_sample_count(
+                        function.get_fingerprint())
+                if samples > 1:
+                    result = await self.generate_speculative(
+                        prompt, function, language, act_as, samples)
+                else:
+                    result = await self.generate_attempt(
+                        prompt, function, language, act_as)
+                if self._cache is not None:
+                    await self._cache.aset(cache_key, result)
+                return result
             except RetryableError as e:
-                if self._logger is not None:
-                    self._logger.error(f'Failed to generate response: {e}')
-                    latest_message = str(e)
-                continue
+                self.on_retry(retry_count, e)
+                latest_message = str(e)
+                if retry_count < self._max_retry_count:
+                    await self.wait_before_retry(retry_count, e)
 
         if self._logger is not None:
             self._logger.error(
@@ -92,10 +239,481 @@ class LLMJsonAdapter(object):
             f'Exceeded max retry count: {self._max_retry_count} Latest exception is: {latest_message}'
         )
 
+    def record_attempt(self, function: Response, error: Optional[Exception]):
+        # Throttling and transport failures say nothing about the schema.
+        if self._speculation is None or isinstance(
+                error, (RateLimitError, TransportError)):
+            return
+        self._speculation.record(function.get_fingerprint(), error is None)
+
+    async def generate_attempt(self, prompt: str, function: Response,
+                               language: str, act_as: Optional[str]) -> Dict:
+        try:
+            async with self.provider_slot(prompt, function):
+                result = await self._provider.generate(prompt, function,
+                                                       language, act_as)
+            self.validate_result_with_span(result, function)
+        except RetryableError as e:
+            self.record_attempt(function, e)
+            raise
+        self.record_attempt(function, None)
+        return result
+
+    async def generate_speculative(self, prompt: str, function: Response,
+                                   language: str, act_as: Optional[str],
+                                   samples: int) -> Dict:
+        if self._instrumentation.enabled:
+            self._instrumentation.emit('speculation',
+                                       provider=self._provider_name,
+                                       samples=samples)
+        if self._provider.supports_native_sampling(function):
+            async with self.provider_slot(prompt, function):
+                candidates = await self._provider.generate_samples(
+                    prompt, function, language, act_as, samples)
+            latest_error: Optional[RetryableError] = None
+            for candidate in candidates:
+                try:
+                    if isinstance(candidate, RetryableError):
+                        raise candidate
+                    self.validate_result_with_span(candidate, function)
+                except RetryableError as e:
+                    self.record_attempt(function, e)
+                    latest_error = e
+                    continue
+                self.record_attempt(function, None)
+                return candidate
+            raise latest_error or RetryableError('No samples were returned')
+
+        tasks = [
+            asyncio.ensure_future(
+                self.generate_attempt(prompt, function, language, act_as))
+            for _ in range(samples)
+        ]
+        try:
+            latest_error = None
+            for task in asyncio.as_completed(tasks):
+                try:
+                    return await task
+                except RetryableError as e:
+                    latest_error = e
+            raise latest_error
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     def generate(self,
                  prompt: str,
                  function: Response,
                  language: Optional[str] = None,
                  act_as: Optional[str] = None) -> Dict:
-        return asyncio.run(
+        return self._runner.run(
             self.generate_async(prompt, function, language, act_as))
+
+    async def generate_decomposed_async(self,
+                                        prompt: str,
+                                        function: Response,
+                                        language: Optional[str] = None,
+                                        act_as: Optional[str] = None,
+                                        max_part_tokens: int = 512,
+                                        max_parts: int = 8) -> Dict:
+        if not self.validate_jsonschema(function.parameters):
+            raise Exception('Invalid JSON schema')
+
+        parts = SchemaPartitioner.partition(function, max_part_tokens,
+                                            max_parts)
+        if len(parts) == 1:
+            return await self.generate_async(prompt, function, language,
+                                             act_as)
+
+        # Each part retries on its own; the first part that gives up
+        # cancels the others.
+        tasks = [
+            asyncio.ensure_future(
+                self.generate_async(prompt, part, language, act_as))
+            for part in parts
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks,
+                                         return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        result = SchemaPartitioner.merge([task.result() for task in tasks])
+        error_message = SchemaValidator.get_error_message(
+            result, function.parameters)
+        if error_message is None:
+            return result
+        if self._logger is not None:
+            self._logger.error(
+                'Merged parts do not match the JSON schema, generating the '
+                'whole object: %s', error_message)
+        return await self.generate_async(prompt, function, language, act_as)
+
+    def generate_decomposed(self,
+                            prompt: str,
+                            function: Response,
+                            language: Optional[str] = None,
+                            act_as: Optional[str] = None,
+                            max_part_tokens: int = 512,
+                            max_parts: int = 8) -> Dict:
+        return self._runner.run(
+            self.generate_decomposed_async(prompt, function, language, act_as,
+                                           max_part_tokens, max_parts))
+
+    async def generate_stream(
+            self,
+            prompt: str,
+            function: Response,
+            language: Optional[str] = None,
+            act_as: Optional[str] = None) -> AsyncIterator[StreamEvent]:
+        if not self.validate_jsonschema(function.parameters):
+            raise Exception('Invalid JSON schema')
+
+        if language is None:
+            language = self._language
+
+        cache_key = None
+        if self._cache is not None:
+            cache_key = self.get_cache_key(prompt, function, language, act_as)
+            cached_result = await self._cache.aget(cache_key)
+            if cached_result is not None:
+                yield StreamEvent(type='complete', value=cached_result)
+                return
+
+        retry_count = 0
+        latest_message = ""
+        while retry_count < self._max_retry_count:
+            retry_count += 1
+            parser = self._provider.create_stream_parser()
+            stream = self._provider.generate_stream(prompt, function, language,
+                                                    act_as)
+            try:
+                try:
+                    async with self.provider_slot(prompt, function):
+                        started_at = (time.perf_counter() if
+                                      self._instrumentation.enabled else None)
+                        async for chunk in stream:
+                            if started_at is not None:
+                                self._instrumentation.emit(
+                                    'time_to_first_token',
+                                    provider=self._provider_name,
+                                    duration=time.perf_counter() - started_at)
+                                started_at = None
+                            for event in parser.feed(chunk):
+                                error_message = \
+                                    SchemaValidator.get_partial_error_message(
+                                        event.value, event.path,
+                                        function.parameters)
+                                if error_message is not None:
+                                    raise RetryableError(
+                                        f'Response does not match the JSON schema: {error_message}'
+                                    )
+                                yield event
+                            if parser.is_complete:
+                                break
+                except ValueError as e:
+                    raise RetryableError(f'Failed to parse json block: {e}')
+                finally:
+                    await stream.aclose()
+
+                result = parser.result
+                if not isinstance(result, dict):
+                    result = self._provider.parse_content(
+                        parser.text, function)
+                self.validate_result_with_span(result, function)
+                if cache_key is not None:
+                    await self._cache.aset(cache_key, result)
+                yield StreamEvent(type='complete', value=result)
+                return
+            except RetryableError as e:
+                self.on_retry(retry_count, e)
+                latest_message = str(e)
+                if retry_count < self._max_retry_count:
+                    yield StreamEvent(type='retry', value=latest_message)
+                    await self.wait_before_retry(retry_count, e)
+
+        if self._logger is not None:
+            self._logger.error(
+                f'Exceeded max retry count: {self._max_retry_count} Latest exception is: {latest_message}'
+            )
+
+        raise ExceededMaxRetryCountError(
+            f'Exceeded max retry count: {self._max_retry_count} Latest exception is: {latest_message}'
+        )
+
+    async def generate_batch_item_async(
+            self, index: int, request: Union[Request, Dict]) -> BatchResult:
+        try:
+            if not isinstance(request, Request):
+                request = Request(**request)
+            result = await self.generate_async(request.prompt,
+                                               request.function,
+                                               request.language,
+                                               request.act_as)
+            return BatchResult(index=index, request=request, result=result)
+        except Exception as e:
+            if self._logger is not None:
+                self._logger.error(
+                    f'Failed to generate batch item {index}: {e}')
+            return BatchResult(index=index, request=request, error=e)
+
+    async def generate_many_as_completed(
+            self,
+            requests: Iterable[Union[Request, Dict]],
+            concurrency: int = 8) -> AsyncIterator[BatchResult]:
+        if concurrency < 1:
+            raise ValueError('concurrency must be greater than 0')
+
+        items = enumerate(requests)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+        async def worker():
+            try:
+                for index, request in items:
+                    await queue.put(await self.generate_batch_item_async(
+                        index, request))
+            except Exception as e:
+                await queue.put(e)
+                return
+            await queue.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        running_workers = len(workers)
+        try:
+            while running_workers > 0:
+                batch_result = await queue.get()
+                if batch_result is None:
+                    running_workers -= 1
+                    continue
+                if isinstance(batch_result, Exception):
+                    raise batch_result
+                yield batch_result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def generate_many_async(self,
+                                  requests: Iterable[Union[Request, Dict]],
+                                  concurrency: int = 8) -> List[BatchResult]:
+        results = []
+        async for batch_result in self.generate_many_as_completed(
+                requests, concurrency):
+            results.append(batch_result)
+        results.sort(key=lambda batch_result: batch_result.index)
+        return results
+
+    def generate_many(self,
+                      requests: Iterable[Union[Request, Dict]],
+                      concurrency: int = 8) -> List[BatchResult]:
+        return self._runner.run(self.generate_many_async(
+            requests, concurrency))
+
+    async def generate_pack_async(
+        self, pack: List[Tuple[int, Request]], packer: RequestPacker
+    ) -> Tuple[List[BatchResult], List[Tuple[int, Request]],
+               Optional[RetryableError]]:
+        request = pack[0][1]
+        function = request.function
+        language = request.language or self._language
+        prompt = packer.generate_prompt(pack)
+        try:
+            async with self.provider_slot(prompt, function):
+                result = await self._provider.generate(
+                    prompt, packer.get_packed_function(function, len(pack)),
+                    language, request.act_as)
+        except RetryableError as e:
+            return [], pack, e
+
+        results = packer.split_result(result, pack)
+        completed, remaining, error_messages = [], [], []
+        for number, (index, item_request) in enumerate(pack):
+            if number in results:
+                error_message = SchemaValidator.get_error_message(
+                    results[number], function.parameters)
+            else:
+                error_message = 'Missing from the packed response'
+            if error_message is not None:
+                remaining.append((index, item_request))
+                error_messages.append(f'{number}: {error_message}')
+                continue
+            if self._cache is not None:
+                await self._cache.aset(
+                    self.get_cache_key(item_request.prompt, function, language,
+                                       item_request.act_as), results[number])
+            completed.append(
+                BatchResult(index=index,
+                            request=item_request,
+                            result=results[number]))
+        if not remaining:
+            return completed, remaining, None
+        return completed, remaining, RetryableError(
+            'Packed items do not match the JSON schema: ' +
+            '; '.join(error_messages))
+
+    async def generate_many_packed_async(
+            self,
+            requests: Iterable[Union[Request, Dict]],
+            max_pack_size: int = 16,
+            max_prompt_tokens: Optional[int] = None,
+            max_output_tokens: Optional[int] = None,
+            output_tokens_per_item: Optional[int] = None,
+            concurrency: int = 8) -> List[BatchResult]:
+        if concurrency < 1:
+            raise ValueError('concurrency must be greater than 0')
+        if max_output_tokens is None:
+            max_output_tokens = self._provider.get_max_tokens(None)
+        packer = RequestPacker(max_pack_size=max_pack_size,
+                               max_prompt_tokens=max_prompt_tokens,
+                               max_output_tokens=max_output_tokens,
+                               output_tokens_per_item=output_tokens_per_item)
+
+        results: List[BatchResult] = []
+        pending: List[Tuple[int, Request]] = []
+        for index, request in enumerate(requests):
+            if not isinstance(request, Request):
+                try:
+                    request = Request(**request)
+                except (TypeError, ValueError) as e:
+                    results.append(
+                        BatchResult(index=index, request=request, error=e))
+                    continue
+            if not self.validate_jsonschema(request.function.parameters):
+                results.append(
+                    BatchResult(index=index,
+                                request=request,
+                                error=Exception('Invalid JSON schema')))
+                continue
+            if self._cache is not None:
+                cached_result = await self._cache.aget(
+                    self.get_cache_key(request.prompt, request.function,
+                                       request.language or self._language,
+                                       request.act_as))
+                if cached_result is not None:
+                    results.append(
+                        BatchResult(index=index,
+                                    request=request,
+                                    result=cached_result))
+                    continue
+            pending.append((index, request))
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(pack: List[Tuple[int, Request]]):
+            async with semaphore:
+                try:
+                    return await self.generate_pack_async(pack, packer)
+                except Exception as e:
+                    # Not retryable: fail this pack's items and keep the
+                    # results of the other packs.
+                    if self._logger is not None:
+                        self._logger.error(f'Failed to generate pack: {e}')
+                    return [
+                        BatchResult(index=index, request=request, error=e)
+                        for index, request in pack
+                    ], [], None
+
+        retry_count = 0
+        latest_error: Optional[RetryableError] = None
+        while pending and retry_count < self._max_retry_count:
+            if latest_error is not None:
+                await self.wait_before_retry(retry_count, latest_error)
+            retry_count += 1
+            outcomes = await asyncio.gather(
+                *(run(pack) for pack in packer.pack(pending, self._language)))
+            pending = []
+            for completed, remaining, error in outcomes:
+                results.extend(completed)
+                pending.extend(remaining)
+                if error is not None:
+                    self.on_retry(retry_count, error)
+                    latest_error = error
+
+        for index, request in pending:
+            results.append(
+                BatchResult(
+                    index=index,
+                    request=request,
+                    error=ExceededMaxRetryCountError(
+                        f'Exceeded max retry count: {self._max_retry_count} Latest exception is: {latest_error}'
+                    )))
+        results.sort(key=lambda batch_result: batch_result.index)
+        return results
+
+    def generate_many_packed(self,
+                             requests: Iterable[Union[Request, Dict]],
+                             max_pack_size: int = 16,
+                             max_prompt_tokens: Optional[int] = None,
+                             max_output_tokens: Optional[int] = None,
+                             output_tokens_per_item: Optional[int] = None,
+                             concurrency: int = 8) -> List[BatchResult]:
+        return self._runner.run(
+            self.generate_many_packed_async(requests, max_pack_size,
+                                            max_prompt_tokens,
+                                            max_output_tokens,
+                                            output_tokens_per_item,
+                                            concurrency))
+
+    async def generate_bulk(self,
+                            requests: Iterable[Union[Request, Dict]],
+                            checkpoint_path: Union[str, Path],
+                            work_dir: Optional[Union[str, Path]] = None,
+                            batch_size: int = 50000,
+                            max_pending_batches: int = 1,
+                            poll_interval: float = 60.0,
+                            max_attempts: Optional[int] = None,
+                            min_batch_size: Optional[int] = None,
+                            **backend_options) -> AsyncIterator[BatchResult]:
+
+        def generate_online(request: Request) -> Awaitable[Dict]:
+            return self.generate_async(request.prompt, request.function,
+                                       request.language, request.act_as)
+
+        job = BulkJob(self._provider.create_bulk_backend(**backend_options),
+                      checkpoint_path,
+                      work_dir=work_dir,
+                      batch_size=batch_size,
+                      max_pending_batches=max_pending_batches,
+                      poll_interval=poll_interval,
+                      max_attempts=max_attempts or self._max_retry_count,
+                      language=self._language,
+                      logger=self._logger,
+                      min_batch_size=min_batch_size,
+                      fallback=generate_online)
+        async for batch_result in job.run(requests):
+            yield batch_result
+
+    async def aclose(self):
+        await self._provider.close()
+
+    def close(self):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(
+                'close() cannot be called from a running event loop, '
+                'use "await adapter.aclose()" instead')
+        if self._runner.is_running:
+            self._runner.run(self.aclose())
+        else:
+            asyncio.run(self.aclose())
+
+    def __enter__(self) -> "LLMJsonAdapter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def __aenter__(self) -> "LLMJsonAdapter":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
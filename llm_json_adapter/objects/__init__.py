@@ -1 +1,5 @@
+from .batch_result import BatchResult
+from .extraction import Extraction
+from .request import Request
 from .response import Response
+from .stream_event import StreamEvent
@@ -0,0 +1,18 @@
+from typing import Dict, Optional, Union
+
+from pydantic import BaseModel, ConfigDict
+
+from .request import Request
+
+
+class BatchResult(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    index: int
+    request: Union[Request, Dict]
+    result: Optional[Dict] = None
+    error: Optional[Exception] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
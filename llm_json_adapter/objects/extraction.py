@@ -0,0 +1,8 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class Extraction(BaseModel):
+    value: Any
+    tier: str
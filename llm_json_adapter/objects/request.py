@@ -0,0 +1,12 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from .response import Response
+
+
+class Request(BaseModel):
+    prompt: str
+    function: Response
+    language: Optional[str] = None
+    act_as: Optional[str] = None
@@ -1,7 +1,28 @@
-from pydantic import BaseModel
+import copy
+from typing import Optional, Tuple
+
+from pydantic import BaseModel, PrivateAttr
 
 
 class Response(BaseModel):
     name: str
     description: str
     parameters: dict
+
+    _fingerprint: Optional[Tuple[Tuple, str]] = PrivateAttr(default=None)
+
+    def get_fingerprint(self) -> str:
+        # The model and its parameters dict are mutable, so the fingerprint
+        # is kept with a copy of the fields it was computed from and reused
+        # only while they still compare equal. A deep comparison costs a
+        # fraction of re-serializing and hashing the schema. The private
+        # storage is read directly because pydantic's __getattr__ fallback
+        # for private attributes costs more than the comparison.
+        source = (self.name, self.description, self.parameters)
+        cached = self.__pydantic_private__['_fingerprint']
+        if cached is not None and cached[0] == source:
+            return cached[1]
+        from ..utilities import JsonUtility
+        fingerprint = JsonUtility.stable_hash(self.model_dump())
+        self._fingerprint = (copy.deepcopy(source), fingerprint)
+        return fingerprint
@@ -0,0 +1,9 @@
+from typing import Any, List, Union
+
+from pydantic import BaseModel
+
+
+class StreamEvent(BaseModel):
+    type: str
+    path: List[Union[str, int]] = []
+    value: Any = None
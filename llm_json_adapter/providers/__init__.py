@@ -1 +1,3 @@
+from .client_registry import ClientRegistry
 from .provider import Provider
+from .registry import ProviderRegistry
@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Tuple
+
+from ...bulk import BulkBackend as BaseBulkBackend
+from ...bulk.bulk_backend import BulkOutput
+from ...objects import Request
+from ...utilities import ThreadPool
+
+if TYPE_CHECKING:
+    from .provider import Provider
+
+
+class BulkBackend(BaseBulkBackend):
+    # Default "minimum number of records per batch inference job" quota.
+    min_batch_size = 100
+    _finished_statuses = ('Completed', 'PartiallyCompleted', 'Failed',
+                          'Stopped', 'Expired')
+
+    def __init__(self, provider: "Provider", input_uri: str, output_uri: str,
+                 role_arn: str):
+        self._provider = provider
+        self._input_uri = input_uri.rstrip('/')
+        self._output_uri = output_uri.rstrip('/')
+        self._role_arn = role_arn
+        self._input_names: Dict[str, str] = {}
+
+    @staticmethod
+    def split_uri(uri: str) -> Tuple[str, str]:
+        bucket, _, key = uri[len('s3://'):].partition('/')
+        return bucket, key
+
+    def get_model(self) -> str:
+        return self._provider.get_attribute(
+            'model', default_value="anthropic.claude-3-haiku-20240307-v1:0")
+
+    def render_line(self, custom_id: str, request: Request,
+                    language: str) -> Dict:
+        messages = self._provider.generate_chat_prompt(
+            prompt=request.prompt,
+            function=request.function,
+            language=language,
+            act_as=request.act_as)
+        return {
+            "recordId":
+            custom_id,
+            "modelInput":
+            self._provider.generate_body_structure(
+                model=self.get_model(),
+                prompt=messages,
+                max_tokens=self._provider.get_max_tokens(request.function)),
+        }
+
+    async def submit(self, path: Path, name: str) -> str:
+        input_uri = f'{self._input_uri}/{path.name}'
+        bucket, key = self.split_uri(input_uri)
+        await ThreadPool.run(self._provider.get_client("s3").put_object,
+                             Bucket=bucket,
+                             Key=key,
+                             Body=path.read_bytes())
+        response = await ThreadPool.run(
+            self._provider.get_client("bedrock").create_model_invocation_job,
+            jobName=name,
+            roleArn=self._role_arn,
+            modelId=self.get_model(),
+            inputDataConfig={"s3InputDataConfig": {
+                "s3Uri": input_uri
+            }},
+            outputDataConfig={
+                "s3OutputDataConfig": {
+                    "s3Uri": self._output_uri
+                }
+            })
+        return response["jobArn"]
+
+    async def get_job(self, batch_id: str) -> Dict:
+        return await ThreadPool.run(
+            self._provider.get_client("bedrock").get_model_invocation_job,
+            jobIdentifier=batch_id)
+
+    async def is_finished(self, batch_id: str) -> bool:
+        job = await self.get_job(batch_id)
+        return job["status"] in self._finished_statuses
+
+    async def fetch_results(self, batch_id: str) -> BulkOutput:
+        job = await self.get_job(batch_id)
+        input_name = job["inputDataConfig"]["s3InputDataConfig"][
+            "s3Uri"].rsplit('/', 1)[-1]
+        output_uri = job["outputDataConfig"]["s3OutputDataConfig"]["s3Uri"]
+        bucket, key = self.split_uri(
+            f"{output_uri.rstrip('/')}/{batch_id.rsplit('/', 1)[-1]}/{input_name}.out"
+        )
+        client = self._provider.get_client("s3")
+        try:
+            response = await ThreadPool.run(client.get_object,
+                                            Bucket=bucket,
+                                            Key=key)
+        except client.exceptions.NoSuchKey:
+            return {}
+        outputs: BulkOutput = {}
+        for line in response["Body"].read().decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("modelOutput") is not None:
+                outputs[record["recordId"]] = (record["modelOutput"], None)
+            else:
+                outputs[record["recordId"]] = (
+                    None, f"Bedrock batch error: {record.get('error')}")
+        return outputs
+
+    def extract_result(self, body: Dict, request: Request) -> Dict:
+        text = self._provider.extract_content(model=self.get_model(),
+                                              response_body=body)
+        return self._provider.parse_content(text=text,
+                                            function=request.function)
@@ -1,64 +1,217 @@
 import json
-import logging
-from typing import Dict, List, Optional, Union
+from typing import (TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple,
+                    Union)
 
 import boto3
 from botocore.client import BaseClient
+from botocore.config import Config
+from botocore.exceptions import (ClientError, EndpointConnectionError,
+                                 HTTPClientError)
+from botocore.model import NoShapeFoundError
 
-from ...exceptions import RetryableError
+from ...exceptions import RateLimitError, RetryableError, TransportError
 from ...objects import Response
-from ...utilities import JsonUtility
+from ...utilities import JsonUtility, ThreadPool
+from ..client_registry import ClientRegistry
 from ..provider import Provider as BaseProvider
 
+if TYPE_CHECKING:
+    from .bulk_backend import BulkBackend
+
 
 class Provider(BaseProvider):
+    _api_name = "Bedrock"
+    _throttling_error_codes = ('ThrottlingException',
+                               'TooManyRequestsException',
+                               'ServiceQuotaExceededException')
+    _transport_error_codes = ('ModelTimeoutException',
+                              'ServiceUnavailableException',
+                              'InternalServerException',
+                              'ModelNotReadyException')
     _required_attributes = {
         'access_key_id': None,
         'secret_access_key': None,
         'region': "us-east-1",
         'model': 'anthropic.claude-3-haiku-20240307-v1:0',
-        'max_tokens': 1024,
+        'max_tokens': 'auto',
     }
+    _structured_output_keywords = None
+    # Output limits of model families below default_max_output_tokens; Llama
+    # rejects max_gen_len above 2048.
+    _max_output_tokens_by_provider = {'meta': 2048}
 
-    def __init__(self,
-                 logger: Optional[logging.Logger] = None,
-                 attributes: Optional[Dict] = None):
-        super().__init__(logger=logger, attributes=attributes)
-        self._client = self.get_client()
-
-    def get_client(self) -> BaseClient:
+    def create_client(self,
+                      service_name: str = "bedrock-runtime") -> BaseClient:
         return boto3.client(
-            service_name="bedrock-runtime",
+            service_name=service_name,
             aws_access_key_id=self.get_attribute('access_key_id',
                                                  default_value=None),
             aws_secret_access_key=self.get_attribute('secret_access_key',
                                                      default_value=None),
             region_name=self.get_attribute('region',
                                            default_value="us-east-1"),
+            config=Config(max_pool_connections=self.get_max_connections()),
         )
 
+    def get_max_connections(self) -> int:
+        return self.get_attribute('max_connections',
+                                  default_value=ThreadPool.max_workers)
+
+    def get_client_key(self, service_name: str = "bedrock-runtime") -> Tuple:
+        return (self._api_name, service_name,
+                JsonUtility.stable_hash([
+                    self.get_attribute('access_key_id', default_value=None),
+                    self.get_attribute('secret_access_key',
+                                       default_value=None),
+                ]), self.get_attribute('region', default_value="us-east-1"),
+                self.get_max_connections())
+
+    def get_client(self, service_name: str = "bedrock-runtime") -> BaseClient:
+        if service_name == "bedrock-runtime" and self._client is not None:
+            return self._client
+        return ClientRegistry.get(self.get_client_key(service_name),
+                                  lambda: self.create_client(service_name),
+                                  closer=self.close_client)
+
+    @staticmethod
+    def close_client(client: BaseClient):
+        client.close()
+
+    def get_max_output_tokens(self) -> int:
+        limit = super().get_max_output_tokens()
+        model = self.get_attribute(
+            'model', default_value="anthropic.claude-3-haiku-20240307-v1:0")
+        provider_limit = self._max_output_tokens_by_provider.get(
+            model.split(".")[0])
+        return limit if provider_limit is None else min(limit, provider_limit)
+
     def get_models(self) -> List[str]:
         result = []
-        client = boto3.client(
-            service_name="bedrock",
-            aws_access_key_id=self.get_attribute('access_key_id',
-                                                 default_value=None),
-            aws_secret_access_key=self.get_attribute('secret_access_key',
-                                                     default_value=None),
-            region_name=self.get_attribute('region',
-                                           default_value="us-east-1"),
-        )
-        response = client.list_foundation_models()
+        response = self.get_client("bedrock").list_foundation_models()
         for summary in response["modelSummaries"]:
             result.append(summary["modelId"])
 
         return result
 
+    def supports_structured_output(self, function: Response) -> bool:
+        model = self.get_attribute(
+            'model', default_value="anthropic.claude-3-haiku-20240307-v1:0")
+        if model.split(".")[0] != "anthropic":
+            self.debug_log(
+                "%s can only force tool use for Anthropic models, "
+                "using prompt-based generation", self._api_name)
+            return False
+        if not hasattr(self.get_client(), 'converse'):
+            self.debug_log("This boto3 version has no Converse API, "
+                           "using prompt-based generation")
+            return False
+        return True
+
+    def supports_cache_points(self) -> bool:
+        # cachePoint was added to the Converse API after converse itself.
+        service_model = getattr(getattr(self.get_client(), 'meta', None),
+                                'service_model', None)
+        if service_model is None:
+            return True
+        try:
+            shape = service_model.shape_for('SystemContentBlock')
+        except NoShapeFoundError:
+            return False
+        return 'cachePoint' in shape.members
+
+    def generate_converse_request(self,
+                                  prompt: str,
+                                  function: Response,
+                                  language: str = "en",
+                                  act_as: Optional[str] = None) -> Dict:
+        system_messages = self.get_prompt_template(
+            self.get_template_key('chat', function, language, act_as), lambda:
+            self.render_chat_system_messages(function, language, act_as))
+        # Only the act_as and language instructions; the schema is enforced
+        # through the tool definition.
+        system = [{"text": system_messages[0]["content"]}]
+        tools = [{
+            "toolSpec": {
+                "name": function.name,
+                "description": function.description,
+                "inputSchema": {
+                    "json": function.parameters
+                },
+            },
+        }]
+        if self.is_static_first() and self.supports_cache_points():
+            system.append({"cachePoint": {"type": "default"}})
+            tools.append({"cachePoint": {"type": "default"}})
+        return {
+            "modelId":
+            self.get_attribute(
+                'model',
+                default_value="anthropic.claude-3-haiku-20240307-v1:0"),
+            "messages": [{
+                "role": "user",
+                "content": [{
+                    "text": prompt
+                }],
+            }],
+            "system":
+            system,
+            "inferenceConfig": {
+                "maxTokens": self.get_max_tokens(function),
+            },
+            "toolConfig": {
+                "tools": tools,
+                "toolChoice": {
+                    "tool": {
+                        "name": function.name
+                    }
+                },
+            },
+        }
+
+    async def generate_with_converse(self,
+                                     prompt: str,
+                                     function: Response,
+                                     language: str = "en",
+                                     act_as: Optional[str] = None) -> Dict:
+        request = self.generate_converse_request(prompt, function, language,
+                                                 act_as)
+        self.debug_log("Converse Request: %s", request)
+
+        try:
+            with self.provider_span():
+                response = await ThreadPool.run(self.get_client().converse,
+                                                **request)
+        except Exception as e:
+            raise self.convert_error(e)
+
+        self.debug_log("Converse Response: %s", response)
+        if self.instrumentation.enabled:
+            usage = response.get("usage", {})
+            self.emit_usage(
+                prompt_tokens=usage.get("inputTokens"),
+                completion_tokens=usage.get("outputTokens"),
+                cached_tokens=usage.get("cacheReadInputTokens"),
+                cache_write_tokens=usage.get("cacheWriteInputTokens"))
+
+        for block in response.get("output", {}).get("message",
+                                                    {}).get("content", []):
+            tool_use = block.get("toolUse")
+            if tool_use is not None and isinstance(tool_use.get("input"),
+                                                   dict):
+                self.recovery_stats['native'] += 1
+                return tool_use["input"]
+
+        self.recovery_stats['failed'] += 1
+        raise RetryableError('Failed to extract tool input')
+
     async def generate(self,
                        prompt: str,
                        function: Response,
                        language: str = "en",
                        act_as: Optional[str] = None) -> Optional[Dict]:
+        if self.use_structured_output(function):
+            return await self.generate_with_converse(prompt, function,
+                                                     language, act_as)
 
         generated_prompt = self.generate_chat_prompt(
             prompt=prompt,
@@ -70,35 +223,153 @@ class Provider(BaseProvider):
         model_name = self.get_attribute(
             'model', default_value="anthropic.claude-3-haiku-20240307-v1:0")
 
-        self.debug_log(f"Generated Prompt: {generated_prompt}")
-        self.debug_log(f"Model ID: {model_name}")
+        self.debug_log("Generated Prompt: %s", generated_prompt)
+        self.debug_log("Model ID: %s", model_name)
 
+        max_tokens = self.get_max_tokens(function)
         structured_body = self.generate_body_structure(model=model_name,
-                                                       prompt=generated_prompt)
+                                                       prompt=generated_prompt,
+                                                       max_tokens=max_tokens)
 
-        self.debug_log(f"Structured Body: {structured_body}")
+        self.debug_log("Structured Body: %s", structured_body)
 
-        response = self._client.invoke_model(modelId=model_name,
-                                             body=json.dumps(structured_body))
-        response_body = json.loads(response.get("body").read())
+        response_body = await self.invoke_model_async(model_name,
+                                                      structured_body)
+        self.debug_log("Response Body: %s", response_body)
 
-        self.debug_log(f"Response Body: {response_body}")
+        async def resume(partial: str) -> Tuple[str, bool]:
+            # Prefill the assistant turn so that the model continues the
+            # partial JSON instead of starting over.
+            continuation_body = await self.invoke_model_async(
+                model_name,
+                self.generate_body_structure(model=model_name,
+                                             prompt=generated_prompt +
+                                             [{
+                                                 "role": "assistant",
+                                                 "content": partial,
+                                             }],
+                                             max_tokens=max_tokens))
+            return (self.extract_content(model=model_name,
+                                         response_body=continuation_body),
+                    self.is_truncated(model=model_name,
+                                      response_body=continuation_body))
 
-        result = self.extract_content(model=model_name,
-                                      response_body=response_body)
+        result = await self.complete_truncated(
+            self.extract_content(model=model_name,
+                                 response_body=response_body),
+            self.is_truncated(model=model_name, response_body=response_body),
+            resume)
 
-        self.debug_log(f"Extracted Content: {result}")
+        self.debug_log("Extracted Content: %s", result)
 
-        result = JsonUtility.extract_json_block(text=result)
-        if not isinstance(result, dict):
-            raise RetryableError('Failed to extract json block')
+        return self.parse_content(text=result, function=function)
 
-        return result
+    async def generate_stream(
+            self,
+            prompt: str,
+            function: Response,
+            language: str = "en",
+            act_as: Optional[str] = None) -> AsyncIterator[str]:
+
+        generated_prompt = self.generate_chat_prompt(
+            prompt=prompt,
+            function=function,
+            language=language,
+            act_as=act_as,
+        )
+
+        model_name = self.get_attribute(
+            'model', default_value="anthropic.claude-3-haiku-20240307-v1:0")
+
+        structured_body = self.generate_body_structure(
+            model=model_name,
+            prompt=generated_prompt,
+            max_tokens=self.get_max_tokens(function))
+
+        try:
+            response = await ThreadPool.run(
+                self.get_client().invoke_model_with_response_stream,
+                modelId=model_name,
+                body=json.dumps(structured_body))
+        except Exception as e:
+            raise self.convert_error(e)
+
+        stream = response.get("body")
+        events = iter(stream)
+        cache_usage = {}
+        try:
+            while True:
+                event = await ThreadPool.run(next, events, None)
+                if event is None:
+                    break
+                chunk = event.get("chunk")
+                if chunk is None:
+                    continue
+                chunk_body = JsonUtility.loads(chunk["bytes"])
+                if chunk_body.get("type") == "message_start":
+                    usage = chunk_body.get("message", {}).get("usage", {})
+                    cache_usage = {
+                        "cached_tokens":
+                        usage.get("cache_read_input_tokens"),
+                        "cache_write_tokens":
+                        usage.get("cache_creation_input_tokens"),
+                    }
+                metrics = chunk_body.get("amazon-bedrock-invocationMetrics")
+                if metrics is not None and self.instrumentation.enabled:
+                    self.emit_usage(
+                        prompt_tokens=metrics.get("inputTokenCount"),
+                        completion_tokens=metrics.get("outputTokenCount"),
+                        **cache_usage)
+                text = self.extract_stream_content(model=model_name,
+                                                   chunk_body=chunk_body)
+                if text:
+                    yield text
+        except Exception as e:
+            raise self.convert_error(e)
+        finally:
+            stream.close()
+
+    def create_bulk_backend(self, **options) -> "BulkBackend":
+        from .bulk_backend import BulkBackend
+        return BulkBackend(self, **options)
+
+    def convert_error(self, error: Exception) -> RetryableError:
+        message = f"{self._api_name} API exception: {error}"
+        if isinstance(error, ClientError):
+            code = error.response.get("Error", {}).get("Code")
+            if code in self._throttling_error_codes:
+                return RateLimitError(message)
+            if code in self._transport_error_codes:
+                return TransportError(message)
+        if isinstance(error, (EndpointConnectionError, HTTPClientError)):
+            return TransportError(message)
+        return super().convert_error(error)
+
+    def invoke_model(self, model: str, body: dict) -> dict:
+        response = self.get_client().invoke_model(modelId=model,
+                                                  body=json.dumps(body))
+        return JsonUtility.loads(response.get("body").read())
+
+    async def invoke_model_async(self, model: str, body: dict) -> dict:
+        try:
+            with self.provider_span():
+                response_body = await ThreadPool.run(self.invoke_model,
+                                                     model=model,
+                                                     body=body)
+        except Exception as e:
+            raise self.convert_error(e)
+        if self.instrumentation.enabled:
+            self.emit_usage(
+                **self.extract_usage(model=model, response_body=response_body))
+        return response_body
 
     # Parameters Ref: https://docs.aws.amazon.com/bedrock/latest/userguide/model-parameters.html
-    def generate_body_structure(
-            self, model: str, prompt: Union[List[Dict[str, str]],
-                                            str]) -> dict:
+    def generate_body_structure(self,
+                                model: str,
+                                prompt: Union[List[Dict[str, str]], str],
+                                max_tokens: Optional[int] = None) -> dict:
+        if max_tokens is None:
+            max_tokens = self.get_max_tokens(None)
         provider = model.split(".")[0]
         if provider == "anthropic":
             prompts = []
@@ -110,10 +381,19 @@ class Provider(BaseProvider):
                 if message.get("role") == "system":
                     system_messages.append(message.get("content"))
 
+            system = "\n".join(system_messages)
+            if self.is_static_first():
+                system = [{
+                    "type": "text",
+                    "text": system,
+                    "cache_control": {
+                        "type": "ephemeral"
+                    },
+                }]
             return {
                 "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": self.get_attribute('max_tokens', default_value=1024),
-                "system": "\n".join(system_messages),
+                "max_tokens": max_tokens,
+                "system": system,
                 "messages": prompts,
             }
         elif provider == "meta":
@@ -122,7 +402,7 @@ class Provider(BaseProvider):
                 "prompt": prompt,
                 "temperature": 0.5,
                 "top_p": 0.9,
-                "max_gen_len": self.get_attribute('max_tokens', default_value=1024),
+                "max_gen_len": max_tokens,
             }
         else:
             return {}
@@ -142,3 +422,45 @@ class Provider(BaseProvider):
             return response_body.get("generation")
         else:
             return ""
+
+    @staticmethod
+    def is_truncated(model: str, response_body: dict) -> bool:
+        provider = model.split(".")[0]
+        if provider == "anthropic":
+            return response_body.get("stop_reason") == "max_tokens"
+        elif provider == "meta":
+            return response_body.get("stop_reason") == "length"
+        else:
+            return False
+
+    @staticmethod
+    def extract_usage(model: str, response_body: dict) -> Dict:
+        provider = model.split(".")[0]
+        if provider == "anthropic":
+            usage = response_body.get("usage", {})
+            return {
+                "prompt_tokens": usage.get("input_tokens"),
+                "completion_tokens": usage.get("output_tokens"),
+                "cached_tokens": usage.get("cache_read_input_tokens"),
+                "cache_write_tokens": usage.get("cache_creation_input_tokens"),
+            }
+        elif provider == "meta":
+            return {
+                "prompt_tokens": response_body.get("prompt_token_count"),
+                "completion_tokens":
+                response_body.get("generation_token_count"),
+            }
+        else:
+            return {"prompt_tokens": None, "completion_tokens": None}
+
+    @staticmethod
+    def extract_stream_content(model: str, chunk_body: dict) -> str:
+        provider = model.split(".")[0]
+        if provider == "anthropic":
+            if chunk_body.get("type") == "content_block_delta":
+                return chunk_body.get("delta", {}).get("text", "")
+            return ""
+        elif provider == "meta":
+            return chunk_body.get("generation") or ""
+        else:
+            return ""
@@ -0,0 +1,109 @@
+import asyncio
+import inspect
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+Closer = Callable[[Any], Any]
+
+
+class _Entry(object):
+    __slots__ = ('client', 'closer', 'loop', 'last_used')
+
+    def __init__(self, client: Any, closer: Optional[Closer],
+                 loop: Optional[asyncio.AbstractEventLoop]):
+        self.client = client
+        self.closer = closer
+        self.loop = weakref.ref(loop) if loop is not None else None
+        self.last_used = time.monotonic()
+
+    def is_bound_to(self, loop: Optional[asyncio.AbstractEventLoop]) -> bool:
+        if self.loop is None:
+            return loop is None
+        return self.loop() is loop
+
+    def is_stale(self) -> bool:
+        if self.loop is None:
+            return False
+        loop = self.loop()
+        return loop is None or loop.is_closed()
+
+
+class ClientRegistry(object):
+    idle_timeout = 600.0
+
+    _clients: Dict[Tuple, _Entry] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls,
+            key: Tuple[Hashable, ...],
+            factory: Callable[[], Any],
+            closer: Optional[Closer] = None,
+            loop_bound: bool = False) -> Any:
+        loop = None
+        if loop_bound:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            key = key + (id(loop), )
+
+        with cls._lock:
+            evicted = cls._evict_idle()
+            entry = cls._clients.get(key)
+            if entry is not None and not entry.is_bound_to(loop):
+                evicted.append(cls._clients.pop(key))
+                entry = None
+            if entry is None:
+                entry = _Entry(factory(), closer, loop)
+                cls._clients[key] = entry
+            entry.last_used = time.monotonic()
+            client = entry.client
+
+        for stale in evicted:
+            cls._close(stale)
+        return client
+
+    @classmethod
+    def _evict_idle(cls) -> list:
+        now = time.monotonic()
+        keys = [
+            key for key, entry in cls._clients.items()
+            if now - entry.last_used > cls.idle_timeout or entry.is_stale()
+        ]
+        return [cls._clients.pop(key) for key in keys]
+
+    @classmethod
+    def evict_idle(cls) -> int:
+        with cls._lock:
+            evicted = cls._evict_idle()
+        for entry in evicted:
+            cls._close(entry)
+        return len(evicted)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            entries = list(cls._clients.values())
+            cls._clients.clear()
+        for entry in entries:
+            cls._close(entry)
+
+    @classmethod
+    def size(cls) -> int:
+        return len(cls._clients)
+
+    @staticmethod
+    def _close(entry: _Entry):
+        if entry.closer is None:
+            return
+        result = entry.closer(entry.client)
+        if not inspect.isawaitable(result):
+            return
+        loop = entry.loop() if entry.loop is not None else None
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(result, loop)
+        elif inspect.iscoroutine(result):
+            result.close()
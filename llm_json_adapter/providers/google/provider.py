@@ -1,55 +1,142 @@
-import logging
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Optional, Tuple
 
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from google.generativeai.generative_models import GenerativeModel
 
-from ...exceptions import RetryableError
+from ...exceptions import RateLimitError, RetryableError, TransportError
 from ...objects import Response
-from ...utilities import JsonUtility
+from ...utilities import JsonUtility, SchemaSerializer
 from ..provider import Provider as BaseProvider
 
 
 class Provider(BaseProvider):
+    _api_name = "Google"
+    _loop_bound_client = True
+    _annotation_keywords = ('title', 'default', 'examples', '$schema', '$id',
+                            '$comment')
+    _structured_output_keywords = frozenset(
+        ('type', 'properties', 'required', 'items', 'enum', 'description',
+         'format', 'nullable', 'minItems', 'maxItems') + _annotation_keywords)
     _required_attributes = {
         'api_key': None,
         'model': 'gemini-1.5-pro-latest',
     }
 
-    def __init__(self,
-                 logger: Optional[logging.Logger] = None,
-                 attributes: Optional[Dict] = None):
-        super().__init__(logger=logger, attributes=attributes)
-        self._client = self.get_client()
-
-    def get_client(self) -> GenerativeModel:
+    def create_client(self) -> GenerativeModel:
         genai.configure(
             api_key=self.get_attribute('api_key', default_value=None))
         model = genai.GenerativeModel(
             model_name=self.get_attribute('model', default_value=None))
         return model
 
+    def get_client_key(self) -> Tuple:
+        return (self._api_name,
+                JsonUtility.stable_hash(
+                    self.get_attribute('api_key', default_value=None)),
+                self.get_attribute('model', default_value=None))
+
+    def supports_structured_output(self, function: Response) -> bool:
+        if not super().supports_structured_output(function):
+            return False
+        for schema in SchemaSerializer.iter_schemas(function.parameters):
+            if not isinstance(schema.get('type'), str):
+                self.debug_log(
+                    "%s needs a single type per schema, "
+                    "using prompt-based generation", self._api_name)
+                return False
+        return True
+
+    def generate_options(self, function: Response) -> Dict:
+        generation_config = {}
+        max_tokens = self.get_max_tokens(function)
+        if max_tokens is not None:
+            generation_config["max_output_tokens"] = max_tokens
+        if self.use_structured_output(function):
+            generation_config["response_mime_type"] = "application/json"
+            generation_config["response_schema"] = self.get_prompt_template(
+                self.get_template_key('google_response_schema', function, None,
+                                      None),
+                lambda: SchemaSerializer.strip_keywords(
+                    function.parameters, self._annotation_keywords))
+        if not generation_config:
+            return {}
+        return {"generation_config": generation_config}
+
     async def generate(self,
                        prompt: str,
                        function: Response,
                        language: str = "en",
                        act_as: Optional[str] = None) -> Optional[Dict]:
 
+        native = self.use_structured_output(function)
         generated_prompt = self.generate_prompt(
             prompt=prompt,
             function=function,
             language=language,
             act_as=act_as,
+            native=native,
         )
 
         try:
-            response = self._client.generate_content(generated_prompt)
+            with self.provider_span():
+                response = await self.get_client().generate_content_async(
+                    generated_prompt, **self.generate_options(function))
         except Exception as e:
-            print(e)
-            raise RetryableError(f"Google API exception: {e}")
+            raise self.convert_error(e)
+
+        if self.instrumentation.enabled:
+            self.emit_usage(**self.extract_usage(response))
 
-        result = JsonUtility.extract_json_block(text=response.text)
-        if not isinstance(result, dict):
-            raise RetryableError('Failed to extract json block')
+        return self.parse_content(text=response.text,
+                                  function=function,
+                                  native=native)
 
-        return result
+    @staticmethod
+    def extract_usage(response) -> Dict:
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is None:
+            return {
+                "prompt_tokens": None,
+                "completion_tokens": None,
+                "cached_tokens": None,
+            }
+        return {
+            "prompt_tokens": usage.prompt_token_count,
+            "completion_tokens": usage.candidates_token_count,
+            "cached_tokens": getattr(usage, 'cached_content_token_count',
+                                     None),
+        }
+
+    def convert_error(self, error: Exception) -> RetryableError:
+        message = f"{self._api_name} API exception: {error}"
+        if isinstance(error, google_exceptions.ResourceExhausted):
+            return RateLimitError(message)
+        if isinstance(error, (google_exceptions.ServerError,
+                              google_exceptions.DeadlineExceeded)):
+            return TransportError(message)
+        return super().convert_error(error)
+
+    async def generate_stream(
+            self,
+            prompt: str,
+            function: Response,
+            language: str = "en",
+            act_as: Optional[str] = None) -> AsyncIterator[str]:
+
+        generated_prompt = self.generate_prompt(
+            prompt=prompt,
+            function=function,
+            language=language,
+            act_as=act_as,
+        )
+
+        try:
+            response = await self.get_client().generate_content_async(
+                generated_prompt, stream=True)
+            async for chunk in response:
+                yield chunk.text
+            if self.instrumentation.enabled:
+                self.emit_usage(**self.extract_usage(response))
+        except Exception as e:
+            raise self.convert_error(e)
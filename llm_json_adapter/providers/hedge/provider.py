@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Union
+
+from ...exceptions import RetryableError
+from ...objects import Response
+from ...utilities import Instrumentation, LatencyStats, SchemaValidator
+from ..provider import Provider as BaseProvider
+from ..registry import ProviderRegistry
+
+
+class Provider(BaseProvider):
+    _api_name = "Hedge"
+    _required_attributes = {
+        'providers': None,
+        'hedge_delay': 'p95',
+        'default_hedge_delay': 2.0,
+        'min_samples': 20,
+        'latency_window': 200,
+    }
+
+    def __init__(self,
+                 logger: Optional[logging.Logger] = None,
+                 attributes: Optional[Dict] = None):
+        super().__init__(logger=logger, attributes=attributes)
+        self._backends: List[BaseProvider] = []
+        self._backend_names: List[str] = []
+        self._latency_stats: List[LatencyStats] = []
+        for config in self.get_attribute('providers', default_value=[]):
+            backend_attributes = dict(config.get('attributes', {}))
+            self._backends.append(
+                ProviderRegistry.create(config['provider'],
+                                        logger=logger,
+                                        attributes=backend_attributes))
+            self._backend_names.append(
+                config.get('name')
+                or f"{config['provider']}:{backend_attributes.get('model')}")
+            self._latency_stats.append(
+                LatencyStats(window=self.get_attribute('latency_window',
+                                                       default_value=200)))
+        if len(self._backends) == 0:
+            raise ValueError("Attribute providers must not be empty")
+
+    def get_hedge_delay(self, index: int) -> float:
+        hedge_delay: Union[str,
+                           float] = self.get_attribute('hedge_delay',
+                                                       default_value='p95')
+        default_delay = self.get_attribute('default_hedge_delay',
+                                           default_value=2.0)
+        if not isinstance(hedge_delay, str):
+            return float(hedge_delay)
+
+        stats = self._latency_stats[index]
+        if stats.count() < self.get_attribute('min_samples', default_value=20):
+            return default_delay
+        delay = stats.percentile(float(hedge_delay.lstrip('p')))
+        return default_delay if delay is None else delay
+
+    def get_latency_stats(self) -> Dict[str, Dict]:
+        return {
+            name: stats.to_dict()
+            for name, stats in zip(self._backend_names, self._latency_stats)
+        }
+
+    async def generate_with_backend(self, index: int, prompt: str,
+                                    function: Response, language: str,
+                                    act_as: Optional[str]) -> Dict:
+        started_at = time.perf_counter()
+        try:
+            result = await self._backends[index].generate(
+                prompt, function, language, act_as)
+            error_message = SchemaValidator.get_error_message(
+                result, function.parameters)
+            if error_message is not None:
+                raise RetryableError(
+                    f'Response does not match the JSON schema: {error_message}'
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._latency_stats[index].record(time.perf_counter() - started_at,
+                                              succeeded=False)
+            raise
+        self._latency_stats[index].record(time.perf_counter() - started_at)
+        return result
+
+    async def generate(self,
+                       prompt: str,
+                       function: Response,
+                       language: str = "en",
+                       act_as: Optional[str] = None) -> Optional[Dict]:
+        pending: Dict[asyncio.Task, int] = {}
+        errors: List[Exception] = []
+        next_index = 0
+
+        def launch():
+            nonlocal next_index
+            self.debug_log("Sending request to %s",
+                           self._backend_names[next_index])
+            task = asyncio.ensure_future(
+                self.generate_with_backend(next_index, prompt, function,
+                                           language, act_as))
+            pending[task] = next_index
+            next_index += 1
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if next_index < len(self._backends):
+                    timeout = self.get_hedge_delay(next_index - 1)
+                done, _ = await asyncio.wait(
+                    pending.keys(),
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+                for task in done:
+                    index = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        self.debug_log("%s failed: %s",
+                                       self._backend_names[index], e)
+                        errors.append(e)
+                        continue
+                    return result
+                if next_index < len(self._backends):
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        for error in errors:
+            if not isinstance(error, RetryableError):
+                raise error
+        raise RetryableError(
+            f"All hedged providers failed: {'; '.join(map(str, errors))}")
+
+    def set_instrumentation(self, instrumentation: Instrumentation):
+        super().set_instrumentation(instrumentation)
+        for backend in self._backends:
+            backend.set_instrumentation(instrumentation)
+
+    async def close(self):
+        for backend in self._backends:
+            await backend.close()
@@ -1,55 +1,124 @@
-import logging
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Optional, Tuple
 
+import httpx
 import ollama
-from ollama import Client
+from ollama import AsyncClient
 
-from ...exceptions import RetryableError
+from ...exceptions import RetryableError, TransportError
 from ...objects import Response
-from ...utilities import JsonUtility
 
 from ..provider import Provider as BaseProvider
 
 
 class Provider(BaseProvider):
+    _api_name = "Ollama"
+    _loop_bound_client = True
+    _structured_output_keywords = frozenset(
+        ('type', 'properties', 'required', 'additionalProperties', 'items',
+         'prefixItems', 'enum', 'const', 'anyOf', 'oneOf', 'allOf', '$ref',
+         '$defs', 'definitions', 'minItems', 'maxItems', 'minLength',
+         'maxLength', 'pattern', 'format', 'minimum', 'maximum',
+         'exclusiveMinimum', 'exclusiveMaximum', 'title', 'description',
+         'default', 'examples', '$schema', '$id', '$comment'))
     _required_attributes = {
         'url': "http://localhost:11434",
         'model': 'llama3',
     }
 
-    def __init__(self,
-                 logger: Optional[logging.Logger] = None,
-                 attributes: Optional[Dict] = None):
-        super().__init__(logger=logger, attributes=attributes)
-        self._client = self.get_client()
+    def create_client(self) -> AsyncClient:
+        options = {}
+        max_connections = self.get_attribute('max_connections',
+                                             default_value=None)
+        if max_connections is not None:
+            options['limits'] = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections)
+        return ollama.AsyncClient(host=self.get_attribute(
+            'url', default_value="http://localhost:11434"),
+                                  **options)
 
-    def get_client(self) -> Client:
-        return ollama.Client(host=self.get_attribute(
-            'url', default_value="http://localhost:11434"), )
+    def get_client_key(self) -> Tuple:
+        return (self._api_name,
+                self.get_attribute('url',
+                                   default_value="http://localhost:11434"),
+                self.get_attribute('max_connections', default_value=None))
+
+    @staticmethod
+    def close_client(client: AsyncClient):
+        return client._client.aclose()
 
     async def generate(self,
                        prompt: str,
                        function: Response,
                        language: str = "en",
                        act_as: Optional[str] = None) -> Optional[Dict]:
+        native = self.use_structured_output(function)
         generated_prompt = self.generate_chat_prompt(
             prompt=prompt,
             function=function,
             language=language,
             act_as=act_as,
+            native=native,
         )
-        self.debug_log(f"Generated Prompt: {generated_prompt}")
-        result = self._client.chat(
-            model=self.get_attribute('model', default_value="llama3"),
-            messages=generated_prompt,
-            stream=False,
-        )
+        self.debug_log("Generated Prompt: %s", generated_prompt)
+        options = {}
+        if native:
+            options['format'] = function.parameters
+        max_tokens = self.get_max_tokens(function)
+        if max_tokens is not None:
+            options['options'] = {'num_predict': max_tokens}
+        try:
+            with self.provider_span():
+                result = await self.get_client().chat(
+                    model=self.get_attribute('model', default_value="llama3"),
+                    messages=generated_prompt,
+                    stream=False,
+                    **options,
+                )
+        except Exception as e:
+            raise self.convert_error(e)
+
+        self.debug_log("Generated Result: %s", result)
+        if self.instrumentation.enabled:
+            self.emit_usage(**self.extract_usage(result))
 
-        self.debug_log(f"Generated Result: {result}")
+        return self.parse_content(text=result['message']['content'],
+                                  function=function,
+                                  native=native)
 
-        result = JsonUtility.extract_json_block(
-            text=result['message']['content'])
-        if not isinstance(result, dict):
-            raise RetryableError('Failed to extract json block')
+    @staticmethod
+    def extract_usage(result) -> Dict:
+        return {
+            "prompt_tokens": result.get('prompt_eval_count'),
+            "completion_tokens": result.get('eval_count'),
+        }
 
-        return result
+    def convert_error(self, error: Exception) -> RetryableError:
+        if isinstance(error, httpx.TransportError):
+            return TransportError(f"{self._api_name} API exception: {error}")
+        return super().convert_error(error)
+
+    async def generate_stream(
+            self,
+            prompt: str,
+            function: Response,
+            language: str = "en",
+            act_as: Optional[str] = None) -> AsyncIterator[str]:
+        generated_prompt = self.generate_chat_prompt(
+            prompt=prompt,
+            function=function,
+            language=language,
+            act_as=act_as,
+        )
+        try:
+            stream = await self.get_client().chat(
+                model=self.get_attribute('model', default_value="llama3"),
+                messages=generated_prompt,
+                stream=True,
+            )
+            async for part in stream:
+                if part.get('done') and self.instrumentation.enabled:
+                    self.emit_usage(**self.extract_usage(part))
+                yield part['message']['content']
+        except Exception as e:
+            raise self.convert_error(e)
@@ -0,0 +1,76 @@
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict
+
+from openai.types.chat import ChatCompletion
+
+from ...bulk import BulkBackend as BaseBulkBackend
+from ...bulk.bulk_backend import BulkOutput
+from ...objects import Request
+
+if TYPE_CHECKING:
+    from .provider import Provider
+
+
+class BulkBackend(BaseBulkBackend):
+    _endpoint = "/v1/chat/completions"
+    _finished_statuses = ('completed', 'failed', 'expired', 'cancelled')
+
+    def __init__(self, provider: "Provider", completion_window: str = "24h"):
+        self._provider = provider
+        self._completion_window = completion_window
+
+    def render_line(self, custom_id: str, request: Request,
+                    language: str) -> Dict:
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": self._endpoint,
+            "body": {
+                "messages":
+                self._provider.generate_messages(request.prompt, language,
+                                                 request.act_as),
+                **self._provider.generate_parameters(request.function),
+            },
+        }
+
+    async def submit(self, path: Path, name: str) -> str:
+        client = self._provider.get_client()
+        with path.open('rb') as file:
+            uploaded = await client.files.create(file=file, purpose="batch")
+        batch = await client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=self._endpoint,
+            completion_window=self._completion_window,
+            metadata={"name": name})
+        return batch.id
+
+    async def is_finished(self, batch_id: str) -> bool:
+        batch = await self._provider.get_client().batches.retrieve(batch_id)
+        return batch.status in self._finished_statuses
+
+    async def fetch_results(self, batch_id: str) -> BulkOutput:
+        client = self._provider.get_client()
+        batch = await client.batches.retrieve(batch_id)
+        outputs: BulkOutput = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id is None:
+                continue
+            content = await client.files.content(file_id)
+            for line in content.text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") == 200:
+                    outputs[record["custom_id"]] = (response.get("body"), None)
+                else:
+                    error = record.get("error") or response.get("body")
+                    outputs[record["custom_id"]] = (
+                        None,
+                        f"{self._provider._api_name} batch error: {error}")
+        return outputs
+
+    def extract_result(self, body: Dict, request: Request) -> Dict:
+        return self._provider.parse_response(
+            ChatCompletion.model_validate(body), request.function)
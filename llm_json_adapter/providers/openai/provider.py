@@ -1,16 +1,33 @@
-import json
-import logging
-from typing import Dict, Optional
+from typing import (TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple,
+                    Union)
 
+import httpx
+import openai
 from openai import AsyncOpenAI
+from openai.types.chat import ChatCompletion
+from openai.types.chat.chat_completion import Choice
 
-from ...exceptions import RetryableError
+from ...exceptions import RateLimitError, RetryableError, TransportError
 from ...objects import Response
-from ..languages import languages
+from ...utilities import IncrementalJsonParser, JsonUtility, SchemaSerializer
 from ..provider import Provider as BaseProvider
 
+if TYPE_CHECKING:
+    from .bulk_backend import BulkBackend
+
 
 class Provider(BaseProvider):
+    _api_name = "OpenAI"
+    _loop_bound_client = True
+    _structured_output_keywords = frozenset(
+        ('type', 'properties', 'required', 'additionalProperties', 'items',
+         'enum', 'const', 'anyOf', '$ref', '$defs', 'definitions', 'title',
+         'description', 'pattern', 'format', 'minimum', 'maximum',
+         'exclusiveMinimum', 'exclusiveMaximum', 'multipleOf', 'minItems',
+         'maxItems', '$schema', '$id', '$comment'))
+    _continuation_instruction = (
+        "Your previous response was cut off. Continue it exactly where it "
+        "stopped. Do not repeat anything and do not add any explanation.")
     _required_attributes = {
         'api_key': None,
         'model': 'gpt-3.5-turbo',
@@ -19,22 +36,53 @@ class Provider(BaseProvider):
         'frequency_penalty': 0.0,
     }
 
-    def __init__(self,
-                 logger: Optional[logging.Logger] = None,
-                 attributes: Optional[Dict] = None):
-        super().__init__(logger=logger, attributes=attributes)
-        self._client = self.get_client()
+    def create_client(self) -> AsyncOpenAI:
+        http_client = None
+        max_connections = self.get_attribute('max_connections',
+                                             default_value=None)
+        if max_connections is not None:
+            http_client = openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=max_connections,
+                                    max_keepalive_connections=max_connections))
+        return AsyncOpenAI(api_key=self.get_attribute('api_key',
+                                                      default_value=None),
+                           base_url=self.get_attribute('base_url',
+                                                       default_value=None),
+                           max_retries=self.get_attribute('max_retries',
+                                                          default_value=2),
+                           http_client=http_client)
 
-    def get_client(self) -> AsyncOpenAI:
-        return AsyncOpenAI(
-            api_key=self.get_attribute('api_key', default_value=None))
+    def get_client_key(self) -> Tuple:
+        return (self._api_name,
+                JsonUtility.stable_hash(
+                    self.get_attribute('api_key', default_value=None)),
+                self.get_attribute('base_url', default_value=None),
+                self.get_attribute('max_retries', default_value=2),
+                self.get_attribute('max_connections', default_value=None))
 
-    async def generate(self,
-                       prompt: str,
-                       function: Response,
-                       language: str = "en",
-                       act_as: Optional[str] = None) -> Optional[Dict]:
+    @staticmethod
+    def close_client(client: AsyncOpenAI):
+        return client.close()
+
+    def generate_messages(self,
+                          prompt: str,
+                          language: str = "en",
+                          act_as: Optional[str] = None) -> List[Dict]:
+        system_messages = self.get_prompt_template(
+            self.get_template_key('openai', None, language, act_as),
+            lambda: self.render_system_messages(language, act_as))
 
+        messages = [dict(message) for message in system_messages]
+        messages.append({
+            "role": "user",
+            "content": prompt,
+        })
+        return messages
+
+    def render_system_messages(
+            self,
+            language: str = "en",
+            act_as: Optional[str] = None) -> Tuple[Dict, ...]:
         messages = []
 
         if act_as is not None:
@@ -44,45 +92,275 @@ class Provider(BaseProvider):
             })
         full_language = self.set_language(language)
         if full_language is not None:
-            full_language = languages[language]
             messages.append({
                 "role": "system",
                 "content": f"Please reply in {full_language}.",
             })
-        messages.append({
-            "role": "user",
-            "content": prompt,
-        })
+        return tuple(messages)
+
+    def render_tools(self, function: Response) -> List[Dict]:
+        definition = function.model_dump()
+        if self.get_attribute('compact_schema', default_value=False):
+            definition["parameters"] = SchemaSerializer.strip_keywords(
+                definition["parameters"])
+        return [{
+            "type": "function",
+            "function": definition,
+        }]
+
+    def supports_structured_output(self, function: Response) -> bool:
+        if not super().supports_structured_output(function):
+            return False
+        # Strict mode requires every property to be required.
+        for schema in SchemaSerializer.iter_schemas(function.parameters):
+            properties = schema.get('properties', {})
+            if ((schema.get('type') == 'object' and 'properties' not in schema)
+                    or set(properties) != set(schema.get('required', []))
+                    or schema.get('additionalProperties', False) is not False):
+                self.debug_log(
+                    "%s strict mode needs all properties required, "
+                    "using tool calling", self._api_name)
+                return False
+        return True
+
+    def render_response_format(self, function: Response) -> Dict:
+
+        def close_object(schema: Dict) -> Dict:
+            if 'properties' in schema:
+                schema['additionalProperties'] = False
+            return schema
+
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name":
+                function.name,
+                "description":
+                function.description,
+                "schema":
+                SchemaSerializer.map_schemas(
+                    SchemaSerializer.strip_keywords(function.parameters),
+                    close_object),
+                "strict":
+                True,
+            },
+        }
+
+    def generate_parameters(self, function: Response) -> Dict:
+        parameters = {
+            "temperature": self.get_attribute('temperature', 0.67),
+            "presence_penalty": self.get_attribute('presence_penalty', 0.0),
+            "frequency_penalty": self.get_attribute('frequency_penalty', 0.0),
+            "model": self.get_attribute('model', 'gpt-3.5-turbo-1106'),
+        }
+        max_tokens = self.get_max_tokens(function)
+        if max_tokens is not None:
+            parameters["max_tokens"] = max_tokens
+        if self.use_structured_output(function):
+            parameters["response_format"] = self.get_prompt_template(
+                self.get_template_key('openai_response_format', function, None,
+                                      None),
+                lambda: self.render_response_format(function))
+            return parameters
+
+        parameters["tools"] = self.get_prompt_template(
+            self.get_template_key('openai_tools', function, None, None),
+            lambda: self.render_tools(function))
+        parameters["tool_choice"] = {
+            "type": "function",
+            "function": {
+                "name": function.name,
+            },
+        }
+        return parameters
+
+    async def generate(self,
+                       prompt: str,
+                       function: Response,
+                       language: str = "en",
+                       act_as: Optional[str] = None) -> Optional[Dict]:
+
+        messages = self.generate_messages(prompt, language, act_as)
+        parameters = self.generate_parameters(function)
+        response = await self.create_completion(messages, parameters)
+
+        text = self.extract_text(response)
+        if text is None:
+            raise RetryableError('Failed to extract json block')
+
+        async def resume(partial: str) -> Tuple[str, bool]:
+            continuation = await self.create_completion(
+                messages + [{
+                    "role": "assistant",
+                    "content": partial,
+                }, {
+                    "role": "user",
+                    "content": self._continuation_instruction,
+                }], {
+                    key: value
+                    for key, value in parameters.items()
+                    if key not in ('tools', 'tool_choice', 'response_format')
+                })
+            return (self.extract_text(continuation)
+                    or "", self.is_truncated(continuation))
+
+        text = await self.complete_truncated(text, self.is_truncated(response),
+                                             resume)
+        return self.parse_content(text=text, function=function, native=True)
 
+    async def create_completion(self, messages: List[Dict],
+                                parameters: Dict) -> ChatCompletion:
         try:
-            response = await self._client.chat.completions.create(
-                temperature=self.get_attribute('temperature', 0.67),
-                messages=messages,
-                tools=[{
-                    "type": "function",
-                    "function": function.model_dump(),
-                }],
-                tool_choice={
-                    "type": "function",
-                    "function": {
-                        "name": function.name,
-                    },
-                },
-                presence_penalty=self.get_attribute('presence_penalty', 0.0),
-                frequency_penalty=self.get_attribute('frequency_penalty', 0.0),
-                model=self.get_attribute('model', 'gpt-3.5-turbo-1106'),
-            )
+            with self.provider_span():
+                response = await self.get_client().chat.completions.create(
+                    messages=messages, **parameters)
         except Exception as e:
-            raise RetryableError(f"OpenAI API exception: {e}")
+            raise self.convert_error(e)
 
+        if self.instrumentation.enabled:
+            self.emit_usage(**self.extract_usage(response.usage))
+        return response
+
+    @staticmethod
+    def extract_choice_text(choice: Choice) -> Optional[str]:
+        if (choice.message is not None
+                and choice.message.tool_calls is not None
+                and len(choice.message.tool_calls) > 0):
+            function_responses = choice.message.tool_calls
+            for function_response in function_responses:
+                if function_response.function is not None:
+                    return function_response.function.arguments
+        if choice.message is not None and choice.message.content:
+            return choice.message.content
+        return None
+
+    def extract_text(self, response: ChatCompletion) -> Optional[str]:
+        for choice in response.choices:
+            text = self.extract_choice_text(choice)
+            if text is not None:
+                return text
+        return None
+
+    def supports_native_sampling(self, function: Response) -> bool:
+        return self.get_attribute('native_sampling', default_value=True)
+
+    async def generate_samples(
+            self,
+            prompt: str,
+            function: Response,
+            language: str = "en",
+            act_as: Optional[str] = None,
+            samples: int = 1) -> List[Union[Dict, RetryableError]]:
+        response = await self.create_completion(
+            self.generate_messages(prompt, language, act_as), {
+                **self.generate_parameters(function), "n": samples
+            })
+        candidates: List[Union[Dict, RetryableError]] = []
         for choice in response.choices:
-            if (choice.message is not None
-                    and choice.message.tool_calls is not None
-                    and len(choice.message.tool_calls) > 0):
-                function_responses = choice.message.tool_calls
-                for function_response in function_responses:
-                    if function_response.function is not None:
-                        arguments = function_response.function.arguments
-                        return json.loads(arguments)
-
-        raise RetryableError('Failed to extract json block')
+            text = self.extract_choice_text(choice)
+            try:
+                if text is None:
+                    raise RetryableError('Failed to extract json block')
+                candidates.append(
+                    self.parse_content(text=text,
+                                       function=function,
+                                       native=True))
+            except RetryableError as e:
+                candidates.append(e)
+        return candidates
+
+    @staticmethod
+    def is_truncated(response: ChatCompletion) -> bool:
+        return any(choice.finish_reason == "length"
+                   for choice in response.choices)
+
+    def parse_response(self, response: ChatCompletion,
+                       function: Response) -> Dict:
+        text = self.extract_text(response)
+        if text is None:
+            raise RetryableError('Failed to extract json block')
+        return self.parse_content(text=text, function=function, native=True)
+
+    @staticmethod
+    def extract_usage(usage) -> Dict:
+        if usage is None:
+            return {
+                "prompt_tokens": None,
+                "completion_tokens": None,
+                "cached_tokens": None,
+            }
+        if isinstance(usage, dict):
+            # SDK versions that do not know a field keep it as a plain dict.
+            details = usage.get('prompt_tokens_details') or {}
+            return {
+                "prompt_tokens": usage.get('prompt_tokens'),
+                "completion_tokens": usage.get('completion_tokens'),
+                "cached_tokens": details.get('cached_tokens'),
+            }
+        details = getattr(usage, 'prompt_tokens_details', None)
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "cached_tokens": getattr(details, 'cached_tokens', None),
+        }
+
+    def create_bulk_backend(self, **options) -> "BulkBackend":
+        from .bulk_backend import BulkBackend
+        return BulkBackend(self, **options)
+
+    def convert_error(self, error: Exception) -> RetryableError:
+        message = f"{self._api_name} API exception: {error}"
+        if isinstance(error, openai.RateLimitError):
+            return RateLimitError(message,
+                                  retry_after=self.parse_retry_after(
+                                      error.response.headers))
+        if isinstance(error,
+                      (openai.APIConnectionError, openai.InternalServerError)):
+            return TransportError(message)
+        return super().convert_error(error)
+
+    def create_stream_parser(self) -> IncrementalJsonParser:
+        return IncrementalJsonParser(fenced=False)
+
+    async def generate_stream(
+            self,
+            prompt: str,
+            function: Response,
+            language: str = "en",
+            act_as: Optional[str] = None) -> AsyncIterator[str]:
+        messages = self.generate_messages(prompt, language, act_as)
+        parameters = self.generate_parameters(function)
+        if self.instrumentation.enabled:
+            # Sent as extra_body: SDK versions before 1.26 have no
+            # stream_options argument.
+            parameters["extra_body"] = {
+                "stream_options": {
+                    "include_usage": True
+                }
+            }
+
+        try:
+            stream = await self.get_client().chat.completions.create(
+                messages=messages, stream=True, **parameters)
+        except Exception as e:
+            raise self.convert_error(e)
+
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    self.emit_usage(**self.extract_usage(chunk.usage))
+                for choice in chunk.choices:
+                    if choice.index != 0 or choice.delta is None:
+                        continue
+                    if choice.delta.content:
+                        yield choice.delta.content
+                    if choice.delta.tool_calls is None:
+                        continue
+                    for tool_call in choice.delta.tool_calls:
+                        if (tool_call.function is not None
+                                and tool_call.function.arguments):
+                            yield tool_call.function.arguments
+        except Exception as e:
+            raise self.convert_error(e)
+        finally:
+            await stream.close()
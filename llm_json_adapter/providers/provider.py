@@ -1,20 +1,69 @@
-import json
+import inspect
 import logging
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from collections import Counter, OrderedDict
+from email.utils import parsedate_to_datetime
+from typing import (TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable,
+                    Dict, FrozenSet, List, Mapping, Optional, Tuple, Union)
 
+from ..exceptions import RateLimitError, RetryableError, TransportError
 from ..objects import Response
+from ..utilities import (IncrementalJsonParser, Instrumentation, JsonRepair,
+                         SchemaSerializer, TokenEstimator)
+from .client_registry import ClientRegistry
 from .languages import languages
 
+if TYPE_CHECKING:
+    from ..bulk import BulkBackend
+
 
 class Provider(object):
+    _api_name = "Provider"
     _required_attributes = {}
+    _loop_bound_client = False
+    # JSON schema keywords the backend can enforce natively. None means any.
+    _structured_output_keywords: Optional[FrozenSet[str]] = frozenset()
+
+    max_prompt_templates = 256
+    # Bounds of max_tokens when the attribute is "auto".
+    min_auto_max_tokens = 256
+    default_max_output_tokens = 4096
+    _prompt_templates: "OrderedDict[Tuple, Any]" = OrderedDict()
+    _prompt_templates_lock = threading.Lock()
 
     def __init__(self,
                  logger: Optional[logging.Logger] = None,
                  attributes: Optional[Dict] = None):
         self._logger = logger
         self._attributes = attributes
+        self.recovery_stats: Counter = Counter()
+        self.instrumentation = Instrumentation()
         self.check_attributes()
+        self._client: Any = None
+        if not self.get_attribute('shared_client', default_value=True):
+            self._client = self.create_client()
+
+    def set_instrumentation(self, instrumentation: Instrumentation):
+        self.instrumentation = instrumentation
+
+    def create_client(self) -> Any:
+        return None
+
+    def get_client_key(self) -> Tuple:
+        return (self._api_name, )
+
+    @staticmethod
+    def close_client(client: Any) -> Any:
+        return None
+
+    def get_client(self) -> Any:
+        if self._client is not None:
+            return self._client
+        return ClientRegistry.get(self.get_client_key(),
+                                  self.create_client,
+                                  closer=self.close_client,
+                                  loop_bound=self._loop_bound_client)
 
     def check_attributes(self):
         if self._attributes is None:
@@ -41,52 +90,220 @@ class Provider(object):
             raise ValueError(f"Language {language} not supported")
         return languages[language]
 
+    def get_prompt_template(self, key: Tuple, render: Callable[[],
+                                                               Any]) -> Any:
+        with self._prompt_templates_lock:
+            if key in self._prompt_templates:
+                self._prompt_templates.move_to_end(key)
+                return self._prompt_templates[key]
+
+        template = render()
+
+        with self._prompt_templates_lock:
+            self._prompt_templates[key] = template
+            while len(self._prompt_templates) > self.max_prompt_templates:
+                self._prompt_templates.popitem(last=False)
+        return template
+
+    @classmethod
+    def clear_prompt_templates(cls):
+        with cls._prompt_templates_lock:
+            cls._prompt_templates.clear()
+
+    def get_schema_text(self, function: Response) -> str:
+        return SchemaSerializer.dumps(function.parameters,
+                                      compact=self.get_attribute(
+                                          'compact_schema',
+                                          default_value=False))
+
+    def get_template_key(self, style: str, function: Optional[Response],
+                         language: Optional[str],
+                         act_as: Optional[str]) -> Tuple:
+        return (style,
+                function.get_fingerprint() if function is not None else None,
+                language, act_as,
+                bool(self.get_attribute('compact_schema',
+                                        default_value=False)))
+
     def generate_prompt(self,
                         prompt: str,
                         function: Response,
                         language: str = "en",
-                        act_as: Optional[str] = None) -> str:
-        generated_prompt = prompt + "\n\n"
+                        act_as: Optional[str] = None,
+                        native: bool = False) -> str:
+        instructions = self.get_prompt_template(
+            self.get_template_key('text:native' if native else 'text',
+                                  function, language, act_as), lambda: self.
+            render_prompt_instructions(function, language, act_as, native))
+        if self.is_static_first():
+            return instructions + prompt
+        return prompt + "\n\n" + instructions
+
+    def render_prompt_instructions(self,
+                                   function: Response,
+                                   language: str = "en",
+                                   act_as: Optional[str] = None,
+                                   native: bool = False) -> str:
+        instructions = ""
 
         if act_as is not None:
-            generated_prompt += f"Please answer as {act_as}.\n\n"
+            instructions += f"Please answer as {act_as}.\n\n"
 
         full_language = self.set_language(language)
         if full_language is not None:
-            full_language = languages[language]
-            generated_prompt += f"Response should be in {full_language}.\n\n"
+            instructions += f"Response should be in {full_language}.\n\n"
 
-        json_format = json.dumps(function.parameters)
-        generated_prompt += (
+        json_format = self.get_schema_text(function)
+        instructions += (
             f"And follow the following Json schema as the response format: \n\n"
             f"\n{json_format}\n\n")
 
-        generated_prompt += (
-            "- Response should be a single valid JSON data\n"
-            "- Response should be wrapped by the markdown code block\n"
-            "- Output only the json response\n"
-            "- No need to output the format itself\n\n")
+        instructions += self.render_format_rules(native)
 
-        return generated_prompt
+        return instructions
 
-    def debug_log(self, message: str):
-        if self._logger is not None:
-            self._logger.debug(message)
+    @staticmethod
+    def render_format_rules(native: bool = False) -> str:
+        # With a natively enforced format the backend returns bare JSON, so
+        # asking for a markdown code block would contradict it.
+        return ("- Response should be a single valid JSON data\n" +
+                ("" if native else
+                 "- Response should be wrapped by the markdown code block\n") +
+                "- Output only the json response\n"
+                "- No need to output the format itself\n\n")
+
+    def supports_structured_output(self, function: Response) -> bool:
+        if self._structured_output_keywords is None:
+            return True
+        unsupported = SchemaSerializer.get_keywords(
+            function.parameters) - self._structured_output_keywords
+        if unsupported:
+            self.debug_log(
+                "%s cannot enforce %s, using prompt-based generation",
+                self._api_name, sorted(unsupported))
+            return False
+        return True
+
+    def use_structured_output(self, function: Response) -> bool:
+        if not self.get_attribute('structured_output', default_value=False):
+            return False
+        return self.get_prompt_template(
+            self.get_template_key(
+                f"{self._api_name}:{self.get_attribute('model', None)}"
+                ":structured_output", function, None, None),
+            lambda: self.supports_structured_output(function))
+
+    def debug_log(self, message: str, *args: Any):
+        if (self._logger is not None
+                and self._logger.isEnabledFor(logging.DEBUG)):
+            self._logger.debug(message, *args)
+
+    def provider_span(self, name: str = 'provider_call'):
+        return self.instrumentation.span(name,
+                                         provider=self._api_name,
+                                         model=self.get_attribute(
+                                             'model', default_value=None))
+
+    def emit_usage(self,
+                   prompt_tokens: Optional[int],
+                   completion_tokens: Optional[int],
+                   cached_tokens: Optional[int] = None,
+                   **attributes: Any):
+        self.instrumentation.emit('token_usage',
+                                  provider=self._api_name,
+                                  model=self.get_attribute('model',
+                                                           default_value=None),
+                                  prompt_tokens=prompt_tokens,
+                                  completion_tokens=completion_tokens,
+                                  cached_tokens=cached_tokens,
+                                  **attributes)
+
+    def get_max_tokens(self, function: Optional[Response]) -> Optional[int]:
+        max_tokens = self.get_attribute('max_tokens', default_value=None)
+        if max_tokens != 'auto':
+            return max_tokens
+        limit = self.get_max_output_tokens()
+        if function is None:
+            return limit
+        estimate = self.get_prompt_template(
+            self.get_template_key('max_tokens', function, None, None),
+            lambda: TokenEstimator.estimate_output(function.parameters))
+        # Leave headroom for whitespace and the markdown fence.
+        return min(max(estimate * 3 // 2 + 32, self.min_auto_max_tokens),
+                   limit)
+
+    def get_max_output_tokens(self) -> int:
+        return self.get_attribute('max_output_tokens',
+                                  default_value=self.default_max_output_tokens)
+
+    async def complete_truncated(
+            self, text: str, truncated: bool,
+            resume: Callable[[str], Awaitable[Tuple[str, bool]]]) -> str:
+        """Asks for the rest of a response that hit the token limit.
+
+        ``resume`` gets the partial text and returns the continuation and
+        whether it was truncated again.
+        """
+        continuation_count = 0
+        while truncated and continuation_count < self.get_attribute(
+                'max_continuations', default_value=2):
+            continuation_count += 1
+            self.recovery_stats['continued'] += 1
+            self.debug_log(
+                "Response was truncated after %d characters, "
+                "continuing (%d)", len(text), continuation_count)
+            if self.instrumentation.enabled:
+                self.instrumentation.emit('continuation',
+                                          provider=self._api_name,
+                                          attempt=continuation_count,
+                                          length=len(text))
+            text = text.rstrip()
+            continuation, truncated = await resume(text)
+            text += continuation
+        return text
+
+    def is_static_first(self) -> bool:
+        layout = self.get_attribute('prompt_layout',
+                                    default_value='prompt_first')
+        if layout not in ('prompt_first', 'static_first'):
+            raise ValueError(f'Unknown prompt_layout: {layout}')
+        return layout == 'static_first'
+
+    def generate_chat_prompt(self,
+                             prompt: str,
+                             function: Response,
+                             language: str = "en",
+                             act_as: Optional[str] = None,
+                             native: bool = False) -> list[dict[str, str]]:
+        system_messages = self.get_prompt_template(
+            self.get_template_key('chat:native' if native else 'chat',
+                                  function, language, act_as), lambda: self.
+            render_chat_system_messages(function, language, act_as, native))
+
+        messages = [dict(message) for message in system_messages]
+        user_message = {
+            "role": "user",
+            "content": prompt,
+        }
+        if self.is_static_first():
+            # Keep the static block as the prefix so that providers can reuse
+            # their prompt cache across requests.
+            messages.append(user_message)
+        else:
+            messages.insert(0, user_message)
+        return messages
 
-    def generate_chat_prompt(
+    def render_chat_system_messages(
             self,
-            prompt: str,
             function: Response,
             language: str = "en",
-            act_as: Optional[str] = None) -> list[dict[str, str]]:
+            act_as: Optional[str] = None,
+            native: bool = False) -> Tuple[dict[str, str], ...]:
 
         full_language = self.set_language(language)
-        json_format = json.dumps(function.parameters)
+        json_format = self.get_schema_text(function)
 
-        messages = [{
-            "role": "user",
-            "content": prompt,
-        }, {
+        return ({
             "role":
             "system",
             "content":
@@ -96,22 +313,19 @@ class Provider(object):
             "system",
             "content":
             f"use the following Json schema as the response format\n"
-            f"```{json_format}```\n\n"
-            "- Response should be a single valid JSON data\n"
-            "- Response should be wrapped by the markdown code block\n"
-            "- Output only the json response\n"
-            "- No need to output the format itself\n\n",
-        }]
-
-        return messages
+            f"```{json_format}```\n\n" + self.render_format_rules(native),
+        })
 
     def convert_to_llama_presentation(self, messages: List[Dict[str,
                                                                 str]]) -> str:
         result = "<|begin_of_text|>"
-        for message in messages:
+        for index, message in enumerate(messages):
             role = message.get("role")
             content = message.get("content")
-            result = result + f"<|start_header_id|>{role}<|end_header_id|>\n{content}<|eot_id|>"
+            result = result + f"<|start_header_id|>{role}<|end_header_id|>\n{content}"
+            # A trailing assistant message is a prefill to be continued.
+            if role != "assistant" or index < len(messages) - 1:
+                result = result + "<|eot_id|>"
         return result
 
     async def generate(self,
@@ -120,3 +334,102 @@ class Provider(object):
                        language: str = "en",
                        act_as: Optional[str] = None) -> Optional[Dict]:
         raise NotImplementedError()
+
+    def supports_native_sampling(self, function: Response) -> bool:
+        return False
+
+    async def generate_samples(
+            self,
+            prompt: str,
+            function: Response,
+            language: str = "en",
+            act_as: Optional[str] = None,
+            samples: int = 1) -> List[Union[Dict, RetryableError]]:
+        """Returns several candidates from one call, failed ones as errors."""
+        raise NotImplementedError()
+
+    def parse_content(self,
+                      text: Optional[str],
+                      function: Response,
+                      native: bool = False) -> Dict:
+        """Extracts the JSON object from a response.
+
+        ``native`` marks text that the backend returned as JSON (tool calls,
+        enforced formats). Parsing it as-is counts as ``native``, not as a
+        recovery.
+        """
+        with self.instrumentation.span('extraction',
+                                       provider=self._api_name) as span:
+            extraction = JsonRepair.extract(text,
+                                            function.parameters,
+                                            object_only=True)
+            if extraction is None or not isinstance(extraction.value, dict):
+                self.recovery_stats['failed'] += 1
+                raise RetryableError('Failed to extract json block')
+            tier = extraction.tier
+            if native and tier in ('fenced', 'balanced'):
+                tier = 'native'
+            self.recovery_stats[tier] += 1
+            span.set_attribute('tier', tier)
+        if tier not in ('fenced', 'native'):
+            self.debug_log("Recovered JSON with tier: %s", tier)
+        return extraction.value
+
+    def convert_error(self, error: Exception) -> RetryableError:
+        if isinstance(error, RetryableError):
+            return error
+        message = f"{self._api_name} API exception: {error}"
+        status_code = getattr(error, 'status_code', None)
+        if status_code == 429:
+            return RateLimitError(message)
+        if isinstance(status_code, int) and status_code >= 500:
+            return TransportError(message)
+        if isinstance(error, (ConnectionError, TimeoutError)):
+            return TransportError(message)
+        return RetryableError(message)
+
+    @staticmethod
+    def parse_retry_after(headers: Optional[Mapping]) -> Optional[float]:
+        if headers is None:
+            return None
+        retry_after_ms = headers.get('retry-after-ms')
+        if retry_after_ms is not None:
+            try:
+                return float(retry_after_ms) / 1000.0
+            except ValueError:
+                pass
+        retry_after = headers.get('retry-after')
+        if retry_after is None:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+        try:
+            return max(
+                parsedate_to_datetime(retry_after).timestamp() - time.time(),
+                0.0)
+        except (TypeError, ValueError):
+            return None
+
+    def create_bulk_backend(self, **options) -> "BulkBackend":
+        raise NotImplementedError(
+            f"{self._api_name} does not support bulk jobs")
+
+    def create_stream_parser(self) -> IncrementalJsonParser:
+        return IncrementalJsonParser(fenced=True)
+
+    def generate_stream(self,
+                        prompt: str,
+                        function: Response,
+                        language: str = "en",
+                        act_as: Optional[str] = None) -> AsyncIterator[str]:
+        raise NotImplementedError()
+
+    async def close(self):
+        if self._client is None:
+            return
+        result = self.close_client(self._client)
+        self._client = None
+        if inspect.isawaitable(result):
+            await result
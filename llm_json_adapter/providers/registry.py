@@ -0,0 +1,78 @@
+import importlib
+import logging
+import threading
+from importlib.metadata import EntryPoint, entry_points
+from typing import Dict, List, Optional, Type, Union
+
+from ..exceptions import UnknownProviderError
+from .provider import Provider
+
+ProviderReference = Union[str, EntryPoint, Type[Provider]]
+
+
+class ProviderRegistry(object):
+    entry_point_group = 'llm_json_adapter.providers'
+
+    _providers: Dict[str, ProviderReference] = {
+        'google': 'llm_json_adapter.providers.google:Provider',
+        'openai': 'llm_json_adapter.providers.openai:Provider',
+        'ollama': 'llm_json_adapter.providers.ollama:Provider',
+        'bedrock': 'llm_json_adapter.providers.bedrock:Provider',
+        'hedge': 'llm_json_adapter.providers.hedge:Provider',
+        'router': 'llm_json_adapter.providers.router:Provider',
+    }
+    _entry_points_loaded = False
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, name: str, provider: ProviderReference):
+        with cls._lock:
+            cls._providers[name.lower()] = provider
+
+    @classmethod
+    def unregister(cls, name: str):
+        with cls._lock:
+            cls._providers.pop(name.lower(), None)
+
+    @classmethod
+    def load_entry_points(cls):
+        with cls._lock:
+            if cls._entry_points_loaded:
+                return
+            cls._entry_points_loaded = True
+            for entry_point in entry_points(group=cls.entry_point_group):
+                cls._providers.setdefault(entry_point.name.lower(),
+                                          entry_point)
+
+    @classmethod
+    def get_names(cls) -> List[str]:
+        cls.load_entry_points()
+        return sorted(cls._providers.keys())
+
+    @classmethod
+    def get(cls, name: str) -> Type[Provider]:
+        key = name.lower()
+        if key not in cls._providers:
+            cls.load_entry_points()
+        reference = cls._providers.get(key)
+        if reference is None:
+            raise UnknownProviderError(f'Unknown provider: {name}')
+        if isinstance(reference, type):
+            return reference
+
+        if isinstance(reference, EntryPoint):
+            provider = reference.load()
+        else:
+            module_name, _, attribute = reference.partition(':')
+            provider = getattr(importlib.import_module(module_name), attribute
+                               or 'Provider')
+        with cls._lock:
+            cls._providers[key] = provider
+        return provider
+
+    @classmethod
+    def create(cls,
+               name: str,
+               logger: Optional[logging.Logger] = None,
+               attributes: Optional[Dict] = None) -> Provider:
+        return cls.get(name)(logger=logger, attributes=attributes)
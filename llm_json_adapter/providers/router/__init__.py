@@ -0,0 +1 @@
+from .provider import Provider
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+
+from ...exceptions import RateLimitError, RetryableError, TransportError
+from ...objects import Response
+from ...scheduling import CircuitBreaker
+from ...utilities import Instrumentation
+from ..provider import Provider as BaseProvider
+from ..registry import ProviderRegistry
+
+
+class Provider(BaseProvider):
+    _api_name = "Router"
+    _required_attributes = {
+        'providers': None,
+        'strategy': 'ordered',
+        'circuit_breaker': {},
+    }
+
+    def __init__(self,
+                 logger: Optional[logging.Logger] = None,
+                 attributes: Optional[Dict] = None):
+        super().__init__(logger=logger, attributes=attributes)
+        strategy = self.get_attribute('strategy', default_value='ordered')
+        if strategy not in ('ordered', 'weighted'):
+            raise ValueError(f"Strategy {strategy} not supported")
+        breaker_options = self.get_attribute('circuit_breaker',
+                                             default_value={})
+
+        self._backends: List[BaseProvider] = []
+        self._backend_names: List[str] = []
+        self._weights: List[float] = []
+        self._breakers: List[CircuitBreaker] = []
+        for config in self.get_attribute('providers', default_value=[]):
+            backend_attributes = dict(config.get('attributes', {}))
+            self._backends.append(
+                ProviderRegistry.create(config['provider'],
+                                        logger=logger,
+                                        attributes=backend_attributes))
+            self._backend_names.append(
+                config.get('name')
+                or f"{config['provider']}:{backend_attributes.get('model')}")
+            self._weights.append(float(config.get('weight', 1.0)))
+            self._breakers.append(CircuitBreaker(**breaker_options))
+        if len(self._backends) == 0:
+            raise ValueError("Attribute providers must not be empty")
+
+    def get_route(self) -> List[int]:
+        indexes = list(range(len(self._backends)))
+        if self.get_attribute('strategy',
+                              default_value='ordered') == 'ordered':
+            return indexes
+
+        route = []
+        weights = list(self._weights)
+        while indexes:
+            position = random.choices(range(len(indexes)), weights=weights)[0]
+            route.append(indexes.pop(position))
+            weights.pop(position)
+        return route
+
+    def get_health(self) -> Dict[str, Dict]:
+        return {
+            name: breaker.to_dict()
+            for name, breaker in zip(self._backend_names, self._breakers)
+        }
+
+    async def generate(self,
+                       prompt: str,
+                       function: Response,
+                       language: str = "en",
+                       act_as: Optional[str] = None) -> Optional[Dict]:
+        latest_error: Optional[RetryableError] = None
+        for index in self.get_route():
+            breaker = self._breakers[index]
+            if not breaker.allow_request():
+                continue
+            started_at = time.perf_counter()
+            try:
+                result = await self._backends[index].generate(
+                    prompt, function, language, act_as)
+            except asyncio.CancelledError:
+                breaker.record_cancelled()
+                raise
+            except (RateLimitError, TransportError) as e:
+                breaker.record_failure(time.perf_counter() - started_at)
+                self.debug_log("%s failed, failing over: %s",
+                               self._backend_names[index], e)
+                latest_error = e
+                continue
+            except RetryableError:
+                # The backend answered; only its output was unusable.
+                breaker.record_success(time.perf_counter() - started_at)
+                raise
+            except Exception:
+                breaker.record_cancelled()
+                raise
+            breaker.record_success(time.perf_counter() - started_at)
+            return result
+
+        if latest_error is not None:
+            raise latest_error
+        raise TransportError("No healthy providers available")
+
+    def set_instrumentation(self, instrumentation: Instrumentation):
+        super().set_instrumentation(instrumentation)
+        for backend in self._backends:
+            backend.set_instrumentation(instrumentation)
+
+    async def close(self):
+        for backend in self._backends:
+            await backend.close()
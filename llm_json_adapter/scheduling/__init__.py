@@ -0,0 +1,7 @@
+from .circuit_breaker import CircuitBreaker
+from .concurrency_controller import ConcurrencyController
+from .rate_limiter import RateLimiter
+from .request_packer import RequestPacker
+from .retry_policy import RetryPolicy
+from .single_flight import SingleFlight
+from .speculation_policy import SpeculationPolicy
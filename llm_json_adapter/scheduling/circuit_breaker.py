@@ -0,0 +1,96 @@
+import threading
+import time
+from typing import Dict, Optional
+
+from ..utilities import LatencyStats
+
+
+class CircuitBreaker(object):
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self,
+                 error_rate_threshold: float = 0.5,
+                 latency_threshold: Optional[float] = None,
+                 min_requests: int = 10,
+                 window: float = 60.0,
+                 max_samples: int = 1000,
+                 reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.error_rate_threshold = error_rate_threshold
+        self.latency_threshold = latency_threshold
+        self.min_requests = min_requests
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._stats = LatencyStats(window=max_samples)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def _refresh(self):
+        if (self._state == self.OPEN
+                and time.monotonic() - self._opened_at >= self.reset_timeout):
+            self._state = self.HALF_OPEN
+            self._probes = 0
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probes = 0
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            self._refresh()
+            if self._state == self.CLOSED:
+                return True
+            if (self._state == self.HALF_OPEN
+                    and self._probes < self.half_open_max_calls):
+                self._probes += 1
+                return True
+            return False
+
+    def record_cancelled(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def record_success(self, latency: float):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._stats.clear()
+            self._stats.record(latency)
+            if self.is_too_slow():
+                self._open()
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._stats.record(latency, succeeded=False)
+            if self._stats.count(self.window) < self.min_requests:
+                return
+            if self._stats.error_rate(
+                    self.window) >= self.error_rate_threshold:
+                self._open()
+
+    def is_too_slow(self) -> bool:
+        if self.latency_threshold is None:
+            return False
+        if self._stats.count(self.window) < self.min_requests:
+            return False
+        latency = self._stats.percentile(95, self.window)
+        return latency is not None and latency > self.latency_threshold
+
+    def to_dict(self) -> Dict:
+        return {"state": self.state, **self._stats.to_dict(self.window)}
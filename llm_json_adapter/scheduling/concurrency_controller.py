@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+
+class ConcurrencyController(object):
+    _controllers: Dict[str, "ConcurrencyController"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self,
+                 max_concurrency: int = 16,
+                 min_concurrency: int = 1,
+                 decrease_factor: float = 0.5,
+                 cooldown: float = 1.0):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._limit = float(max_concurrency)
+        self._in_flight = 0
+        self._decreased_at = 0.0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop,
+                                   asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls, key: str, max_concurrency: int) -> "ConcurrencyController":
+        with cls._registry_lock:
+            controller = cls._controllers.get(key)
+            if controller is None:
+                controller = cls(max_concurrency=max_concurrency)
+                cls._controllers[key] = controller
+            else:
+                # The latest configuration for a key wins.
+                controller.set_max_concurrency(max_concurrency)
+            return controller
+
+    def set_max_concurrency(self, max_concurrency: int):
+        with self._lock:
+            if self._limit >= self.max_concurrency:
+                self._limit = float(max_concurrency)
+            else:
+                self._limit = min(self._limit, float(max_concurrency))
+            self.max_concurrency = max_concurrency
+            self._wake_waiters()
+
+    @classmethod
+    def clear(cls):
+        with cls._registry_lock:
+            cls._controllers.clear()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._in_flight < int(self._limit):
+                    self._in_flight += 1
+                    return
+                future = loop.create_future()
+                self._waiters.append((loop, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self._lock:
+                    if (loop, future) in self._waiters:
+                        self._waiters.remove((loop, future))
+                    self._wake_waiters()
+                raise
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._wake_waiters()
+
+    def on_success(self):
+        with self._lock:
+            if self._limit < self.max_concurrency:
+                self._limit = min(float(self.max_concurrency),
+                                  self._limit + 1.0 / self._limit)
+                self._wake_waiters()
+
+    def on_throttle(self):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._decreased_at < self.cooldown:
+                return
+            self._decreased_at = now
+            self._limit = max(float(self.min_concurrency),
+                              self._limit * self.decrease_factor)
+
+    def _wake_waiters(self):
+        available = int(self._limit) - self._in_flight
+        while available > 0 and self._waiters:
+            loop, future = self._waiters.popleft()
+            loop.call_soon_threadsafe(self._resolve, future)
+            available -= 1
+
+    @staticmethod
+    def _resolve(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
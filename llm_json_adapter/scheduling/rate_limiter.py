@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class RateLimiter(object):
+    _limiters: Dict[str, "RateLimiter"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        self._requests_per_minute = requests_per_minute
+        self._tokens_per_minute = tokens_per_minute
+        self._request_allowance = requests_per_minute or 0.0
+        self._token_allowance = tokens_per_minute or 0.0
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get(cls,
+            key: str,
+            requests_per_minute: Optional[float] = None,
+            tokens_per_minute: Optional[float] = None) -> "RateLimiter":
+        with cls._registry_lock:
+            limiter = cls._limiters.get(key)
+            if limiter is None:
+                limiter = cls(requests_per_minute=requests_per_minute,
+                              tokens_per_minute=tokens_per_minute)
+                cls._limiters[key] = limiter
+            else:
+                # Limits passed later for a key replace the earlier ones;
+                # limits that are not passed are kept.
+                limiter.set_limits(requests_per_minute, tokens_per_minute)
+            return limiter
+
+    def set_limits(self, requests_per_minute: Optional[float],
+                   tokens_per_minute: Optional[float]):
+        with self._lock:
+            if requests_per_minute is None:
+                requests_per_minute = self._requests_per_minute
+            if tokens_per_minute is None:
+                tokens_per_minute = self._tokens_per_minute
+            self._refill(time.monotonic())
+            self._request_allowance = self._adjust_allowance(
+                self._request_allowance, self._requests_per_minute,
+                requests_per_minute)
+            self._token_allowance = self._adjust_allowance(
+                self._token_allowance, self._tokens_per_minute,
+                tokens_per_minute)
+            self._requests_per_minute = requests_per_minute
+            self._tokens_per_minute = tokens_per_minute
+
+    @staticmethod
+    def _adjust_allowance(allowance: float, limit: Optional[float],
+                          new_limit: Optional[float]) -> float:
+        if new_limit is None:
+            return 0.0
+        if limit is None:
+            return new_limit
+        return min(allowance, new_limit)
+
+    @classmethod
+    def clear(cls):
+        with cls._registry_lock:
+            cls._limiters.clear()
+
+    def _refill(self, now: float):
+        elapsed_minutes = (now - self._updated_at) / 60.0
+        self._updated_at = now
+        if self._requests_per_minute is not None:
+            self._request_allowance = min(
+                self._requests_per_minute, self._request_allowance +
+                elapsed_minutes * self._requests_per_minute)
+        if self._tokens_per_minute is not None:
+            self._token_allowance = min(
+                self._tokens_per_minute, self._token_allowance +
+                elapsed_minutes * self._tokens_per_minute)
+
+    def try_acquire(self, tokens: int = 0) -> Tuple[bool, float]:
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens_per_minute is not None:
+                tokens = min(tokens, self._tokens_per_minute)
+            wait = 0.0
+            if (self._requests_per_minute is not None
+                    and self._request_allowance < 1.0):
+                wait = max(wait, (1.0 - self._request_allowance) * 60.0 /
+                           self._requests_per_minute)
+            if (self._tokens_per_minute is not None
+                    and self._token_allowance < tokens):
+                wait = max(wait, (tokens - self._token_allowance) * 60.0 /
+                           self._tokens_per_minute)
+            if wait > 0.0:
+                return False, wait
+            if self._requests_per_minute is not None:
+                self._request_allowance -= 1.0
+            if self._tokens_per_minute is not None:
+                self._token_allowance -= tokens
+            return True, 0.0
+
+    async def acquire(self, tokens: int = 0):
+        while True:
+            acquired, wait = self.try_acquire(tokens)
+            if acquired:
+                return
+            await asyncio.sleep(wait)
@@ -0,0 +1,174 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..objects import Request, Response
+from ..utilities import JsonUtility, TokenEstimator
+
+PackItem = Tuple[int, Request]
+
+# Where the original schema sits inside the packed schema.
+_RESULT_POINTER = '#/properties/items/items/properties/result'
+# Keywords holding data rather than schemas.
+_LITERAL_KEYWORDS = frozenset(('const', 'enum', 'default', 'examples'))
+
+
+class RequestPacker(object):
+    """Groups compatible requests so that one call answers several of them.
+
+    Requests are compatible when they share the schema, language and
+    act_as. A pack is closed when it holds ``max_pack_size`` requests or
+    when one more request would push the estimated prompt above
+    ``max_prompt_tokens`` or the estimated answer above
+    ``max_output_tokens``.
+    """
+
+    _item_overhead_tokens = 8
+
+    def __init__(self,
+                 max_pack_size: int = 16,
+                 max_prompt_tokens: Optional[int] = None,
+                 max_output_tokens: Optional[int] = None,
+                 output_tokens_per_item: Optional[int] = None):
+        if max_pack_size < 1:
+            raise ValueError('max_pack_size must be greater than 0')
+        self.max_pack_size = max_pack_size
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_output_tokens = max_output_tokens
+        self.output_tokens_per_item = output_tokens_per_item
+        self._functions: Dict[Tuple[str, Optional[int]], Response] = {}
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        return TokenEstimator.estimate(text)
+
+    @staticmethod
+    def get_group_key(request: Request, language: str) -> Tuple:
+        return (request.function.get_fingerprint(), request.language
+                or language, request.act_as)
+
+    def estimate_output_tokens(self, function: Response) -> int:
+        if self.output_tokens_per_item is not None:
+            return self.output_tokens_per_item
+        return TokenEstimator.estimate_output(function.parameters)
+
+    def pack(self,
+             items: Iterable[PackItem],
+             language: str = 'en') -> List[List[PackItem]]:
+        groups: Dict[Tuple, List[PackItem]] = {}
+        for item in items:
+            groups.setdefault(self.get_group_key(item[1], language),
+                              []).append(item)
+
+        packs = []
+        for group in groups.values():
+            function = group[0][1].function
+            fixed_tokens = self.estimate_tokens(
+                JsonUtility.canonical_dumps(
+                    self.get_packed_function(function).parameters))
+            output_tokens = (self.estimate_output_tokens(function) +
+                             self._item_overhead_tokens)
+            pack: List[PackItem] = []
+            prompt_tokens = fixed_tokens
+            for item in group:
+                item_tokens = (self.estimate_tokens(item[1].prompt) +
+                               self._item_overhead_tokens)
+                if pack and (len(pack) >= self.max_pack_size or self._exceeds(
+                        self.max_prompt_tokens, prompt_tokens + item_tokens)
+                             or self._exceeds(self.max_output_tokens,
+                                              output_tokens *
+                                              (len(pack) + 1))):
+                    packs.append(pack)
+                    pack = []
+                    prompt_tokens = fixed_tokens
+                pack.append(item)
+                prompt_tokens += item_tokens
+            packs.append(pack)
+        return packs
+
+    @staticmethod
+    def _exceeds(limit: Optional[int], value: int) -> bool:
+        return limit is not None and value > limit
+
+    @classmethod
+    def rebase_refs(cls, schema: Any) -> Any:
+        """Points root-relative ``$ref``s at the nested original schema."""
+        if isinstance(schema, list):
+            return [cls.rebase_refs(item) for item in schema]
+        if not isinstance(schema, dict):
+            return schema
+        rebased = {
+            key: value if key in _LITERAL_KEYWORDS else cls.rebase_refs(value)
+            for key, value in schema.items()
+        }
+        reference = schema.get('$ref')
+        if isinstance(reference, str) and reference.startswith('#'):
+            rebased['$ref'] = _RESULT_POINTER + reference[1:]
+        return rebased
+
+    def get_packed_function(self,
+                            function: Response,
+                            size: Optional[int] = None) -> Response:
+        """Returns the schema answering several requests at once.
+
+        With ``size``, the ``items`` array is pinned to exactly that many
+        entries, so that output budgets sized from the schema cover the
+        whole pack.
+        """
+        key = (function.get_fingerprint(), size)
+        packed = self._functions.get(key)
+        if packed is None:
+            items = {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "index": {
+                            "type": "integer"
+                        },
+                        "result": self.rebase_refs(function.parameters),
+                    },
+                    "required": ["index", "result"],
+                },
+            }
+            if size is not None:
+                items["minItems"] = size
+                items["maxItems"] = size
+            packed = Response(
+                name=f'{function.name}_items',
+                description=(
+                    f'{function.description} One item for each request, '
+                    f'with "index" set to the number of the request.'),
+                parameters={
+                    "type": "object",
+                    "properties": {
+                        "items": items,
+                    },
+                    "required": ["items"],
+                })
+            self._functions[key] = packed
+        return packed
+
+    @staticmethod
+    def generate_prompt(pack: List[PackItem]) -> str:
+        sections = [
+            f'Answer each of the following {len(pack)} requests '
+            f'independently. Return one item per request in "items", with '
+            f'"index" set to the number of the request.'
+        ]
+        for number, (_, request) in enumerate(pack):
+            sections.append(f'### Request {number}\n{request.prompt}')
+        return '\n\n'.join(sections)
+
+    @staticmethod
+    def split_result(result: Dict, pack: List[PackItem]) -> Dict[int, Dict]:
+        items = result.get('items') if isinstance(result, dict) else None
+        if isinstance(result, list):
+            items = result
+        results: Dict[int, Dict] = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            number = item.get('index')
+            if (isinstance(number, int) and not isinstance(number, bool)
+                    and 0 <= number < len(pack) and number not in results):
+                results[number] = item.get('result')
+        return results
@@ -0,0 +1,36 @@
+import random
+from typing import Optional
+
+from ..exceptions import RateLimitError, TransportError
+
+
+class RetryPolicy(object):
+
+    def __init__(self,
+                 base_delay: float = 0.5,
+                 max_delay: float = 30.0,
+                 multiplier: float = 2.0,
+                 jitter: float = 1.0,
+                 invalid_json_delay: float = 0.0,
+                 respect_retry_after: bool = True):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.invalid_json_delay = invalid_json_delay
+        self.respect_retry_after = respect_retry_after
+
+    def get_backoff(self, attempt: int) -> float:
+        backoff = min(self.max_delay,
+                      self.base_delay * self.multiplier**max(attempt - 1, 0))
+        return random.uniform(backoff * (1.0 - self.jitter), backoff)
+
+    def get_delay(self, attempt: int, error: Exception) -> float:
+        if isinstance(error, RateLimitError):
+            retry_after: Optional[float] = error.retry_after
+            if self.respect_retry_after and retry_after is not None:
+                return min(max(retry_after, 0.0), self.max_delay)
+            return self.get_backoff(attempt)
+        if isinstance(error, TransportError):
+            return self.get_backoff(attempt)
+        return self.invalid_json_delay
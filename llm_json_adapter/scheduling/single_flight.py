@@ -0,0 +1,57 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Call(object):
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """Coalesces concurrent calls with the same key into one.
+
+    The first caller starts the call and later callers wait for its result
+    or exception. A cancelled waiter only cancels the call when no other
+    waiter is left. Calls are keyed per event loop because their tasks are
+    bound to it.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Tuple[int, Hashable], _Call] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def run(self, key: Hashable,
+                  function: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Returns the result and whether it was shared with a running call."""
+        key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            call = self._calls.get(key)
+            shared = call is not None
+            if call is None:
+                call = _Call(asyncio.ensure_future(function()))
+                self._calls[key] = call
+                call.task.add_done_callback(
+                    lambda _, key=key, call=call: self._forget(key, call))
+            call.waiters += 1
+
+        try:
+            return await asyncio.shield(call.task), shared
+        finally:
+            with self._lock:
+                call.waiters -= 1
+                abandoned = call.waiters == 0 and not call.task.done()
+            if abandoned:
+                call.task.cancel()
+
+    def _forget(self, key: Tuple[int, Hashable], call: _Call):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
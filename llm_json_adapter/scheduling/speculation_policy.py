@@ -0,0 +1,67 @@
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Hashable
+
+
+class SpeculationPolicy(object):
+    """Decides how many attempts to start at once for a schema.
+
+    Attempt outcomes are tracked per schema over the last ``window``
+    attempts. Once a schema has ``min_attempts`` observations and its
+    failure rate reaches ``failure_rate_threshold``, enough concurrent
+    samples are started to bring the chance that all of them fail below
+    ``target_failure_rate``, capped at ``max_samples``. Otherwise attempts
+    stay sequential. A threshold of 0 always starts ``max_samples``.
+    """
+
+    def __init__(self,
+                 max_samples: int = 3,
+                 failure_rate_threshold: float = 0.2,
+                 target_failure_rate: float = 0.05,
+                 min_attempts: int = 20,
+                 window: int = 100):
+        if max_samples < 1:
+            raise ValueError('max_samples must be greater than 0')
+        self.max_samples = max_samples
+        self.failure_rate_threshold = failure_rate_threshold
+        self.target_failure_rate = target_failure_rate
+        self.min_attempts = min_attempts
+        self.window = window
+        self._outcomes: Dict[Hashable, Deque[bool]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: Hashable, succeeded: bool):
+        with self._lock:
+            outcomes = self._outcomes.get(key)
+            if outcomes is None:
+                outcomes = deque(maxlen=self.window)
+                self._outcomes[key] = outcomes
+            outcomes.append(succeeded)
+
+    def get_failure_rate(self, key: Hashable) -> float:
+        with self._lock:
+            outcomes = self._outcomes.get(key)
+            if not outcomes:
+                return 0.0
+            return outcomes.count(False) / len(outcomes)
+
+    def get_sample_count(self, key: Hashable) -> int:
+        if self.failure_rate_threshold <= 0:
+            return self.max_samples
+        with self._lock:
+            outcomes = self._outcomes.get(key)
+            if outcomes is None or len(outcomes) < self.min_attempts:
+                return 1
+            failure_rate = outcomes.count(False) / len(outcomes)
+        if failure_rate < self.failure_rate_threshold:
+            return 1
+        if failure_rate >= 1.0:
+            return self.max_samples
+        samples = math.ceil(
+            math.log(self.target_failure_rate) / math.log(failure_rate))
+        return max(1, min(samples, self.max_samples))
+
+    def clear(self):
+        with self._lock:
+            self._outcomes.clear()
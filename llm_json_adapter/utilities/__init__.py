@@ -1 +1,11 @@
+from .event_loop_runner import EventLoopRunner
+from .incremental_json_parser import IncrementalJsonParser
+from .instrumentation import Instrumentation, OpenTelemetrySubscriber
+from .json_repair import JsonRepair
 from .json_utility import JsonUtility
+from .latency_stats import LatencyStats
+from .schema_partitioner import SchemaPartitioner
+from .schema_serializer import SchemaSerializer
+from .schema_validator import SchemaValidator
+from .thread_pool import ThreadPool
+from .token_estimator import TokenEstimator
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+from typing import Any, Coroutine, Optional
+
+
+class EventLoopRunner(object):
+    _shared: Optional["EventLoopRunner"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(
+                        target=loop.run_forever,
+                        name='llm_json_adapter_event_loop',
+                        daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    @classmethod
+    def get_shared(cls) -> "EventLoopRunner":
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @property
+    def is_running(self) -> bool:
+        return self._loop is not None
+
+    def run(self, coroutine: Coroutine) -> Any:
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            coroutine.close()
+            raise RuntimeError(
+                'Synchronous API cannot be called from its own event loop')
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    def close(self):
+        with self._lock:
+            loop = self._loop
+            thread = self._thread
+            self._loop = None
+            self._thread = None
+        if loop is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        loop.close()
@@ -0,0 +1,147 @@
+from typing import Any, List, Optional, Union
+
+from ..objects import StreamEvent
+from .json_utility import JsonUtility
+
+
+class _Frame(object):
+    __slots__ = ('kind', 'key', 'index', 'value_start', 'expecting_key')
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.key: Optional[str] = None
+        self.index = 0
+        self.value_start: Optional[int] = None
+        self.expecting_key = kind == 'object'
+
+    @property
+    def position(self) -> Union[str, int]:
+        return self.key if self.kind == 'object' else self.index
+
+
+class IncrementalJsonParser(object):
+
+    def __init__(self, fenced: bool = True):
+        self._fenced = fenced
+        self._buffer = ""
+        self._position = 0
+        self._started = not fenced
+        self._root_start: Optional[int] = None
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._key_start = 0
+        self.is_complete = False
+        self.result: Any = None
+
+    @property
+    def text(self) -> str:
+        return self._buffer
+
+    def feed(self, text: str) -> List[StreamEvent]:
+        events = []
+        if self.is_complete or not text:
+            return events
+        self._buffer += text
+        if not self._started and not self._find_block_start():
+            return events
+        self._scan(events)
+        return events
+
+    def _find_block_start(self) -> bool:
+        fence = self._buffer.find('```', self._position)
+        if fence < 0:
+            self._position = max(self._position, len(self._buffer) - 2)
+            return False
+        newline = self._buffer.find('\n', fence + 3)
+        if newline < 0:
+            self._position = fence
+            return False
+        self._position = newline + 1
+        self._started = True
+        return True
+
+    def _scan(self, events: List[StreamEvent]):
+        buffer = self._buffer
+        stack = self._stack
+        index = self._position
+        length = len(buffer)
+        while index < length:
+            char = buffer[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        stack[-1].key = JsonUtility.loads(
+                            buffer[self._key_start:index + 1])
+                index += 1
+                continue
+
+            if char in ' \t\r\n':
+                pass
+            elif not stack:
+                if char in '{[':
+                    self._root_start = index
+                    stack.append(_Frame('object' if char == '{' else 'array'))
+            else:
+                frame = stack[-1]
+                if char == '"':
+                    self._in_string = True
+                    self._string_is_key = frame.expecting_key
+                    if frame.expecting_key:
+                        self._key_start = index
+                    elif frame.value_start is None:
+                        frame.value_start = index
+                elif char in '{[':
+                    if frame.value_start is None:
+                        frame.value_start = index
+                    stack.append(_Frame('object' if char == '{' else 'array'))
+                elif char in '}]':
+                    self._complete_value(index, events)
+                    stack.pop()
+                    if not stack:
+                        self.result = JsonUtility.loads(
+                            buffer[self._root_start:index + 1])
+                        self.is_complete = True
+                        index += 1
+                        break
+                    self._complete_value(index + 1, events)
+                elif char == ',':
+                    self._complete_value(index, events)
+                    if frame.kind == 'array':
+                        frame.index += 1
+                    else:
+                        frame.expecting_key = True
+                elif char == ':':
+                    frame.expecting_key = False
+                elif frame.value_start is None:
+                    frame.value_start = index
+            index += 1
+        self._position = index
+
+    def _complete_value(self, end: int, events: List[StreamEvent]):
+        frame = self._stack[-1]
+        if frame.value_start is None:
+            return
+        start = frame.value_start
+        frame.value_start = None
+
+        depth = len(self._stack)
+        if depth == 1:
+            event_type = 'field' if frame.kind == 'object' else 'item'
+        elif depth == 2 and frame.kind == 'array':
+            event_type = 'item'
+        else:
+            return
+
+        events.append(
+            StreamEvent(
+                type=event_type,
+                path=[item.position for item in self._stack],
+                value=JsonUtility.loads(self._buffer[start:end]),
+            ))
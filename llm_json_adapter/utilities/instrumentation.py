@@ -0,0 +1,108 @@
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+Subscriber = Callable[[str, Dict[str, Any]], None]
+
+
+class Span(object):
+    __slots__ = ('_instrumentation', 'name', 'attributes', 'start_time',
+                 '_started_at')
+
+    def __init__(self, instrumentation: "Instrumentation", name: str,
+                 attributes: Dict[str, Any]):
+        self._instrumentation = instrumentation
+        self.name = name
+        self.attributes = attributes
+        self.start_time = 0.0
+        self._started_at = 0.0
+
+    @property
+    def is_recording(self) -> bool:
+        return True
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_time = time.time()
+        self._started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.attributes['start_time'] = self.start_time
+        self.attributes['duration'] = time.perf_counter() - self._started_at
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self._instrumentation.emit(self.name, **self.attributes)
+        return False
+
+
+class _NullSpan(object):
+    __slots__ = ()
+
+    @property
+    def is_recording(self) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Instrumentation(object):
+
+    def __init__(self, subscribers: Optional[List[Subscriber]] = None):
+        self._subscribers: List[Subscriber] = list(subscribers or [])
+
+    @property
+    def enabled(self) -> bool:
+        return len(self._subscribers) > 0
+
+    def subscribe(self, subscriber: Subscriber) -> Subscriber:
+        self._subscribers = self._subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers = [
+            item for item in self._subscribers if item is not subscriber
+        ]
+
+    def emit(self, name: str, **attributes: Any):
+        for subscriber in self._subscribers:
+            subscriber(name, attributes)
+
+    def span(self, name: str, **attributes: Any):
+        if not self._subscribers:
+            return _NULL_SPAN
+        return Span(self, name, attributes)
+
+
+class OpenTelemetrySubscriber(object):
+    _attribute_types = (str, bool, int, float)
+
+    def __init__(self, tracer: Any, prefix: str = 'llm_json_adapter.'):
+        self._tracer = tracer
+        self._prefix = prefix
+
+    def __call__(self, name: str, attributes: Dict[str, Any]):
+        start_time = attributes.get('start_time', time.time())
+        duration = attributes.get('duration', 0.0)
+        start_ns = int(start_time * 1e9)
+        span = self._tracer.start_span(
+            self._prefix + name,
+            start_time=start_ns,
+            attributes={
+                key: value
+                for key, value in attributes.items()
+                if key != 'start_time' and value is not None
+                and isinstance(value, self._attribute_types)
+            })
+        span.end(end_time=start_ns + int(duration * 1e9))
@@ -0,0 +1,389 @@
+import json
+import math
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..objects import Extraction
+from .json_utility import JsonUtility
+from .schema_validator import SchemaValidator
+
+_LITERALS = {
+    'true': 'true',
+    'false': 'false',
+    'null': 'null',
+    'True': 'true',
+    'False': 'false',
+    'None': 'null',
+}
+
+_CLOSERS = {'{': '}', '[': ']'}
+
+_MISSING = object()
+
+_NUMBERS = (int, float, Decimal)
+
+_DECODER = json.JSONDecoder()
+
+
+class JsonRepair(object):
+    max_balanced_attempts = 16
+    max_truncation_attempts = 8
+
+    @classmethod
+    def extract(cls,
+                text: Optional[str],
+                json_schema: Optional[Dict] = None,
+                object_only: bool = False) -> Optional[Extraction]:
+        extraction = cls.extract_value(text, object_only)
+        if extraction is None or json_schema is None:
+            return extraction
+        if SchemaValidator.is_valid(extraction.value, json_schema):
+            return extraction
+        coerced = cls.coerce(extraction.value, json_schema)
+        if SchemaValidator.is_valid(coerced, json_schema):
+            return Extraction(value=coerced, tier='coerced')
+        return extraction
+
+    @classmethod
+    def extract_value(cls,
+                      text: Optional[str],
+                      object_only: bool = False) -> Optional[Extraction]:
+        if not text:
+            return None
+
+        code_block = JsonUtility.extract_code_block(text)
+        if code_block is not None:
+            value = cls.loads(code_block)
+            if value is not None and (not object_only
+                                      or isinstance(value, dict)):
+                return Extraction(value=value, tier='fenced')
+            candidate = code_block
+        else:
+            candidate = cls.strip_open_fence(text)
+
+        value = cls.scan_balanced(candidate, object_only)
+        if value is not None:
+            return Extraction(value=value, tier='balanced')
+
+        value = cls.repair(candidate, object_only)
+        if value is not None:
+            return Extraction(value=value, tier='repaired')
+
+        return None
+
+    @staticmethod
+    def loads(text: str) -> Any:
+        try:
+            return JsonUtility.loads(text)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def strip_open_fence(text: str) -> str:
+        fence = text.find('```')
+        if fence < 0:
+            return text
+        newline = text.find('\n', fence + 3)
+        if newline < 0:
+            return text[fence + 3:]
+        return text[newline + 1:]
+
+    @classmethod
+    def scan_balanced(cls, text: str, object_only: bool = False) -> Any:
+        # With object_only, arrays such as ``Step [1]:`` before the object
+        # are skipped instead of returned.
+        start = cls.find_start(text, 0, object_only)
+        attempts = 0
+        while start >= 0 and attempts < cls.max_balanced_attempts:
+            try:
+                value, _ = _DECODER.raw_decode(text, start)
+                return value
+            except ValueError:
+                pass
+            attempts += 1
+            start = cls.find_start(text, start + 1, object_only)
+        return None
+
+    @staticmethod
+    def find_start(text: str, position: int, object_only: bool = False) -> int:
+        if object_only:
+            return text.find('{', position)
+        starts = [
+            index
+            for index in (text.find('{', position), text.find('[', position))
+            if index >= 0
+        ]
+        return min(starts) if starts else -1
+
+    @classmethod
+    def repair(cls, text: str, object_only: bool = False) -> Any:
+        start = cls.find_start(text, 0, object_only)
+        if start < 0:
+            return None
+
+        output: List[str] = []
+        stack: List[str] = []
+        commas: List[Tuple[int, Tuple[str, ...]]] = []
+        index = start
+        length = len(text)
+        while index < length:
+            char = text[index]
+            following = text[index + 1] if index + 1 < length else ''
+            if char in '"\'':
+                string, index = cls.read_string(text, index)
+                output.append(string)
+                continue
+            if char == '/' and following == '/':
+                newline = text.find('\n', index)
+                index = length if newline < 0 else newline
+                continue
+            if char == '/' and following == '*':
+                end = text.find('*/', index + 2)
+                index = length if end < 0 else end + 2
+                continue
+            if char in '{[':
+                stack.append(_CLOSERS[char])
+                output.append(char)
+            elif char in '}]':
+                if not stack:
+                    break
+                cls.strip_trailing(output)
+                output.append(stack.pop())
+                if not stack:
+                    break
+            elif char == ',':
+                commas.append((len(output), tuple(stack)))
+                output.append(char)
+            elif char.isdigit() or char == '-':
+                end = index + 1
+                while end < length and text[end] in '0123456789.eE+-':
+                    end += 1
+                output.append(text[index:end])
+                index = end
+                continue
+            elif char.isalpha() or char in '_$':
+                end = index
+                while end < length and (text[end].isalnum()
+                                        or text[end] in '_$'):
+                    end += 1
+                word = text[index:end]
+                # A word cut off by the end of the text is an incomplete
+                # literal such as ``tru``, so it is dropped.
+                if word in _LITERALS:
+                    output.append(_LITERALS[word])
+                elif end < length:
+                    output.append(json.dumps(word))
+                index = end
+                continue
+            else:
+                output.append(char)
+            index += 1
+
+        value = cls.loads(cls.close(output, stack))
+        if value is not None:
+            return value
+
+        for position, open_stack in reversed(
+                commas[-cls.max_truncation_attempts:]):
+            value = cls.loads(cls.close(output[:position], list(open_stack)))
+            if value is not None:
+                return value
+        return None
+
+    @staticmethod
+    def read_string(text: str, start: int) -> Tuple[str, int]:
+        quote = text[start]
+        characters = []
+        index = start + 1
+        length = len(text)
+        while index < length:
+            char = text[index]
+            if char == '\\' and index + 1 < length:
+                escaped = text[index + 1]
+                if escaped == "'":
+                    characters.append("'")
+                else:
+                    characters.append(char + escaped)
+                index += 2
+                continue
+            if char == quote:
+                index += 1
+                break
+            if char == '"':
+                characters.append('\\"')
+            elif char == '\n':
+                characters.append('\\n')
+            elif char == '\t':
+                characters.append('\\t')
+            else:
+                characters.append(char)
+            index += 1
+        return '"' + ''.join(characters) + '"', index
+
+    @staticmethod
+    def strip_trailing(output: List[str]):
+        while output and (output[-1].isspace() or output[-1] in (',', ':')):
+            output.pop()
+
+    @classmethod
+    def close(cls, output: List[str], stack: List[str]) -> str:
+        output = list(output)
+        cls.strip_trailing(output)
+        return ''.join(output) + ''.join(reversed(stack))
+
+    @classmethod
+    def coerce(cls,
+               value: Any,
+               json_schema: Any,
+               root_schema: Optional[Dict] = None) -> Any:
+        if not isinstance(json_schema, dict):
+            return value
+        if root_schema is None:
+            root_schema = json_schema
+        json_schema = cls.resolve_reference(json_schema, root_schema)
+
+        if 'enum' in json_schema and isinstance(value, str):
+            for option in json_schema['enum']:
+                if isinstance(option, str) and option.lower() == value.lower():
+                    return option
+
+        types = json_schema.get('type')
+        if types is None:
+            if 'properties' in json_schema:
+                types = 'object'
+            elif 'items' in json_schema:
+                types = 'array'
+            else:
+                return value
+        if isinstance(types, str):
+            types = [types]
+
+        for schema_type in types:
+            if cls.matches_type(value, schema_type):
+                return cls.coerce_children(value, schema_type, json_schema,
+                                           root_schema)
+        for schema_type in types:
+            coerced = cls.coerce_type(value, schema_type)
+            if coerced is not _MISSING:
+                return cls.coerce_children(coerced, schema_type, json_schema,
+                                           root_schema)
+        return value
+
+    @staticmethod
+    def resolve_reference(json_schema: Dict, root_schema: Dict) -> Dict:
+        reference = json_schema.get('$ref')
+        if not isinstance(reference, str) or not reference.startswith('#/'):
+            return json_schema
+        resolved: Any = root_schema
+        for part in reference[2:].split('/'):
+            if not isinstance(resolved, dict) or part not in resolved:
+                return json_schema
+            resolved = resolved[part]
+        return resolved if isinstance(resolved, dict) else json_schema
+
+    @staticmethod
+    def matches_type(value: Any, schema_type: str) -> bool:
+        if schema_type == 'object':
+            return isinstance(value, dict)
+        if schema_type == 'array':
+            return isinstance(value, list)
+        if schema_type == 'string':
+            return isinstance(value, str)
+        if schema_type == 'boolean':
+            return isinstance(value, bool)
+        if schema_type == 'integer':
+            return isinstance(value, int) and not isinstance(value, bool)
+        if schema_type == 'number':
+            return isinstance(value,
+                              (int, float)) and not isinstance(value, bool)
+        if schema_type == 'null':
+            return value is None
+        return False
+
+    @classmethod
+    def coerce_type(cls, value: Any, schema_type: str) -> Any:
+        if schema_type == 'string':
+            if isinstance(value, bool):
+                return 'true' if value else 'false'
+            if isinstance(value, (int, float)):
+                return str(value)
+            return _MISSING
+        if schema_type in ('integer', 'number'):
+            if isinstance(value, str):
+                value = cls.parse_number(value)
+            if isinstance(value, bool) or not isinstance(value, _NUMBERS):
+                return _MISSING
+            if isinstance(value, int):
+                return value
+            if not math.isfinite(value):
+                return _MISSING
+            if value % 1:
+                return _MISSING if schema_type == 'integer' else float(value)
+            return int(value)
+        if schema_type == 'boolean':
+            if isinstance(value, str):
+                lowered = value.strip().lower()
+                if lowered in ('true', 'yes', '1'):
+                    return True
+                if lowered in ('false', 'no', '0'):
+                    return False
+            if isinstance(value, int) and value in (0, 1):
+                return bool(value)
+            return _MISSING
+        if schema_type == 'null':
+            if isinstance(value, str) and value.strip().lower() in ('', 'null',
+                                                                    'none'):
+                return None
+            return _MISSING
+        if schema_type == 'array':
+            if isinstance(value, str):
+                parsed = cls.loads(value)
+                if isinstance(parsed, list):
+                    return parsed
+            return _MISSING if value is None else [value]
+        if schema_type == 'object':
+            if isinstance(value, str):
+                parsed = cls.loads(value)
+                if isinstance(parsed, dict):
+                    return parsed
+            return _MISSING
+        return _MISSING
+
+    @staticmethod
+    def parse_number(text: str) -> Any:
+        # A comma is a thousands separator in some locales and a decimal
+        # separator in others, so such strings are left for a retry.
+        # Integers are parsed exactly rather than through float.
+        text = text.strip()
+        if ',' in text:
+            return _MISSING
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            return Decimal(text)
+        except InvalidOperation:
+            return _MISSING
+
+    @classmethod
+    def coerce_children(cls, value: Any, schema_type: str, json_schema: Dict,
+                        root_schema: Dict) -> Any:
+        if schema_type == 'object' and isinstance(value, dict):
+            properties = json_schema.get('properties', {})
+            additional = json_schema.get('additionalProperties')
+            result = {}
+            for key, item in value.items():
+                if key in properties:
+                    result[key] = cls.coerce(item, properties[key],
+                                             root_schema)
+                elif isinstance(additional, dict):
+                    result[key] = cls.coerce(item, additional, root_schema)
+                else:
+                    result[key] = item
+            return result
+        if schema_type == 'array' and isinstance(value, list):
+            items = json_schema.get('items')
+            if isinstance(items, dict):
+                return [cls.coerce(item, items, root_schema) for item in value]
+        return value
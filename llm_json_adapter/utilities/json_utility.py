@@ -1,15 +1,85 @@
+import hashlib
 import json
-import re
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple, Type, Union
+
+
+def _load_backends(
+) -> Dict[str, Tuple[Callable, Tuple[Type[Exception], ...]]]:
+    backends = {'json': (json.loads, (ValueError, ))}
+    try:
+        import orjson
+        backends['orjson'] = (orjson.loads, (orjson.JSONDecodeError, ))
+    except ImportError:
+        pass
+    try:
+        import msgspec
+        backends['msgspec'] = (msgspec.json.decode, (msgspec.DecodeError, ))
+    except ImportError:
+        pass
+    return backends
+
+
+_BACKENDS = _load_backends()
+_DEFAULT_BACKEND = next(name for name in ('orjson', 'msgspec', 'json')
+                        if name in _BACKENDS)
 
 
 class JsonUtility(object):
+    _backends = _BACKENDS
+    backend = _DEFAULT_BACKEND
+    _loads, _decode_errors = _BACKENDS[_DEFAULT_BACKEND]
+
+    @classmethod
+    def set_backend(cls, name: str):
+        if name not in cls._backends:
+            raise ValueError(f'JSON backend {name} is not available')
+        cls.backend = name
+        cls._loads, cls._decode_errors = cls._backends[name]
+
+    @classmethod
+    def get_available_backends(cls) -> Tuple[str, ...]:
+        return tuple(cls._backends.keys())
+
+    @classmethod
+    def loads(cls, data: Union[str, bytes]) -> Any:
+        try:
+            return cls._loads(data)
+        except cls._decode_errors:
+            if cls._loads is json.loads:
+                raise
+        # Fall back to the standard library for inputs the fast decoders
+        # reject (NaN, big integers, ...) and for its error messages.
+        return json.loads(data)
+
+    @classmethod
+    def extract_code_block(cls, text: str) -> Optional[str]:
+        start = text.find('```')
+        if start < 0:
+            return None
+        newline = text.find('\n', start + 3)
+        if newline < 0:
+            return None
+        end = text.find('```', newline + 1)
+        if end < 0:
+            return None
+        return text[newline + 1:end]
 
     @classmethod
     def extract_json_block(cls, text: str) -> Optional[Dict]:
-        pattern = r'```(.*?)\n(.*?)```'
-        code_blocks = re.findall(pattern, text, re.DOTALL)
-        if len(code_blocks) == 0:
+        json_data = cls.extract_code_block(text)
+        if json_data is None:
             return None
-        json_data = code_blocks[0][1]
-        return json.loads(json_data)
+        return cls.loads(json_data)
+
+    @classmethod
+    def canonical_dumps(cls, data: Any) -> str:
+        return json.dumps(data,
+                          sort_keys=True,
+                          separators=(',', ':'),
+                          ensure_ascii=False,
+                          default=str)
+
+    @classmethod
+    def stable_hash(cls, data: Any) -> str:
+        return hashlib.sha256(
+            cls.canonical_dumps(data).encode('utf-8')).hexdigest()
@@ -0,0 +1,64 @@
+import math
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+class LatencyStats(object):
+
+    def __init__(self, window: int = 100):
+        self._samples: Deque[Tuple[float, float, bool]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, succeeded: bool = True):
+        with self._lock:
+            self._samples.append((time.monotonic(), latency, succeeded))
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def get_latencies(self, max_age: Optional[float] = None) -> list:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                latency for recorded_at, latency, succeeded in self._samples
+                if succeeded and (max_age is None or now -
+                                  recorded_at <= max_age)
+            ]
+
+    def percentile(self,
+                   percentile: float,
+                   max_age: Optional[float] = None) -> Optional[float]:
+        latencies = sorted(self.get_latencies(max_age))
+        if not latencies:
+            return None
+        index = max(0, math.ceil(percentile / 100.0 * len(latencies)) - 1)
+        return latencies[index]
+
+    def count(self, max_age: Optional[float] = None) -> int:
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for recorded_at, _, _ in self._samples
+                       if max_age is None or now - recorded_at <= max_age)
+
+    def error_rate(self, max_age: Optional[float] = None) -> float:
+        now = time.monotonic()
+        with self._lock:
+            samples = [
+                succeeded for recorded_at, _, succeeded in self._samples
+                if max_age is None or now - recorded_at <= max_age
+            ]
+        if not samples:
+            return 0.0
+        return samples.count(False) / len(samples)
+
+    def to_dict(self, max_age: Optional[float] = None) -> Dict:
+        return {
+            "count": self.count(max_age),
+            "error_rate": self.error_rate(max_age),
+            "p50": self.percentile(50, max_age),
+            "p95": self.percentile(95, max_age),
+            "p99": self.percentile(99, max_age),
+        }
@@ -0,0 +1,103 @@
+from typing import Dict, List
+
+from ..objects import Response
+from .token_estimator import TokenEstimator
+
+# Top-level keywords that only describe single properties. Any other
+# keyword (allOf, dependentRequired, minProperties, ...) may relate
+# properties to each other, so such schemas are not split.
+_PARTITIONABLE_KEYWORDS = frozenset(
+    ('type', 'properties', 'required', 'additionalProperties', '$defs',
+     'definitions', 'title', 'description', 'default', 'examples', '$schema',
+     '$id', '$comment'))
+_SHARED_KEYWORDS = ('type', 'additionalProperties', '$defs', 'definitions',
+                    '$schema')
+
+
+class SchemaPartitioner(object):
+    """Splits the top-level properties of a schema into sized groups.
+
+    Properties are placed largest first into the first group that still
+    has room for them, where a group holds ``max_part_tokens`` of estimated
+    output (or the largest property, if that is bigger). If more than
+    ``max_parts`` groups are needed, properties are spread over
+    ``max_parts`` groups by load instead. Small schemas stay in one piece.
+    """
+
+    @staticmethod
+    def is_partitionable(json_schema: Dict) -> bool:
+        return (isinstance(json_schema, dict)
+                and json_schema.get('type', 'object') == 'object'
+                and isinstance(json_schema.get('properties'), dict)
+                and len(json_schema['properties']) > 1
+                and set(json_schema) <= _PARTITIONABLE_KEYWORDS)
+
+    @classmethod
+    def partition(cls,
+                  function: Response,
+                  max_part_tokens: int = 512,
+                  max_parts: int = 8) -> List[Response]:
+        json_schema = function.parameters
+        if max_parts < 2 or not cls.is_partitionable(json_schema):
+            return [function]
+
+        properties = json_schema['properties']
+        sizes = {
+            name:
+            TokenEstimator.estimate(name) + 2 +
+            TokenEstimator.estimate_output(schema)
+            for name, schema in properties.items()
+        }
+        names = sorted(properties, key=lambda name: -sizes[name])
+        capacity = max(max_part_tokens, sizes[names[0]])
+        groups: List[List[str]] = []
+        totals: List[int] = []
+        for name in names:
+            for index, total in enumerate(totals):
+                if total + sizes[name] <= capacity:
+                    groups[index].append(name)
+                    totals[index] += sizes[name]
+                    break
+            else:
+                groups.append([name])
+                totals.append(sizes[name])
+
+        if len(groups) > max_parts:
+            groups = [[] for _ in range(max_parts)]
+            totals = [0] * max_parts
+            for name in names:
+                index = totals.index(min(totals))
+                groups[index].append(name)
+                totals[index] += sizes[name]
+        if len(groups) < 2:
+            return [function]
+
+        order = list(properties)
+        required = json_schema.get('required', [])
+        parts = []
+        for number, group in enumerate(groups):
+            group.sort(key=order.index)
+            parameters = {
+                key: json_schema[key]
+                for key in _SHARED_KEYWORDS if key in json_schema
+            }
+            parameters['type'] = 'object'
+            parameters['properties'] = {
+                name: properties[name]
+                for name in group
+            }
+            group_required = [name for name in required if name in group]
+            if group_required:
+                parameters['required'] = group_required
+            parts.append(
+                Response(name=f'{function.name}_part{number + 1}',
+                         description=function.description,
+                         parameters=parameters))
+        return parts
+
+    @staticmethod
+    def merge(results: List[Dict]) -> Dict:
+        merged: Dict = {}
+        for result in results:
+            merged.update(result)
+        return merged
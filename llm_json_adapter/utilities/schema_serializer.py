@@ -0,0 +1,115 @@
+import json
+from typing import Any, Callable, Dict, Iterator, Set, Tuple
+
+_IGNORED_KEYWORDS = ('$schema', '$id', '$comment', 'examples')
+_SCHEMA_MAP_KEYWORDS = ('properties', 'patternProperties', '$defs',
+                        'definitions', 'dependentSchemas')
+_SCHEMA_LIST_KEYWORDS = ('allOf', 'anyOf', 'oneOf', 'prefixItems')
+_SCHEMA_KEYWORDS = ('items', 'additionalProperties', 'additionalItems', 'not',
+                    'if', 'then', 'else', 'contains', 'propertyNames',
+                    'unevaluatedItems', 'unevaluatedProperties')
+
+
+class SchemaSerializer(object):
+
+    @classmethod
+    def dumps(cls, json_schema: Dict, compact: bool = False) -> str:
+        if not compact:
+            return json.dumps(json_schema)
+        return json.dumps(cls.strip_keywords(json_schema),
+                          separators=(',', ':'),
+                          ensure_ascii=False)
+
+    @classmethod
+    def strip_keywords(cls,
+                       json_schema: Any,
+                       ignored: Tuple[str, ...] = _IGNORED_KEYWORDS) -> Any:
+        if not isinstance(json_schema, dict):
+            return json_schema
+        result = {}
+        for key, value in json_schema.items():
+            if key in ignored:
+                continue
+            if key in _SCHEMA_MAP_KEYWORDS and isinstance(value, dict):
+                value = {
+                    name: cls.strip_keywords(schema, ignored)
+                    for name, schema in value.items()
+                }
+            elif key in _SCHEMA_LIST_KEYWORDS and isinstance(value, list):
+                value = [
+                    cls.strip_keywords(schema, ignored) for schema in value
+                ]
+            elif key in _SCHEMA_KEYWORDS:
+                if isinstance(value, list):
+                    value = [
+                        cls.strip_keywords(schema, ignored) for schema in value
+                    ]
+                else:
+                    value = cls.strip_keywords(value, ignored)
+            result[key] = value
+        return result
+
+    @classmethod
+    def iter_schemas(cls, json_schema: Any) -> Iterator[Dict]:
+        if not isinstance(json_schema, dict):
+            return
+        yield json_schema
+        for key, value in json_schema.items():
+            if key in _SCHEMA_MAP_KEYWORDS and isinstance(value, dict):
+                for schema in value.values():
+                    yield from cls.iter_schemas(schema)
+            elif key in _SCHEMA_LIST_KEYWORDS and isinstance(value, list):
+                for schema in value:
+                    yield from cls.iter_schemas(schema)
+            elif key in _SCHEMA_KEYWORDS:
+                for schema in (value if isinstance(value, list) else [value]):
+                    yield from cls.iter_schemas(schema)
+
+    @classmethod
+    def get_keywords(cls, json_schema: Any) -> Set[str]:
+        keywords = set()
+        for schema in cls.iter_schemas(json_schema):
+            keywords.update(schema.keys())
+        return keywords
+
+    @classmethod
+    def map_schemas(cls, json_schema: Any, function: Callable[[Dict],
+                                                              Dict]) -> Any:
+        if not isinstance(json_schema, dict):
+            return json_schema
+        result = {}
+        for key, value in json_schema.items():
+            if key in _SCHEMA_MAP_KEYWORDS and isinstance(value, dict):
+                value = {
+                    name: cls.map_schemas(schema, function)
+                    for name, schema in value.items()
+                }
+            elif key in _SCHEMA_LIST_KEYWORDS and isinstance(value, list):
+                value = [cls.map_schemas(schema, function) for schema in value]
+            elif key in _SCHEMA_KEYWORDS:
+                if isinstance(value, list):
+                    value = [
+                        cls.map_schemas(schema, function) for schema in value
+                    ]
+                else:
+                    value = cls.map_schemas(value, function)
+            result[key] = value
+        return function(result)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        return (len(text) + 3) // 4
+
+    @classmethod
+    def get_savings(cls, json_schema: Dict) -> Dict[str, int]:
+        default = cls.dumps(json_schema)
+        compact = cls.dumps(json_schema, compact=True)
+        default_tokens = cls.estimate_tokens(default)
+        compact_tokens = cls.estimate_tokens(compact)
+        return {
+            "default_characters": len(default),
+            "compact_characters": len(compact),
+            "default_tokens": default_tokens,
+            "compact_tokens": compact_tokens,
+            "saved_tokens": default_tokens - compact_tokens,
+        }
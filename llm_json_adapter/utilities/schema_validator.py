@@ -0,0 +1,104 @@
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from .json_utility import JsonUtility
+
+if TYPE_CHECKING:
+    from jsonschema.protocols import Validator
+
+
+class SchemaValidator(object):
+    max_size = 128
+
+    _meta_schema_path = Path(
+        __file__).parent.parent / 'schemas' / '2020-12.schema.json'
+    _meta_validator: Optional["Validator"] = None
+    _validators: "OrderedDict[str, Optional[Validator]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_meta_validator(cls) -> "Validator":
+        if cls._meta_validator is None:
+            from jsonschema.validators import validator_for
+            meta_schema = json.loads(cls._meta_schema_path.read_text())
+            validator_class = validator_for(meta_schema)
+            cls._meta_validator = validator_class(meta_schema)
+        return cls._meta_validator
+
+    @classmethod
+    def get_validator(cls, json_schema: Dict) -> Optional["Validator"]:
+        key = JsonUtility.stable_hash(json_schema)
+        with cls._lock:
+            if key in cls._validators:
+                cls._validators.move_to_end(key)
+                return cls._validators[key]
+
+        validator = None
+        if cls.get_meta_validator().is_valid(json_schema):
+            from jsonschema.validators import (Draft202012Validator,
+                                               validator_for)
+            validator_class = validator_for(json_schema,
+                                            default=Draft202012Validator)
+            validator = validator_class(json_schema)
+
+        with cls._lock:
+            cls._validators[key] = validator
+            cls._validators.move_to_end(key)
+            while len(cls._validators) > cls.max_size:
+                cls._validators.popitem(last=False)
+
+        return validator
+
+    @classmethod
+    def is_valid_schema(cls, json_schema: Dict) -> bool:
+        return cls.get_validator(json_schema) is not None
+
+    @classmethod
+    def is_valid(cls, instance: Any, json_schema: Dict) -> bool:
+        validator = cls.get_validator(json_schema)
+        if validator is None:
+            return False
+        return validator.is_valid(instance)
+
+    @classmethod
+    def get_error_message(cls, instance: Any,
+                          json_schema: Dict) -> Optional[str]:
+        validator = cls.get_validator(json_schema)
+        if validator is None:
+            return 'Invalid JSON schema'
+        for error in validator.iter_errors(instance):
+            return error.message
+        return None
+
+    @classmethod
+    def get_partial_error_message(cls, value: Any, path: List[Union[str, int]],
+                                  json_schema: Dict) -> Optional[str]:
+        validator = cls.get_validator(json_schema)
+        if validator is None:
+            return 'Invalid JSON schema'
+        instance = value
+        normalized_path = []
+        for position in reversed(path):
+            if isinstance(position, int):
+                instance = [instance]
+                normalized_path.insert(0, 0)
+            else:
+                instance = {position: instance}
+                normalized_path.insert(0, position)
+        for error in validator.iter_errors(instance):
+            error_path = list(error.absolute_path)
+            if error_path[:len(normalized_path)] == normalized_path:
+                return error.message
+        return None
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._validators.clear()
+
+    @classmethod
+    def size(cls) -> int:
+        return len(cls._validators)
@@ -0,0 +1,47 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class ThreadPool(object):
+    max_workers = 32
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=cls.max_workers,
+                        thread_name_prefix='llm_json_adapter')
+        return cls._executor
+
+    @classmethod
+    def configure(cls, max_workers: int):
+        if max_workers < 1:
+            raise ValueError('max_workers must be greater than 0')
+        with cls._lock:
+            executor = cls._executor
+            cls.max_workers = max_workers
+            cls._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    @classmethod
+    def shutdown(cls, wait: bool = True):
+        with cls._lock:
+            executor = cls._executor
+            cls._executor = None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    @classmethod
+    async def run(cls, function: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            cls.get_executor(), functools.partial(function, *args, **kwargs))
@@ -0,0 +1,81 @@
+from typing import Any, Dict
+
+from .json_utility import JsonUtility
+
+
+class TokenEstimator(object):
+    """Rough, tokenizer-free token counts for budgeting.
+
+    ``estimate_output`` walks a JSON schema and sums what a typical answer
+    costs: keys and punctuation, ``default_string_tokens`` per string
+    without ``maxLength`` and ``default_array_items`` items per array
+    without ``maxItems``.
+    """
+
+    chars_per_token = 4
+    default_string_tokens = 12
+    default_array_items = 10
+    max_depth = 16
+
+    @classmethod
+    def estimate(cls, text: str) -> int:
+        return len(text) // cls.chars_per_token + 1
+
+    @classmethod
+    def estimate_schema(cls, schema: Dict) -> int:
+        return cls.estimate(JsonUtility.canonical_dumps(schema))
+
+    @classmethod
+    def estimate_output(cls, schema: Any, depth: int = 0) -> int:
+        if not isinstance(schema, dict) or depth > cls.max_depth:
+            return cls.default_string_tokens
+
+        if 'const' in schema:
+            return cls.estimate(JsonUtility.canonical_dumps(schema['const']))
+        if isinstance(schema.get('enum'), list) and schema['enum']:
+            return max(
+                cls.estimate(JsonUtility.canonical_dumps(value))
+                for value in schema['enum'])
+        for keyword in ('anyOf', 'oneOf'):
+            if isinstance(schema.get(keyword), list) and schema[keyword]:
+                return max(
+                    cls.estimate_output(option, depth + 1)
+                    for option in schema[keyword])
+        if isinstance(schema.get('allOf'), list) and schema['allOf']:
+            return sum(
+                cls.estimate_output(option, depth + 1)
+                for option in schema['allOf'])
+
+        schema_type = schema.get('type')
+        if isinstance(schema_type, list):
+            schema_type = next(
+                (item for item in schema_type if item != 'null'), 'null')
+        if schema_type is None:
+            if 'properties' in schema:
+                schema_type = 'object'
+            elif 'items' in schema:
+                schema_type = 'array'
+
+        if schema_type == 'object':
+            properties = schema.get('properties')
+            if not isinstance(properties, dict) or not properties:
+                return cls.default_string_tokens
+            return 2 + sum(
+                cls.estimate(key) + 2 + cls.estimate_output(value, depth + 1)
+                for key, value in properties.items())
+        if schema_type == 'array':
+            count = schema.get('maxItems')
+            if not isinstance(count, int):
+                count = max(schema.get('minItems', 0), cls.default_array_items)
+            return 2 + count * (
+                cls.estimate_output(schema.get('items'), depth + 1) + 1)
+        if schema_type == 'string':
+            max_length = schema.get('maxLength')
+            if isinstance(max_length, int):
+                return max_length // cls.chars_per_token + 2
+            return cls.default_string_tokens
+        if schema_type in ('integer', 'number'):
+            return 4
+        if schema_type in ('boolean', 'null'):
+            return 2
+        return cls.default_string_tokens
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from llm_json_adapter import LLMJsonAdapter
+from llm_json_adapter.objects import Response
+from llm_json_adapter.providers import Provider
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {
+            "type": "string",
+        },
+    },
+    "required": ["title"],
+}
+
+FUNCTION = Response(name="test", description="test", parameters=SCHEMA)
+
+
+class StaticProvider(Provider):
+
+    def __init__(self,
+                 results: Optional[List] = None,
+                 delay: float = 0.0,
+                 attributes: Optional[Dict] = None,
+                 logger=None):
+        super().__init__(logger=logger, attributes=attributes or {})
+        self.results = list(results or [])
+        self.delay = delay
+        self.call_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompts = []
+
+    async def generate(self,
+                       prompt: str,
+                       function: Response,
+                       language: str = "en",
+                       act_as: Optional[str] = None) -> Optional[Dict]:
+        self.call_count += 1
+        self.prompts.append(prompt)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay > 0:
+                await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if len(self.results) == 0:
+            return {"title": prompt}
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def create_adapter(provider: Provider, **kwargs) -> LLMJsonAdapter:
+    adapter = LLMJsonAdapter(provider_name="openai",
+                             attributes={
+                                 "api_key": "xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx",
+                             },
+                             **kwargs)
+    adapter._provider = provider
+    return adapter
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+from llm_json_adapter import Request
+from llm_json_adapter.exceptions import (ExceededMaxRetryCountError,
+                                         RetryableError)
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+
+def test_generate_many_keeps_input_order():
+    provider = StaticProvider(delay=0.05)
+    adapter = create_adapter(provider)
+    requests = [
+        Request(prompt=str(index), function=FUNCTION) for index in range(10)
+    ]
+
+    started_at = time.perf_counter()
+    results = adapter.generate_many(requests, concurrency=10)
+    elapsed = time.perf_counter() - started_at
+
+    assert [result.result["title"]
+            for result in results] == [str(index) for index in range(10)]
+    assert elapsed < 0.3
+
+
+def test_generate_many_limits_concurrency():
+    provider = StaticProvider(delay=0.01)
+    adapter = create_adapter(provider)
+    adapter.generate_many(
+        [Request(prompt=str(index), function=FUNCTION) for index in range(12)],
+        concurrency=3)
+    assert provider.max_in_flight == 3
+
+
+def test_failed_item_does_not_abort_batch():
+    provider = StaticProvider([
+        {
+            "title": "first"
+        },
+        RetryableError("broken"),
+        RetryableError("broken"),
+        ValueError("fatal"),
+    ])
+    adapter = create_adapter(provider, max_retry_count=2)
+    results = adapter.generate_many([
+        {
+            "prompt": "a",
+            "function": FUNCTION
+        },
+        {
+            "prompt": "b",
+            "function": FUNCTION
+        },
+        {
+            "prompt": "c",
+            "function": FUNCTION
+        },
+        {
+            "prompt": "d",
+            "function": FUNCTION
+        },
+    ],
+                                    concurrency=1)
+
+    assert results[0].result == {"title": "first"}
+    assert isinstance(results[1].error, ExceededMaxRetryCountError)
+    assert isinstance(results[2].error, ValueError)
+    assert results[3].succeeded
+
+
+def test_malformed_request_does_not_abort_batch():
+    adapter = create_adapter(StaticProvider())
+    malformed = {"prompt": 1234, "function": FUNCTION}
+    results = adapter.generate_many([
+        {
+            "prompt": "a",
+            "function": FUNCTION
+        },
+        malformed,
+        {
+            "prompt": "c",
+            "function": FUNCTION
+        },
+    ])
+
+    assert [result.succeeded for result in results] == [True, False, True]
+    assert isinstance(results[1].error, ValueError)
+    assert results[1].request == malformed
+
+
+def test_generate_many_as_completed():
+    adapter = create_adapter(StaticProvider())
+
+    async def collect():
+        return [
+            result.index
+            async for result in adapter.generate_many_as_completed(
+                (Request(prompt=str(index), function=FUNCTION)
+                 for index in range(5)),
+                concurrency=2)
+        ]
+
+    assert sorted(asyncio.run(collect())) == [0, 1, 2, 3, 4]
@@ -0,0 +1,32 @@
+import pytest
+
+from benchmarks.bench_providers import BACKENDS, run
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_against_local_stand_ins(backend):
+    result = run(backend,
+                 "generate_async",
+                 requests=8,
+                 concurrency=4,
+                 latency=0.0,
+                 malformed_rate=0.5,
+                 max_retry_count=10,
+                 retry_delay=0.0)
+
+    assert result.errors == 0
+    assert result.calls > result.requests
+    assert len(result.latencies) == 8
+
+
+def test_failures_are_reported_as_errors():
+    result = run("bedrock",
+                 "generate_many",
+                 requests=4,
+                 latency=0.0,
+                 failure_rate=1.0,
+                 max_retry_count=2,
+                 retry_delay=0.0)
+
+    assert result.errors == 4
+    assert result.retry_amplification == 2.0
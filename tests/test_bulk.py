@@ -0,0 +1,299 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from benchmarks.mock_servers import Behavior, FakeOpenAIBatchServer
+from llm_json_adapter import LLMJsonAdapter, Request
+from llm_json_adapter.bulk import BulkBackend, BulkJob
+from llm_json_adapter.exceptions import ExceededMaxRetryCountError
+from llm_json_adapter.providers import ClientRegistry
+
+from .stubs import FUNCTION
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    ClientRegistry.clear()
+    yield
+    ClientRegistry.clear()
+
+
+def create_requests(count):
+    return [
+        Request(prompt=f"Request {index}", function=FUNCTION)
+        for index in range(count)
+    ]
+
+
+async def collect(iterator):
+    return [batch_result async for batch_result in iterator]
+
+
+class StubBulkBackend(BulkBackend):
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.submitted = {}
+
+    def render_line(self, custom_id, request, language):
+        return {"custom_id": custom_id, "prompt": request.prompt}
+
+    async def submit(self, path, name):
+        self.submitted[name] = [
+            json.loads(line)["custom_id"]
+            for line in path.read_text().splitlines()
+        ]
+        return name
+
+    async def is_finished(self, batch_id):
+        return True
+
+    async def fetch_results(self, batch_id):
+        return {
+            custom_id: ((None, "failed") if int(custom_id) in self.failing else
+                        ({
+                            "title": custom_id
+                        }, None))
+            for custom_id in self.submitted[batch_id]
+        }
+
+    def extract_result(self, body, request):
+        return body
+
+
+def test_failed_items_are_resubmitted_until_max_attempts(tmp_path):
+    backend = StubBulkBackend(failing=[1])
+    job = BulkJob(backend,
+                  tmp_path / "job.json",
+                  batch_size=2,
+                  max_pending_batches=2,
+                  poll_interval=0.0,
+                  max_attempts=3)
+
+    results = asyncio.run(collect(job.run(create_requests(3))))
+
+    assert sorted(result.index for result in results
+                  if result.succeeded) == [0, 2]
+    failed = [result for result in results if not result.succeeded]
+    assert [result.index for result in failed] == [1]
+    assert isinstance(failed[0].error, ExceededMaxRetryCountError)
+    assert list(backend.submitted.values()) == [["0", "1"], ["2"], ["1"],
+                                                ["1"]]
+    assert not list(tmp_path.glob("*.jsonl"))
+
+
+def test_malformed_request_is_reported_without_submitting(tmp_path):
+    backend = StubBulkBackend()
+    job = BulkJob(backend,
+                  tmp_path / "job.json",
+                  batch_size=2,
+                  poll_interval=0.0)
+    requests = create_requests(1) + [{"prompt": 1234, "function": FUNCTION}]
+
+    results = asyncio.run(collect(job.run(requests)))
+
+    assert [(result.index, result.succeeded)
+            for result in sorted(results, key=lambda r: r.index)
+            ] == [(0, True), (1, False)]
+    assert list(backend.submitted.values()) == [["0"]]
+
+
+def test_retries_are_pooled_with_new_requests(tmp_path):
+    backend = StubBulkBackend(failing=[1])
+    backend.min_batch_size = 3
+    job = BulkJob(backend,
+                  tmp_path / "job.json",
+                  batch_size=4,
+                  poll_interval=0.0,
+                  max_attempts=2)
+
+    results = asyncio.run(collect(job.run(create_requests(7))))
+
+    assert sorted(
+        (result.index, result.succeeded) for result in results) == [(0, True),
+                                                                    (1, False),
+                                                                    (2, True),
+                                                                    (3, True),
+                                                                    (4, True),
+                                                                    (5, True),
+                                                                    (6, True)]
+    assert list(backend.submitted.values()) == [["0", "1", "2", "3"],
+                                                ["1", "4", "5", "6"]]
+
+
+def test_small_remainder_is_generated_online(tmp_path):
+    backend = StubBulkBackend()
+
+    async def fallback(request):
+        return {"title": "online"}
+
+    job = BulkJob(backend,
+                  tmp_path / "job.json",
+                  batch_size=4,
+                  poll_interval=0.0,
+                  min_batch_size=3,
+                  fallback=fallback)
+
+    results = asyncio.run(collect(job.run(create_requests(5))))
+
+    assert [result.result["title"]
+            for result in results] == ["0", "1", "2", "3", "online"]
+    assert list(backend.submitted.values()) == [["0", "1", "2", "3"]]
+    assert json.loads((tmp_path / "job.json").read_text())["queued"] == []
+
+
+def test_resume_polls_outstanding_batches_without_resubmitting(tmp_path):
+    checkpoint_path = tmp_path / "job.json"
+    backend = StubBulkBackend()
+    backend.submitted["job-1"] = ["0", "1"]
+    checkpoint_path.write_text(
+        json.dumps({
+            "next_index":
+            2,
+            "sequence":
+            1,
+            "batches": [{
+                "id": "job-1",
+                "name": "job-1",
+                "indices": [0, 1],
+                "attempt": 1,
+            }],
+        }))
+    job = BulkJob(backend, checkpoint_path, batch_size=2, poll_interval=0.0)
+
+    results = asyncio.run(collect(job.run(create_requests(3))))
+
+    assert [result.result for result in results] == [{
+        "title": "0"
+    }, {
+        "title": "1"
+    }, {
+        "title": "2"
+    }]
+    assert list(backend.submitted) == ["job-1", "job-2"]
+    assert json.loads(checkpoint_path.read_text()) == {
+        "next_index": 3,
+        "sequence": 2,
+        "batches": [],
+        "queued": [],
+    }
+
+
+def test_openai_batch_api(tmp_path):
+    with FakeOpenAIBatchServer(Behavior(latency=0.0,
+                                        malformed_rate=0.5,
+                                        seed=0),
+                               polls_until_complete=2) as server:
+        adapter = LLMJsonAdapter(provider_name="openai",
+                                 attributes={
+                                     "api_key": "test",
+                                     "base_url": server.url + "/v1",
+                                     "max_retries": 0,
+                                 },
+                                 max_retry_count=10)
+
+        async def main():
+            results = await collect(
+                adapter.generate_bulk(create_requests(4),
+                                      tmp_path / "job.json",
+                                      batch_size=3,
+                                      poll_interval=0.0))
+            await adapter.aclose()
+            return results
+
+        results = asyncio.run(main())
+
+    assert sorted(result.index for result in results) == [0, 1, 2, 3]
+    assert all(result.result["title"] == "benchmark" for result in results)
+    assert len(server.batches) > 2
+
+
+class StubS3Client(object):
+
+    class exceptions(object):
+
+        class NoSuchKey(Exception):
+            pass
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise self.exceptions.NoSuchKey(Key)
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+
+class StubBedrockControlClient(object):
+
+    def __init__(self, s3):
+        self.s3 = s3
+        self.jobs = {}
+
+    def create_model_invocation_job(self, jobName, roleArn, modelId,
+                                    inputDataConfig, outputDataConfig):
+        job_arn = f"arn:aws:bedrock:us-east-1:0:model-invocation-job/{jobName}"
+        input_uri = inputDataConfig["s3InputDataConfig"]["s3Uri"]
+        output_uri = outputDataConfig["s3OutputDataConfig"]["s3Uri"]
+        bucket, _, key = input_uri[len("s3://"):].partition("/")
+        records = []
+        for line in self.s3.objects[(bucket, key)].splitlines():
+            record = json.loads(line)
+            text = '```json\n{"title": "bedrock"}\n```'
+            records.append({
+                "recordId": record["recordId"],
+                "modelInput": record["modelInput"],
+                "modelOutput": {
+                    "content": [{
+                        "type": "text",
+                        "text": text
+                    }]
+                },
+            })
+        output_bucket, _, output_key = output_uri[len("s3://"):].partition("/")
+        self.s3.objects[(output_bucket, f"{output_key}/{jobName}/"
+                         f"{key.rsplit('/', 1)[-1]}.out")] = "".join(
+                             json.dumps(record) + "\n"
+                             for record in records).encode("utf-8")
+        self.jobs[job_arn] = {
+            "status": "Completed",
+            "inputDataConfig": inputDataConfig,
+            "outputDataConfig": outputDataConfig,
+        }
+        return {"jobArn": job_arn}
+
+    def get_model_invocation_job(self, jobIdentifier):
+        return self.jobs[jobIdentifier]
+
+
+def test_bedrock_batch_inference(tmp_path):
+    s3 = StubS3Client()
+    bedrock = StubBedrockControlClient(s3)
+    adapter = LLMJsonAdapter(provider_name="bedrock",
+                             attributes={
+                                 "access_key_id": "test",
+                                 "secret_access_key": "test",
+                             })
+    adapter._provider.get_client = {"s3": s3, "bedrock": bedrock}.get
+
+    results = asyncio.run(
+        collect(
+            adapter.generate_bulk(create_requests(2),
+                                  tmp_path / "job.json",
+                                  poll_interval=0.0,
+                                  min_batch_size=1,
+                                  input_uri="s3://bucket/input/",
+                                  output_uri="s3://bucket/output",
+                                  role_arn="arn:aws:iam::0:role/batch")))
+
+    assert [result.result for result in results] == [{
+        "title": "bedrock"
+    }, {
+        "title": "bedrock"
+    }]
+    assert ("bucket", "input/job-1.jsonl") in s3.objects
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+
+from llm_json_adapter.caches import MemoryCache, SqliteCache
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+
+def test_memory_cache_eviction():
+    cache = MemoryCache(max_size=2)
+    cache.set("a", {"value": 1})
+    cache.set("b", {"value": 2})
+    cache.get("a")
+    cache.set("c", {"value": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": 1}
+    assert cache.get_stats() == {"hits": 2, "misses": 1, "size": 2}
+
+
+def test_memory_cache_ttl():
+    cache = MemoryCache(ttl=0.01)
+    cache.set("a", {"value": 1})
+    time.sleep(0.02)
+    assert cache.get("a") is None
+
+
+def test_sqlite_cache_is_shared(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    writer = SqliteCache(path, max_size=2)
+    reader = SqliteCache(path, max_size=2)
+    writer.set("a", {"value": 1})
+    writer.set("b", {"value": 2})
+    writer.set("c", {"value": 3})
+    assert reader.get("c") == {"value": 3}
+    assert reader.size() == 2
+    assert reader.hits == 1
+    writer.close()
+    reader.close()
+
+
+def test_sqlite_cache_evicts_only_above_max_size(tmp_path):
+    cache = SqliteCache(tmp_path / "cache.sqlite3", max_size=3)
+    statements = []
+    cache._connection.set_trace_callback(statements.append)
+    for key in ("a", "b", "a", "c"):
+        cache.set(key, {"value": key})
+    assert not [statement for statement in statements if "DELETE" in statement]
+
+    cache.get("a")
+    cache.set("d", {"value": "d"})
+    assert len(
+        [statement for statement in statements if "DELETE" in statement]) == 1
+    assert cache.size() == 3
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": "a"}
+    cache.close()
+
+
+def test_sqlite_cache_keeps_storing_after_expiry(tmp_path):
+    cache = SqliteCache(tmp_path / "cache.sqlite3", ttl=0.05, max_size=3)
+    for key in ("a", "b", "c"):
+        cache.set(key, {"value": key})
+    time.sleep(0.1)
+    for key in ("a", "b", "c"):
+        assert cache.get(key) is None
+    assert cache._count == 0
+
+    cache.set("d", {"value": "d"})
+    assert cache.get("d") == {"value": "d"}
+    cache.close()
+
+
+def test_sqlite_cache_recounts_before_evicting(tmp_path):
+    path = tmp_path / "cache.sqlite3"
+    cache = SqliteCache(path, max_size=2)
+    other = SqliteCache(path, max_size=2)
+    cache.set("a", {"value": "a"})
+    cache.set("b", {"value": "b"})
+    other.clear()
+
+    cache.set("c", {"value": "c"})
+    cache.set("d", {"value": "d"})
+    assert cache.size() == 2
+    assert cache.get("c") == {"value": "c"}
+    cache.close()
+    other.close()
+
+
+def test_sqlite_cache_async_io_runs_in_thread_pool(tmp_path):
+    cache = SqliteCache(tmp_path / "cache.sqlite3")
+    threads = []
+    load = cache.load
+    cache.load = lambda key: threads.append(threading.current_thread()
+                                            ) or load(key)
+
+    async def main():
+        await cache.aset("a", {"value": 1})
+        return await cache.aget("a")
+
+    assert asyncio.run(main()) == {"value": 1}
+    assert threads and threads[0] is not threading.main_thread()
+    assert cache.hits == 1
+    cache.close()
+
+
+def test_adapter_uses_cache():
+    provider = StaticProvider()
+    adapter = create_adapter(provider, cache=MemoryCache())
+    assert adapter.generate("prompt", FUNCTION) == {"title": "prompt"}
+    assert adapter.generate("prompt", FUNCTION) == {"title": "prompt"}
+    assert adapter.generate("other", FUNCTION) == {"title": "other"}
+    assert provider.call_count == 2
+    assert adapter.cache.hits == 1
+
+
+def test_invalid_result_is_not_cached():
+    provider = StaticProvider([{"title": 1}, {"title": "ok"}])
+    adapter = create_adapter(provider, cache=MemoryCache())
+    adapter.generate("prompt", FUNCTION)
+    assert adapter.cache.size() == 1
+    assert adapter.generate("prompt", FUNCTION) == {"title": "ok"}
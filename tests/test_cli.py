@@ -0,0 +1,118 @@
+import json
+
+from llm_json_adapter import cli
+from llm_json_adapter.providers import ProviderRegistry
+
+from .stubs import SCHEMA
+
+PROVIDER = "tests.stubs:StaticProvider"
+
+
+def write_input(path, count):
+    with path.open("w") as file:
+        for number in range(count):
+            file.write(
+                json.dumps({
+                    "id": f"r{number}",
+                    "prompt": f"p{number}",
+                    "schema": "title"
+                }) + "\n")
+
+
+def read_output(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def run(tmp_path, *options):
+    schema_path = tmp_path / "schema.json"
+    schema_path.write_text(json.dumps(SCHEMA))
+    try:
+        return cli.main([
+            "run",
+            str(tmp_path / "input.jsonl"),
+            str(tmp_path / "output.jsonl"),
+            "--provider",
+            PROVIDER,
+            "--schema",
+            f"title={schema_path}",
+            "--chunk-size",
+            "2",
+            *options,
+        ])
+    finally:
+        ProviderRegistry.unregister(PROVIDER)
+
+
+def test_run_writes_one_record_per_line(tmp_path):
+    write_input(tmp_path / "input.jsonl", 4)
+    with (tmp_path / "input.jsonl").open("a") as file:
+        file.write("\n")
+        file.write("not json\n")
+        file.write(json.dumps({"prompt": "x", "schema": "missing"}) + "\n")
+
+    assert run(tmp_path, "--workers", "0") == 0
+
+    records = {
+        record["line"]: record
+        for record in read_output(tmp_path / "output.jsonl")
+    }
+    assert sorted(records) == [1, 2, 3, 4, 6, 7]
+    assert records[1] == {"line": 1, "id": "r0", "result": {"title": "p0"}}
+    assert records[6]["error"].startswith("JSONDecodeError")
+    assert "Unknown schema" in records[7]["error"]
+
+
+def test_run_resumes_from_checkpoint(tmp_path):
+    write_input(tmp_path / "input.jsonl", 6)
+    output_path = tmp_path / "output.jsonl"
+    first = '{"line": 1, "id": "r0", "result": {"title": "p0"}}\n{"line": 2, "id": "r1", "result": {"title": "p1"}}\n'
+    # Output of an unfinished chunk that the checkpoint does not cover.
+    output_path.write_text(first + '{"line": 5, "id": "r4", "res')
+    checkpoint = cli.Checkpoint(tmp_path / "output.jsonl.checkpoint", 2)
+    checkpoint.mark(0, len(first))
+
+    assert run(tmp_path, "--workers", "0") == 0
+
+    assert cli._adapter._provider.prompts == ["p2", "p3", "p4", "p5"]
+    lines = [record["line"] for record in read_output(output_path)]
+    assert sorted(lines) == [1, 2, 3, 4, 5, 6]
+    state = json.loads(checkpoint.path.read_text())
+    assert state["watermark"] == 3
+    assert state["output_offset"] == output_path.stat().st_size
+
+
+def test_run_rejects_checkpoint_with_other_chunk_size(tmp_path):
+    write_input(tmp_path / "input.jsonl", 2)
+    (tmp_path / "output.jsonl").write_text("")
+    cli.Checkpoint(tmp_path / "output.jsonl.checkpoint", 5).save()
+
+    assert run(tmp_path, "--workers", "0") == 2
+
+
+def test_checkpoint_tracks_out_of_order_chunks(tmp_path):
+    checkpoint = cli.Checkpoint(tmp_path / "checkpoint", 10)
+    checkpoint.mark(1, 10)
+    checkpoint.mark(3, 20)
+    assert (checkpoint.watermark, checkpoint.completed) == (0, {1, 3})
+
+    checkpoint.mark(0, 30)
+    assert (checkpoint.watermark, checkpoint.completed) == (2, {3})
+
+    restored = cli.Checkpoint(tmp_path / "checkpoint", 10)
+    assert restored.load()
+    assert [restored.is_done(index)
+            for index in range(5)] == [True, True, False, True, False]
+    assert restored.output_offset == 30
+
+
+def test_run_with_worker_processes(tmp_path):
+    write_input(tmp_path / "input.jsonl", 7)
+
+    assert run(tmp_path, "--workers", "2", "--concurrency", "2") == 0
+
+    records = read_output(tmp_path / "output.jsonl")
+    assert sorted(record["line"] for record in records) == list(range(1, 8))
+    assert all(record["result"] == {"title": f"p{record['line'] - 1}"}
+               for record in records)
+    assert json.loads(
+        (tmp_path / "output.jsonl.checkpoint").read_text())["watermark"] == 4
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from llm_json_adapter.providers import ClientRegistry, ProviderRegistry
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    ClientRegistry.clear()
+    yield
+    ClientRegistry.clear()
+
+
+def create_provider(name, **attributes):
+    return ProviderRegistry.create(name, attributes=attributes)
+
+
+def test_bedrock_clients_are_shared_by_credentials_and_region():
+    first = create_provider("bedrock",
+                            access_key_id="a",
+                            secret_access_key="b")
+    second = create_provider("bedrock",
+                             access_key_id="a",
+                             secret_access_key="b")
+    other_region = create_provider("bedrock",
+                                   access_key_id="a",
+                                   secret_access_key="b",
+                                   region="eu-west-1")
+
+    assert first.get_client() is second.get_client()
+    assert first.get_client() is not other_region.get_client()
+    assert first.get_client("bedrock") is second.get_client("bedrock")
+    assert first.get_client("bedrock") is not first.get_client()
+    assert ClientRegistry.size() == 3
+
+
+def test_async_clients_are_shared_per_event_loop():
+    first = create_provider("openai", api_key="key")
+    second = create_provider("openai", api_key="key")
+    other_key = create_provider("openai", api_key="other")
+
+    async def get_clients():
+        return first.get_client(), second.get_client(), other_key.get_client()
+
+    client, same, other = asyncio.run(get_clients())
+    assert client is same
+    assert client is not other
+
+    client_on_new_loop, _, _ = asyncio.run(get_clients())
+    assert client_on_new_loop is not client
+
+
+def test_stale_and_idle_clients_are_evicted(monkeypatch):
+    closed = []
+
+    async def use(key):
+        return ClientRegistry.get(("test", key),
+                                  object,
+                                  closer=closed.append,
+                                  loop_bound=True)
+
+    client = asyncio.run(use("a"))
+    asyncio.run(use("b"))
+    assert client in closed
+
+    monkeypatch.setattr(ClientRegistry, "idle_timeout", 0.0)
+    assert ClientRegistry.get(("test", "sync"), object) is not None
+    assert ClientRegistry.evict_idle() == 1
+    assert ClientRegistry.size() == 0
+
+
+def test_unshared_client_is_owned_by_provider():
+    provider = create_provider("bedrock",
+                               access_key_id="a",
+                               secret_access_key="b",
+                               shared_client=False)
+    client = provider.get_client()
+    assert client is provider.get_client()
+    assert ClientRegistry.size() == 0
+
+    asyncio.run(provider.close())
+    assert provider.get_client() is not client
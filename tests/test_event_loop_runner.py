@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from llm_json_adapter.utilities import EventLoopRunner
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+
+class LoopRecordingProvider(StaticProvider):
+
+    def __init__(self):
+        super().__init__()
+        self.loops = []
+        self.closed = False
+
+    async def generate(self, prompt, function, language="en", act_as=None):
+        self.loops.append(asyncio.get_running_loop())
+        return await super().generate(prompt, function, language, act_as)
+
+    async def close(self):
+        self.closed = True
+
+
+def test_runner_reuses_loop():
+    runner = EventLoopRunner()
+
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    first = runner.run(current_loop())
+    assert runner.run(current_loop()) is first
+    runner.close()
+    assert not runner.is_running
+
+
+def test_generate_reuses_event_loop():
+    provider = LoopRecordingProvider()
+    with create_adapter(provider) as adapter:
+        adapter.generate("a", FUNCTION)
+        adapter.generate("b", FUNCTION)
+        adapter.generate_many([{"prompt": "c", "function": FUNCTION}])
+    assert len(set(map(id, provider.loops))) == 1
+    assert provider.closed
+
+
+def test_close_inside_running_loop_points_to_aclose():
+    provider = LoopRecordingProvider()
+    adapter = create_adapter(provider)
+
+    async def run():
+        with pytest.raises(RuntimeError, match="aclose"):
+            adapter.close()
+        await adapter.aclose()
+
+    asyncio.run(run())
+    assert provider.closed
+
+
+def test_async_context_manager():
+    provider = LoopRecordingProvider()
+
+    async def run():
+        async with create_adapter(provider) as adapter:
+            return await adapter.generate_async("a", FUNCTION)
+
+    assert asyncio.run(run()) == {"title": "a"}
+    assert provider.closed
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from llm_json_adapter.exceptions import RetryableError
+from llm_json_adapter.providers import ProviderRegistry
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+
+@pytest.fixture(autouse=True)
+def static_provider():
+    ProviderRegistry.register("static", StaticProvider)
+    yield
+    ProviderRegistry.unregister("static")
+
+
+def create_hedge(backends, **attributes):
+    provider_class = ProviderRegistry.get("hedge")
+    provider = provider_class(
+        attributes={
+            "providers": [{
+                "provider": "static",
+                "name": f"backend{index}",
+            } for index in range(len(backends))],
+            **attributes,
+        })
+    provider._backends = backends
+    return provider
+
+
+def test_primary_wins_before_hedge_delay():
+    primary = StaticProvider()
+    secondary = StaticProvider()
+    provider = create_hedge([primary, secondary], hedge_delay=0.5)
+
+    result = asyncio.run(provider.generate("hello", FUNCTION))
+
+    assert result == {"title": "hello"}
+    assert secondary.call_count == 0
+
+
+def test_hedge_wins_when_primary_is_slow():
+    primary = StaticProvider(delay=1.0)
+    secondary = StaticProvider(results=[{"title": "fast"}])
+    provider = create_hedge([primary, secondary], hedge_delay=0.05)
+
+    result = asyncio.run(provider.generate("hello", FUNCTION))
+
+    assert result == {"title": "fast"}
+    assert primary.in_flight == 0
+    assert provider.get_latency_stats()["backend1"]["count"] == 1
+
+
+def test_invalid_result_launches_next_backend_immediately():
+    primary = StaticProvider(results=[{"name": "invalid"}])
+    secondary = StaticProvider(results=[{"title": "valid"}])
+    provider = create_hedge([primary, secondary], hedge_delay=10)
+
+    result = asyncio.run(provider.generate("hello", FUNCTION))
+
+    assert result == {"title": "valid"}
+    assert provider.get_latency_stats()["backend0"]["error_rate"] == 1.0
+
+
+def test_all_backends_failing_raises_retryable_error():
+    provider = create_hedge([
+        StaticProvider(results=[RetryableError("first")]),
+        StaticProvider(results=[RetryableError("second")]),
+    ])
+
+    with pytest.raises(RetryableError, match="second"):
+        asyncio.run(provider.generate("hello", FUNCTION))
+
+
+def test_adaptive_delay_uses_observed_percentile():
+    provider = create_hedge([StaticProvider()],
+                            min_samples=5,
+                            default_hedge_delay=3.0)
+    assert provider.get_hedge_delay(0) == 3.0
+
+    for latency in (0.1, 0.2, 0.3, 0.4, 0.5):
+        provider._latency_stats[0].record(latency)
+
+    assert provider.get_hedge_delay(0) == 0.5
+
+
+def test_adapter_uses_hedge_provider():
+    provider = create_hedge([
+        StaticProvider(delay=1.0),
+        StaticProvider(results=[{
+            "title": "hedged"
+        }])
+    ],
+                            hedge_delay=0.05)
+    adapter = create_adapter(provider)
+
+    assert adapter.generate("hello", FUNCTION) == {"title": "hedged"}
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from llm_json_adapter.exceptions import RetryableError
+from llm_json_adapter.providers.bedrock import Provider as BedrockProvider
+from llm_json_adapter.providers.ollama import Provider as OllamaProvider
+from llm_json_adapter.providers.openai import Provider as OpenAIProvider
+from llm_json_adapter.utilities import Instrumentation, OpenTelemetrySubscriber
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+
+class Recorder(object):
+
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, name, attributes):
+        self.events.append((name, attributes))
+
+    def names(self):
+        return [name for name, _ in self.events]
+
+
+def test_span_is_noop_without_subscribers():
+    instrumentation = Instrumentation()
+    with instrumentation.span("work", size=1) as span:
+        span.set_attribute("extra", True)
+    assert not span.is_recording
+    assert not instrumentation.enabled
+
+
+def test_span_reports_duration_and_error():
+    recorder = Recorder()
+    instrumentation = Instrumentation([recorder])
+    try:
+        with instrumentation.span("work", size=1) as span:
+            span.set_attribute("extra", True)
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    name, attributes = recorder.events[0]
+    assert name == "work"
+    assert attributes["size"] == 1
+    assert attributes["extra"] is True
+    assert attributes["error"] == "ValueError"
+    assert attributes["duration"] >= 0
+
+    instrumentation.unsubscribe(recorder)
+    assert not instrumentation.enabled
+
+
+def test_adapter_reports_queue_wait_validation_and_retries():
+    recorder = Recorder()
+    provider = StaticProvider(
+        results=[RetryableError("bad"), {
+            "name": "invalid"
+        }])
+    adapter = create_adapter(provider,
+                             max_concurrency=4,
+                             instrumentation=Instrumentation([recorder]))
+    provider.set_instrumentation(adapter.instrumentation)
+
+    assert adapter.generate("hello", FUNCTION) == {"title": "hello"}
+
+    names = recorder.names()
+    assert names.count("queue_wait") == 3
+    assert names.count("validation") == 2
+    retries = [
+        attributes for name, attributes in recorder.events if name == "retry"
+    ]
+    assert [retry["attempt"] for retry in retries] == [1, 2]
+    assert retries[0]["reason"] == "RetryableError"
+
+
+def test_parse_content_reports_extraction_tier():
+    recorder = Recorder()
+    provider = StaticProvider()
+    provider.set_instrumentation(Instrumentation([recorder]))
+    provider.parse_content('{"title": "hello",', FUNCTION)
+    name, attributes = recorder.events[0]
+    assert name == "extraction"
+    assert attributes["tier"] == "repaired"
+
+
+def test_debug_log_does_not_format_when_disabled():
+
+    class Expensive(object):
+        formatted = 0
+
+        def __str__(self):
+            Expensive.formatted += 1
+            return "expensive"
+
+    logger = logging.getLogger("tests.instrumentation")
+    logger.setLevel(logging.INFO)
+    provider = StaticProvider(logger=logger)
+    provider.debug_log("Body: %s", Expensive())
+    assert Expensive.formatted == 0
+
+
+def test_usage_extraction():
+    assert BedrockProvider.extract_usage(
+        "anthropic.claude-3-haiku-20240307-v1:0", {
+            "usage": {
+                "input_tokens": 10,
+                "output_tokens": 5,
+                "cache_read_input_tokens": 1200,
+                "cache_creation_input_tokens": 0
+            }
+        }) == {
+            "prompt_tokens": 10,
+            "completion_tokens": 5,
+            "cached_tokens": 1200,
+            "cache_write_tokens": 0
+        }
+    assert BedrockProvider.extract_usage("meta.llama3-8b-instruct-v1:0", {
+        "prompt_token_count": 7,
+        "generation_token_count": 3
+    }) == {
+        "prompt_tokens": 7,
+        "completion_tokens": 3
+    }
+    assert OllamaProvider.extract_usage({
+        "prompt_eval_count": 12,
+        "eval_count": 4
+    }) == {
+        "prompt_tokens": 12,
+        "completion_tokens": 4
+    }
+
+
+def test_openai_stream_requests_usage_through_extra_body():
+    requests = []
+    delta = SimpleNamespace(content='{"title": "a"}', tool_calls=None)
+    usage = {"prompt_tokens": 9, "completion_tokens": 4}
+    chunks = [
+        SimpleNamespace(usage=None,
+                        choices=[SimpleNamespace(index=0, delta=delta)]),
+        SimpleNamespace(usage=usage, choices=[]),
+    ]
+
+    class Stream(object):
+
+        def __aiter__(self):
+            return self.iterate()
+
+        async def iterate(self):
+            for chunk in chunks:
+                yield chunk
+
+        async def close(self):
+            pass
+
+    async def create(**request):
+        requests.append(request)
+        return Stream()
+
+    recorder = Recorder()
+    provider = OpenAIProvider(attributes={"api_key": "xxxxxxxx"})
+    provider.set_instrumentation(Instrumentation([recorder]))
+    provider._client = SimpleNamespace(chat=SimpleNamespace(
+        completions=SimpleNamespace(create=create)))
+
+    async def consume():
+        return [text async for text in provider.generate_stream("a", FUNCTION)]
+
+    assert asyncio.run(consume()) == ['{"title": "a"}']
+    assert "stream_options" not in requests[0]
+    assert requests[0]["extra_body"] == {
+        "stream_options": {
+            "include_usage": True
+        }
+    }
+    name, attributes = recorder.events[-1]
+    assert name == "token_usage"
+    assert (attributes["prompt_tokens"], attributes["completion_tokens"],
+            attributes["cached_tokens"]) == (9, 4, None)
+
+
+def test_open_telemetry_subscriber():
+
+    class FakeSpan(object):
+
+        def __init__(self, name, start_time, attributes):
+            self.name = name
+            self.start_time = start_time
+            self.attributes = attributes
+            self.end_time = None
+
+        def end(self, end_time):
+            self.end_time = end_time
+
+    class FakeTracer(object):
+
+        def __init__(self):
+            self.spans = []
+
+        def start_span(self, name, start_time, attributes):
+            span = FakeSpan(name, start_time, attributes)
+            self.spans.append(span)
+            return span
+
+    tracer = FakeTracer()
+    instrumentation = Instrumentation([OpenTelemetrySubscriber(tracer)])
+    with instrumentation.span("provider_call", provider="OpenAI", model=None):
+        pass
+
+    span = tracer.spans[0]
+    assert span.name == "llm_json_adapter.provider_call"
+    assert span.attributes["provider"] == "OpenAI"
+    assert "model" not in span.attributes
+    assert span.end_time >= span.start_time
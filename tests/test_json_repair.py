@@ -0,0 +1,151 @@
+import pytest
+
+from llm_json_adapter.exceptions import RetryableError
+from llm_json_adapter.utilities import JsonRepair
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+
+@pytest.mark.parametrize("text,value,tier", [
+    ('```json\n{"a": 1}\n```', {
+        "a": 1
+    }, "fenced"),
+    ('Here you are: {"a": [1, 2]} Hope this helps!', {
+        "a": [1, 2]
+    }, "balanced"),
+    ('```json\n{"a": 1}\n```\nNote: {', {
+        "a": 1
+    }, "fenced"),
+    ('```json5\n{a: 1, b: [1, 2,],}\n```', {
+        "a": 1,
+        "b": [1, 2]
+    }, "repaired"),
+    ("{'a': 'it\\'s', 'b': True, 'c': None}", {
+        "a": "it's",
+        "b": True,
+        "c": None
+    }, "repaired"),
+    ('```json\n{"a": [1, 2, {"b": "trunc', {
+        "a": [1, 2, {
+            "b": "trunc"
+        }]
+    }, "repaired"),
+    ('{"a": 1, "b": ', {
+        "a": 1
+    }, "repaired"),
+    ('{"a": 1 // comment\n}', {
+        "a": 1
+    }, "repaired"),
+    ('{"a": 1, "ok": tru', {
+        "a": 1
+    }, "repaired"),
+])
+def test_extract_tiers(text, value, tier):
+    extraction = JsonRepair.extract(text)
+    assert extraction.value == value
+    assert extraction.tier == tier
+
+
+def test_extract_returns_none_without_json():
+    assert JsonRepair.extract("I cannot answer that.") is None
+    assert JsonRepair.extract("") is None
+    assert JsonRepair.extract('{"ok": tru') is None
+
+
+def test_schema_guided_coercion():
+    schema = {
+        "type": "object",
+        "properties": {
+            "count": {
+                "type": "integer"
+            },
+            "price": {
+                "type": "number"
+            },
+            "tags": {
+                "type": "array",
+                "items": {
+                    "type": "string"
+                }
+            },
+            "active": {
+                "type": "boolean"
+            },
+            "color": {
+                "enum": ["Red", "Blue"]
+            },
+        },
+        "required": ["count"],
+    }
+    extraction = JsonRepair.extract(
+        '```json\n{"count": "3", "price": "1200.5", "tags": 5, "active": "yes", "color": "red"}\n```',
+        schema)
+    assert extraction.tier == "coerced"
+    assert extraction.value == {
+        "count": 3,
+        "price": 1200.5,
+        "tags": ["5"],
+        "active": True,
+        "color": "Red",
+    }
+
+    extraction = JsonRepair.extract('{"count": 1, "price": "1,5"}', schema)
+    assert extraction.value == {"count": 1, "price": "1,5"}
+    assert extraction.tier == "balanced"
+
+    extraction = JsonRepair.extract('{"count": "12345678901234567891"}',
+                                    schema)
+    assert extraction.value == {"count": 12345678901234567891}
+    assert extraction.tier == "coerced"
+
+
+def test_object_is_found_after_other_json():
+    assert JsonRepair.extract('Step [1]: {"n": 2}').value == [1]
+    extraction = JsonRepair.extract('Step [1]: {"n": 2}', object_only=True)
+    assert extraction.value == {"n": 2}
+    assert extraction.tier == "balanced"
+    extraction = JsonRepair.extract('Step [1]: {"n": 2', object_only=True)
+    assert extraction.value == {"n": 2}
+
+    provider = StaticProvider()
+    assert provider.parse_content('Step [1]: {"title": "a"}', FUNCTION) == {
+        "title": "a"
+    }
+
+
+def test_non_integral_number_is_not_coerced_to_null():
+    schema = {
+        "type": "object",
+        "properties": {
+            "n": {
+                "type": ["integer", "null"]
+            }
+        }
+    }
+    extraction = JsonRepair.extract('{"n": 2.5}', schema)
+    assert extraction.value == {"n": 2.5}
+    assert extraction.tier == "balanced"
+
+
+def test_provider_records_recovery_tier():
+    provider = StaticProvider()
+    assert provider.parse_content('{"title": "a"}', FUNCTION) == {"title": "a"}
+    assert provider.parse_content('```\n{"title": 1}\n```', FUNCTION) == {
+        "title": "1"
+    }
+    with pytest.raises(RetryableError):
+        provider.parse_content("no json", FUNCTION)
+
+    adapter = create_adapter(provider)
+    assert adapter.recovery_stats == {"balanced": 1, "coerced": 1, "failed": 1}
+
+
+def test_native_json_is_not_counted_as_recovery():
+    provider = StaticProvider()
+    assert provider.parse_content('{"title": "a"}', FUNCTION, native=True) == {
+        "title": "a"
+    }
+    assert provider.parse_content('{"title": 1}', FUNCTION, native=True) == {
+        "title": "1"
+    }
+    assert provider.recovery_stats == {"native": 1, "coerced": 1}
@@ -0,0 +1,51 @@
+import json
+import re
+
+import pytest
+
+from llm_json_adapter.utilities import JsonUtility
+
+
+@pytest.mark.parametrize("text", [
+    '```json\n{"a": 1}\n```',
+    'Sure:\n```json\n{"a": 1}\n```\nand\n```json\n{"b": 2}\n```',
+    '```\n{"a": "```"}',
+    '```json{"a": 1}```',
+    'no block at all',
+    '```json\n{"a": 1}',
+    '``` json \n[1, 2]```',
+])
+def test_extract_code_block_matches_regex(text):
+    blocks = re.findall(r'```(.*?)\n(.*?)```', text, re.DOTALL)
+    expected = blocks[0][1] if blocks else None
+    assert JsonUtility.extract_code_block(text) == expected
+
+
+def test_extract_json_block():
+    assert JsonUtility.extract_json_block('```json\n{"a": [1, 2]}\n```') == {
+        "a": [1, 2]
+    }
+    assert JsonUtility.extract_json_block('{"a": 1}') is None
+    with pytest.raises(ValueError):
+        JsonUtility.extract_json_block('```json\n{"a": \n```')
+
+
+@pytest.mark.parametrize("backend", JsonUtility.get_available_backends())
+def test_backends(backend):
+    previous = JsonUtility.backend
+    JsonUtility.set_backend(backend)
+    try:
+        assert JsonUtility.loads('{"a": [1, 2.5, "x", null]}') == {
+            "a": [1, 2.5, "x", None]
+        }
+        assert JsonUtility.loads(b'{"a": 1}') == {"a": 1}
+        assert JsonUtility.loads('{"a": NaN}')["a"] != 0
+        with pytest.raises(json.JSONDecodeError):
+            JsonUtility.loads('{"a": ')
+    finally:
+        JsonUtility.set_backend(previous)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        JsonUtility.set_backend("unknown")
@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import pytest
+from openai.types import CompletionUsage
+
+from llm_json_adapter.providers.bedrock import Provider as BedrockProvider
+from llm_json_adapter.providers.google import Provider as GoogleProvider
+from llm_json_adapter.providers.openai import Provider as OpenAIProvider
+
+from .stubs import FUNCTION, StaticProvider
+
+BEDROCK_ATTRIBUTES = {
+    "access_key_id": "xxxxxxxx",
+    "secret_access_key": "xxxxxxxx",
+}
+
+
+def test_static_first_layout_keeps_a_stable_prefix():
+    provider = StaticProvider(attributes={"prompt_layout": "static_first"})
+
+    first = provider.generate_chat_prompt("first", FUNCTION, "en", "analyst")
+    second = provider.generate_chat_prompt("second", FUNCTION, "en", "analyst")
+
+    assert first[:-1] == second[:-1]
+    assert [message["role"]
+            for message in first] == ["system", "system", "user"]
+    assert first[-1] == {"role": "user", "content": "first"}
+    assert provider.generate_prompt(
+        "prompt", FUNCTION).startswith("Response should be in English.")
+    assert provider.generate_prompt("prompt", FUNCTION).endswith("prompt")
+
+
+def test_unknown_layout_is_rejected():
+    provider = StaticProvider(attributes={"prompt_layout": "middle"})
+
+    with pytest.raises(ValueError):
+        provider.generate_chat_prompt("prompt", FUNCTION)
+
+
+def test_bedrock_marks_cache_points():
+    provider = BedrockProvider(
+        attributes={
+            **BEDROCK_ATTRIBUTES, "prompt_layout": "static_first"
+        })
+    model = "anthropic.claude-3-haiku-20240307-v1:0"
+
+    body = provider.generate_body_structure(
+        model, provider.generate_chat_prompt("prompt", FUNCTION))
+    request = provider.generate_converse_request("prompt", FUNCTION)
+
+    assert body["system"][0]["cache_control"] == {"type": "ephemeral"}
+    assert "Json schema" in body["system"][0]["text"]
+    assert body["messages"] == [{"role": "user", "content": "prompt"}]
+    assert request["system"][-1] == {"cachePoint": {"type": "default"}}
+    assert request["toolConfig"]["tools"][-1] == {
+        "cachePoint": {
+            "type": "default"
+        }
+    }
+
+    default = BedrockProvider(attributes=BEDROCK_ATTRIBUTES)
+    assert isinstance(
+        default.generate_body_structure(
+            model, default.generate_chat_prompt("prompt", FUNCTION))["system"],
+        str)
+
+
+def test_bedrock_omits_cache_points_unknown_to_boto3():
+    system_block = SimpleNamespace(members={"text": None})
+    service_model = SimpleNamespace(shape_for=lambda name: system_block)
+    provider = BedrockProvider(
+        attributes={
+            **BEDROCK_ATTRIBUTES, "prompt_layout": "static_first"
+        })
+    provider._client = SimpleNamespace(meta=SimpleNamespace(
+        service_model=service_model))
+
+    request = provider.generate_converse_request("prompt", FUNCTION)
+
+    assert len(request["system"]) == 1
+    assert "cachePoint" not in request["toolConfig"]["tools"][-1]
+
+
+def test_cached_tokens_are_reported():
+    usage = CompletionUsage.model_validate({
+        "prompt_tokens": 2000,
+        "completion_tokens": 10,
+        "total_tokens": 2010,
+        "prompt_tokens_details": {
+            "cached_tokens": 1920
+        },
+    })
+
+    class UsageMetadata(object):
+        prompt_token_count = 2000
+        candidates_token_count = 10
+        cached_content_token_count = 1024
+
+    class GeminiResponse(object):
+        usage_metadata = UsageMetadata()
+
+    assert OpenAIProvider.extract_usage(usage)["cached_tokens"] == 1920
+    assert GoogleProvider.extract_usage(
+        GeminiResponse())["cached_tokens"] == 1024
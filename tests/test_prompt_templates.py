@@ -0,0 +1,147 @@
+import json
+
+from llm_json_adapter.objects import Response
+from llm_json_adapter.providers.openai import Provider as OpenAIProvider
+from llm_json_adapter.utilities import JsonUtility, SchemaSerializer
+
+from .stubs import FUNCTION, StaticProvider
+
+SCHEMA = {
+    "$schema": "https://json-schema.org/draft/2020-12/schema",
+    "$id": "https://example.com/item.json",
+    "type": "object",
+    "properties": {
+        "examples": {
+            "type": "array",
+            "items": {
+                "type": "string",
+                "examples": ["a", "b"]
+            },
+        },
+    },
+    "examples": [{
+        "examples": ["a"]
+    }],
+}
+
+
+def test_generate_prompt_is_unchanged():
+    provider = StaticProvider()
+    expected = (
+        "prompt\n\n"
+        "Please answer as analyst.\n\n"
+        "Response should be in English.\n\n"
+        "And follow the following Json schema as the response format: \n\n"
+        f"\n{json.dumps(FUNCTION.parameters)}\n\n"
+        "- Response should be a single valid JSON data\n"
+        "- Response should be wrapped by the markdown code block\n"
+        "- Output only the json response\n"
+        "- No need to output the format itself\n\n")
+    assert provider.generate_prompt("prompt", FUNCTION, "en",
+                                    "analyst") == expected
+
+
+def test_chat_prompt_is_rendered_once():
+    provider = StaticProvider()
+    provider.clear_prompt_templates()
+    calls = []
+    render = provider.render_chat_system_messages
+    provider.render_chat_system_messages = lambda *args: calls.append(
+        args) or render(*args)
+
+    first = provider.generate_chat_prompt("first", FUNCTION, "ja", "analyst")
+    second = provider.generate_chat_prompt("second", FUNCTION, "ja", "analyst")
+
+    assert len(calls) == 1
+    assert first[0] == {"role": "user", "content": "first"}
+    assert second[0] == {"role": "user", "content": "second"}
+    assert first[1:] == second[1:]
+    assert "Japanese" in first[1]["content"]
+    first[1]["content"] = "changed"
+    assert provider.generate_chat_prompt("third", FUNCTION, "ja",
+                                         "analyst")[1] == second[1]
+
+
+def test_mutated_schema_is_rendered_again():
+    provider = StaticProvider()
+    function = Response(**FUNCTION.model_dump())
+    function.parameters = json.loads(json.dumps(FUNCTION.parameters))
+    provider.generate_prompt("prompt", function)
+
+    function.parameters["properties"]["note"] = {"type": "string"}
+    assert '"note"' in provider.generate_prompt("prompt", function)
+
+    function.parameters = {
+        "type": "object",
+        "properties": {
+            "other": {
+                "type": "string"
+            }
+        }
+    }
+    assert '"other"' in provider.generate_prompt("prompt", function)
+
+
+def test_fingerprint_is_hashed_once_per_schema(monkeypatch):
+    hashed = []
+    stable_hash = JsonUtility.stable_hash
+    monkeypatch.setattr(JsonUtility, "stable_hash",
+                        lambda data: hashed.append(data) or stable_hash(data))
+    function = Response(**FUNCTION.model_dump())
+    first = function.get_fingerprint()
+    assert function.get_fingerprint() == first
+    assert len(hashed) == 1
+
+    function.parameters["properties"]["note"] = {"type": "string"}
+    assert function.get_fingerprint() != first
+    assert len(hashed) == 2
+
+
+def test_compact_schema():
+    stripped = SchemaSerializer.strip_keywords(SCHEMA)
+    assert stripped == {
+        "type": "object",
+        "properties": {
+            "examples": {
+                "type": "array",
+                "items": {
+                    "type": "string"
+                }
+            },
+        },
+    }
+    compact = SchemaSerializer.dumps(SCHEMA, compact=True)
+    assert " " not in compact
+    savings = SchemaSerializer.get_savings(SCHEMA)
+    assert savings["saved_tokens"] > 0
+    assert savings["compact_characters"] == len(compact)
+
+    provider = StaticProvider(attributes={"compact_schema": True})
+    function = Response(name="item", description="item", parameters=SCHEMA)
+    assert compact in provider.generate_chat_prompt("prompt",
+                                                    function)[2]["content"]
+
+
+def test_openai_messages_and_tools():
+    provider = OpenAIProvider(attributes={
+        "api_key": "xxxxxxxx",
+        "compact_schema": True
+    })
+    function = Response(name="item", description="item", parameters=SCHEMA)
+    assert provider.generate_messages("prompt", "en", "analyst") == [
+        {
+            "role": "system",
+            "content": "You are analyst."
+        },
+        {
+            "role": "system",
+            "content": "Please reply in English."
+        },
+        {
+            "role": "user",
+            "content": "prompt"
+        },
+    ]
+    tools = provider.generate_parameters(function)["tools"]
+    assert "$schema" not in tools[0]["function"]["parameters"]
+    assert provider.generate_parameters(function)["tools"] is tools
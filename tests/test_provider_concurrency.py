@@ -0,0 +1,84 @@
+import asyncio
+import io
+import json
+import time
+
+from llm_json_adapter.providers.bedrock import Provider as BedrockProvider
+from llm_json_adapter.providers.google import Provider as GoogleProvider
+from llm_json_adapter.providers.ollama import Provider as OllamaProvider
+
+from .stubs import FUNCTION
+
+DELAY = 0.2
+REQUEST_COUNT = 8
+CONTENT = '```json\n{"title": "stub"}\n```'
+
+
+class StubOllamaClient(object):
+
+    async def chat(self, model, messages, stream=False):
+        await asyncio.sleep(DELAY)
+        return {"message": {"content": CONTENT}}
+
+
+class StubGoogleResponse(object):
+    text = CONTENT
+
+
+class StubGoogleModel(object):
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(DELAY)
+        return StubGoogleResponse()
+
+
+class StubBedrockClient(object):
+
+    def invoke_model(self, modelId, body):
+        time.sleep(DELAY)
+        return {
+            "body":
+            io.BytesIO(
+                json.dumps({
+                    "content": [{
+                        "type": "text",
+                        "text": CONTENT
+                    }],
+                }).encode())
+        }
+
+
+async def run_concurrently(provider) -> float:
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*[
+        provider.generate(f"prompt {index}", FUNCTION)
+        for index in range(REQUEST_COUNT)
+    ])
+    assert all(result == {"title": "stub"} for result in results)
+    return time.perf_counter() - started_at
+
+
+def assert_overlaps(provider):
+    elapsed = asyncio.run(run_concurrently(provider))
+    assert elapsed < DELAY * 2
+
+
+def test_ollama_provider_is_non_blocking():
+    provider = OllamaProvider(attributes={})
+    provider._client = StubOllamaClient()
+    assert_overlaps(provider)
+
+
+def test_google_provider_is_non_blocking():
+    provider = GoogleProvider(attributes={"api_key": "xxxxxxxx"})
+    provider._client = StubGoogleModel()
+    assert_overlaps(provider)
+
+
+def test_bedrock_provider_is_non_blocking():
+    provider = BedrockProvider(attributes={
+        "access_key_id": "xxxxxxxx",
+        "secret_access_key": "xxxxxxxx",
+    })
+    provider._client = StubBedrockClient()
+    assert_overlaps(provider)
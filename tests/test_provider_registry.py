@@ -0,0 +1,57 @@
+import subprocess
+import sys
+from importlib.metadata import EntryPoint
+
+import pytest
+
+from llm_json_adapter import LLMJsonAdapter
+from llm_json_adapter.exceptions import UnknownProviderError
+from llm_json_adapter.providers import ProviderRegistry, registry
+
+from .stubs import StaticProvider
+
+
+def test_import_defers_optional_modules():
+    code = (
+        "import sys\n"
+        "from llm_json_adapter import LLMJsonAdapter, Response\n"
+        "deferred = ('jsonschema', 'sqlite3', 'openai', 'boto3', 'ollama', 'google.generativeai')\n"
+        "print(','.join(m for m in deferred if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code],
+                            capture_output=True,
+                            text=True,
+                            check=True)
+    assert output.stdout.strip() == ""
+
+
+def test_builtin_provider_is_imported_on_first_use():
+    provider_class = ProviderRegistry.get("OpenAI")
+    from llm_json_adapter.providers.openai import Provider as OpenAIProvider
+    assert provider_class is OpenAIProvider
+
+
+def test_register_custom_provider():
+    ProviderRegistry.register("static", StaticProvider)
+    try:
+        adapter = LLMJsonAdapter(provider_name="static", attributes={})
+        assert isinstance(adapter._provider, StaticProvider)
+    finally:
+        ProviderRegistry.unregister("static")
+
+
+def test_entry_point_discovery(monkeypatch):
+    entry_point = EntryPoint(name="stub",
+                             value="tests.stubs:StaticProvider",
+                             group=ProviderRegistry.entry_point_group)
+    monkeypatch.setattr(registry, "entry_points", lambda group: [entry_point])
+    monkeypatch.setattr(ProviderRegistry, "_entry_points_loaded", False)
+    try:
+        assert "stub" in ProviderRegistry.get_names()
+        assert ProviderRegistry.get("stub") is StaticProvider
+    finally:
+        ProviderRegistry.unregister("stub")
+
+
+def test_unknown_provider():
+    with pytest.raises(UnknownProviderError):
+        LLMJsonAdapter(provider_name="unknown", attributes={})
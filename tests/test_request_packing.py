@@ -0,0 +1,173 @@
+import re
+
+from llm_json_adapter import Request, Response
+from llm_json_adapter.exceptions import ExceededMaxRetryCountError
+from llm_json_adapter.scheduling import RequestPacker
+from llm_json_adapter.utilities import JsonUtility
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+
+class PackingProvider(StaticProvider):
+    """Answers packed prompts, dropping the prompts listed in ``broken``."""
+
+    def __init__(self, broken=None, **kwargs):
+        super().__init__(**kwargs)
+        self.broken = dict(broken or {})
+        self.packs = []
+
+    async def generate(self, prompt, function, language="en", act_as=None):
+        await super().generate(prompt, function, language, act_as)
+        self.set_language(language)
+        prompts = re.findall(r"### Request \d+\n(.*)", prompt)
+        self.packs.append(prompts)
+        items = []
+        for number, item_prompt in enumerate(prompts):
+            if self.broken.get(item_prompt, 0) > 0:
+                self.broken[item_prompt] -= 1
+                items.append({"index": number, "result": {"title": 1}})
+                continue
+            items.append({"index": number, "result": {"title": item_prompt}})
+        return {"items": items}
+
+
+def create_requests(count, function=FUNCTION):
+    return [
+        Request(prompt=f"prompt {index}", function=function)
+        for index in range(count)
+    ]
+
+
+def test_requests_are_answered_in_packs():
+    provider = PackingProvider()
+    adapter = create_adapter(provider)
+
+    results = adapter.generate_many_packed(create_requests(10),
+                                           max_pack_size=4)
+
+    assert [result.result["title"] for result in results
+            ] == [f"prompt {index}" for index in range(10)]
+    assert [len(pack) for pack in provider.packs] == [4, 4, 2]
+
+
+def test_only_invalid_items_are_requeued():
+    provider = PackingProvider(broken={"prompt 2": 1})
+    adapter = create_adapter(provider, max_retry_count=3)
+
+    results = adapter.generate_many_packed(create_requests(4))
+
+    assert all(result.succeeded for result in results)
+    assert provider.packs == [["prompt 0", "prompt 1", "prompt 2", "prompt 3"],
+                              ["prompt 2"]]
+
+
+def test_items_fail_after_max_retry_count():
+    provider = PackingProvider(broken={"prompt 1": 5})
+    adapter = create_adapter(provider, max_retry_count=2)
+
+    results = adapter.generate_many_packed(create_requests(3))
+
+    assert [result.succeeded for result in results] == [True, False, True]
+    assert isinstance(results[1].error, ExceededMaxRetryCountError)
+    assert provider.call_count == 2
+
+
+def test_malformed_request_is_reported_per_item():
+    adapter = create_adapter(PackingProvider())
+
+    results = adapter.generate_many_packed(
+        create_requests(2) + [{
+            "prompt": 1234,
+            "function": FUNCTION
+        }])
+
+    assert [result.succeeded for result in results] == [True, True, False]
+    assert isinstance(results[2].error, ValueError)
+
+
+def test_failing_pack_does_not_abort_the_batch():
+    adapter = create_adapter(PackingProvider())
+
+    results = adapter.generate_many_packed(
+        create_requests(2) +
+        [Request(prompt="unknown", function=FUNCTION, language="xx")])
+
+    assert [result.succeeded for result in results] == [True, True, False]
+    assert isinstance(results[2].error, ValueError)
+
+
+def test_packer_groups_compatible_requests():
+    other = Response(name="other",
+                     description="other",
+                     parameters={
+                         "type": "object",
+                         "properties": {
+                             "name": {
+                                 "type": "string"
+                             }
+                         },
+                     })
+    requests = (create_requests(2) + create_requests(1, other) +
+                [Request(prompt="japanese", function=FUNCTION, language="ja")])
+
+    packs = RequestPacker().pack(enumerate(requests))
+
+    assert [[index for index, _ in pack] for pack in packs] == [[0, 1], [2],
+                                                                [3]]
+
+
+def test_packer_respects_token_budgets():
+    packer = RequestPacker(max_pack_size=100)
+    items = [(index, Request(prompt="x" * 400, function=FUNCTION))
+             for index in range(10)]
+    fixed_tokens = packer.estimate_tokens(
+        JsonUtility.canonical_dumps(
+            packer.get_packed_function(FUNCTION).parameters))
+
+    packer.max_prompt_tokens = fixed_tokens + 3 * 120
+    assert [len(pack) for pack in packer.pack(items)] == [3, 3, 3, 1]
+
+    packer.max_prompt_tokens = None
+    packer.output_tokens_per_item = 92
+    packer.max_output_tokens = 500
+    assert [len(pack) for pack in packer.pack(items)] == [5, 5]
+
+
+def test_packed_schema_keeps_refs_and_pins_item_count():
+    function = Response(name="ref",
+                        description="ref",
+                        parameters={
+                            "type": "object",
+                            "properties": {
+                                "title": {
+                                    "$ref": "#/$defs/Title"
+                                },
+                            },
+                            "required": ["title"],
+                            "$defs": {
+                                "Title": {
+                                    "type": "string",
+                                    "default": {
+                                        "$ref": "#/kept"
+                                    }
+                                }
+                            },
+                        })
+    provider = PackingProvider()
+    adapter = create_adapter(provider)
+
+    packed = RequestPacker().get_packed_function(function, 3)
+    items = packed.parameters["properties"]["items"]
+    assert (items["minItems"], items["maxItems"]) == (3, 3)
+    result = items["items"]["properties"]["result"]
+    assert result["properties"]["title"]["$ref"] == (
+        "#/properties/items/items/properties/result/$defs/Title")
+    assert result["$defs"]["Title"]["default"] == {"$ref": "#/kept"}
+
+    results = adapter.generate_many_packed([
+        Request(prompt=f"prompt {index}", function=function)
+        for index in range(3)
+    ])
+    assert [result.result for result in results] == [{
+        "title": f"prompt {index}"
+    } for index in range(3)]
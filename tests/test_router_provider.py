@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from llm_json_adapter.exceptions import RetryableError, TransportError
+from llm_json_adapter.providers import ProviderRegistry
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+
+@pytest.fixture(autouse=True)
+def static_provider():
+    ProviderRegistry.register("static", StaticProvider)
+    yield
+    ProviderRegistry.unregister("static")
+
+
+def create_router(backends, **attributes):
+    provider = ProviderRegistry.create("router",
+                                       attributes={
+                                           "providers":
+                                           [{
+                                               "provider": "static",
+                                               "name": f"backend{index}",
+                                           }
+                                            for index in range(len(backends))],
+                                           **attributes,
+                                       })
+    provider._backends = backends
+    return provider
+
+
+def test_fails_over_to_next_backend():
+    primary = StaticProvider(results=[TransportError("down")])
+    secondary = StaticProvider(results=[{"title": "secondary"}])
+    provider = create_router([primary, secondary])
+
+    result = asyncio.run(provider.generate("hello", FUNCTION))
+
+    assert result == {"title": "secondary"}
+    assert primary.call_count == 1
+
+
+def test_open_circuit_skips_backend():
+    primary = StaticProvider(results=[TransportError("down")] * 2)
+    secondary = StaticProvider()
+    provider = create_router([primary, secondary],
+                             circuit_breaker={
+                                 "min_requests": 2,
+                                 "reset_timeout": 60,
+                             })
+
+    for _ in range(4):
+        asyncio.run(provider.generate("hello", FUNCTION))
+
+    assert primary.call_count == 2
+    assert secondary.call_count == 4
+    assert provider.get_health()["backend0"]["state"] == "open"
+
+
+def test_half_open_probe_closes_circuit():
+    primary = StaticProvider(results=[TransportError("down")])
+    secondary = StaticProvider()
+    provider = create_router([primary, secondary],
+                             circuit_breaker={
+                                 "min_requests": 1,
+                                 "reset_timeout": 0,
+                             })
+
+    asyncio.run(provider.generate("hello", FUNCTION))
+    assert provider.get_health()["backend0"]["state"] == "half_open"
+
+    asyncio.run(provider.generate("hello", FUNCTION))
+    assert primary.call_count == 2
+    assert provider.get_health()["backend0"]["state"] == "closed"
+
+
+def test_invalid_output_does_not_trip_circuit():
+    primary = StaticProvider(results=[RetryableError("invalid json")])
+    provider = create_router([primary, StaticProvider()],
+                             circuit_breaker={"min_requests": 1})
+
+    with pytest.raises(RetryableError, match="invalid json"):
+        asyncio.run(provider.generate("hello", FUNCTION))
+    assert provider.get_health()["backend0"]["state"] == "closed"
+
+
+def test_all_backends_unhealthy_raises_transport_error():
+    provider = create_router(
+        [StaticProvider(results=[TransportError("down")])],
+        circuit_breaker={
+            "min_requests": 1,
+            "reset_timeout": 60
+        })
+
+    with pytest.raises(TransportError, match="down"):
+        asyncio.run(provider.generate("hello", FUNCTION))
+    with pytest.raises(TransportError, match="No healthy providers"):
+        asyncio.run(provider.generate("hello", FUNCTION))
+
+
+def test_weighted_route_contains_every_backend():
+    provider = create_router(
+        [StaticProvider(), StaticProvider()], strategy="weighted")
+    assert sorted(provider.get_route()) == [0, 1]
+
+
+def test_adapter_retries_through_router():
+    primary = StaticProvider(results=[TransportError("down")] * 3)
+    provider = create_router([primary, StaticProvider()])
+    adapter = create_adapter(provider)
+
+    assert adapter.generate("hello", FUNCTION) == {"title": "hello"}
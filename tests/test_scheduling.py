@@ -0,0 +1,187 @@
+import asyncio
+import time
+
+import httpx
+import openai
+from botocore.exceptions import ClientError
+
+from llm_json_adapter.exceptions import (RateLimitError, RetryableError,
+                                         TransportError)
+from llm_json_adapter.providers.bedrock import Provider as BedrockProvider
+from llm_json_adapter.providers.openai import Provider as OpenAIProvider
+from llm_json_adapter.scheduling import (CircuitBreaker, ConcurrencyController,
+                                         RateLimiter, RetryPolicy)
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+
+def test_retry_policy_delays():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, jitter=0.5)
+    assert policy.get_delay(1, RetryableError("invalid json")) == 0.0
+    assert policy.get_delay(1, RateLimitError("slow down",
+                                              retry_after=3.0)) == 3.0
+    assert policy.get_delay(1, RateLimitError("slow down",
+                                              retry_after=60.0)) == 5.0
+    assert 0.5 <= policy.get_delay(1, TransportError("reset")) <= 1.0
+    assert 2.5 <= policy.get_delay(10, TransportError("reset")) <= 5.0
+
+
+def test_rate_limiter_limits_requests_and_tokens():
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=120)
+    assert limiter.try_acquire(100) == (True, 0.0)
+    acquired, wait = limiter.try_acquire(100)
+    assert not acquired
+    assert 39.0 < wait <= 40.0
+    assert limiter.try_acquire(10)[0]
+    acquired, wait = limiter.try_acquire(0)
+    assert not acquired
+    assert 29.0 < wait <= 30.0
+
+
+def test_rate_limiter_is_shared():
+    RateLimiter.clear()
+    first = create_adapter(StaticProvider(), requests_per_minute=10)
+    second = create_adapter(StaticProvider(), requests_per_minute=10)
+    assert first._rate_limiter is second._rate_limiter
+
+
+def test_shared_limits_follow_the_latest_configuration():
+    RateLimiter.clear()
+    ConcurrencyController.clear()
+    first = create_adapter(StaticProvider(),
+                           requests_per_minute=10,
+                           max_concurrency=8)
+    second = create_adapter(StaticProvider(),
+                            requests_per_minute=2,
+                            tokens_per_minute=100,
+                            max_concurrency=4)
+    limiter = second._rate_limiter
+    assert first._rate_limiter is limiter
+    assert limiter.try_acquire(100)[0]
+    assert limiter.try_acquire(0)[0]
+    assert not limiter.try_acquire(0)[0]
+
+    controller = second._concurrency_controller
+    assert (controller.max_concurrency, controller.limit) == (4, 4)
+    throttled = ConcurrencyController.get("other", 2)
+    throttled.on_throttle()
+    assert ConcurrencyController.get("other", 6) is throttled
+    assert (throttled.max_concurrency, throttled.limit) == (6, 1)
+
+
+def test_limits_that_are_not_passed_are_kept():
+    RateLimiter.clear()
+    first = create_adapter(StaticProvider(), requests_per_minute=2)
+    second = create_adapter(StaticProvider(), tokens_per_minute=100000)
+    limiter = second._rate_limiter
+    assert first._rate_limiter is limiter
+    assert [limiter.try_acquire(0)[0] for _ in range(3)] == [True, True, False]
+    assert limiter._tokens_per_minute == 100000
+
+
+def test_concurrency_controller_aimd():
+    controller = ConcurrencyController(max_concurrency=8, cooldown=0.0)
+    controller.on_throttle()
+    assert controller.limit == 4
+    controller.on_throttle()
+    assert controller.limit == 2
+    controller.on_success()
+    assert controller.limit == 2
+    for _ in range(50):
+        controller.on_success()
+    assert controller.limit == 8
+
+
+def test_concurrency_controller_limits_in_flight():
+    controller = ConcurrencyController(max_concurrency=2)
+    provider = StaticProvider(delay=0.01)
+
+    async def run():
+
+        async def call(index):
+            await controller.acquire()
+            try:
+                await provider.generate(str(index), FUNCTION)
+            finally:
+                controller.release()
+
+        await asyncio.gather(*[call(index) for index in range(10)])
+
+    asyncio.run(run())
+    assert provider.max_in_flight == 2
+    assert controller.in_flight == 0
+
+
+def test_rate_limited_request_waits_and_adapts():
+    ConcurrencyController.clear()
+    provider = StaticProvider(
+        [RateLimitError("throttled", retry_after=0.05), {
+            "title": "ok"
+        }])
+    adapter = create_adapter(provider, max_concurrency=4)
+    started_at = time.perf_counter()
+    assert adapter.generate("prompt", FUNCTION) == {"title": "ok"}
+    assert time.perf_counter() - started_at >= 0.05
+    assert adapter._concurrency_controller.limit == 2
+
+
+def test_openai_rate_limit_error_is_converted():
+    provider = OpenAIProvider(attributes={"api_key": "xxxxxxxx"})
+    response = httpx.Response(429,
+                              headers={"retry-after": "2"},
+                              request=httpx.Request("POST",
+                                                    "https://example.com"))
+    error = provider.convert_error(
+        openai.RateLimitError("limit", response=response, body=None))
+    assert isinstance(error, RateLimitError)
+    assert error.retry_after == 2.0
+
+
+def test_bedrock_throttling_error_is_converted():
+    provider = BedrockProvider(attributes={
+        "access_key_id": "xxxxxxxx",
+        "secret_access_key": "xxxxxxxx",
+    })
+    error = ClientError(
+        {"Error": {
+            "Code": "ThrottlingException",
+            "Message": "slow"
+        }}, "InvokeModel")
+    assert isinstance(provider.convert_error(error), RateLimitError)
+    error = ClientError(
+        {"Error": {
+            "Code": "ValidationException",
+            "Message": "bad"
+        }}, "InvokeModel")
+    assert type(provider.convert_error(error)) is RetryableError
+
+
+def test_circuit_breaker_opens_on_error_rate_and_latency():
+    breaker = CircuitBreaker(error_rate_threshold=0.5, min_requests=4)
+    for _ in range(2):
+        breaker.record_success(0.1)
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    slow = CircuitBreaker(latency_threshold=1.0, min_requests=2)
+    slow.record_success(2.0)
+    assert slow.state == CircuitBreaker.CLOSED
+    slow.record_success(2.0)
+    assert slow.state == CircuitBreaker.OPEN
+
+
+def test_circuit_breaker_half_open_allows_limited_probes():
+    breaker = CircuitBreaker(min_requests=1, reset_timeout=0)
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_cancelled()
+    assert breaker.allow_request()
+    breaker.record_failure(0.1)
+    assert breaker.allow_request()
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,148 @@
+import asyncio
+import time
+
+import pytest
+
+from llm_json_adapter.exceptions import ExceededMaxRetryCountError
+from llm_json_adapter.objects import Response
+from llm_json_adapter.utilities import SchemaPartitioner
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+ITEMS = {
+    "type": "array",
+    "items": {
+        "$ref": "#/$defs/item"
+    },
+}
+
+WIDE_FUNCTION = Response(name="wide",
+                         description="wide",
+                         parameters={
+                             "type": "object",
+                             "properties": {
+                                 "title": {
+                                     "type": "string"
+                                 },
+                                 "people": ITEMS,
+                                 "places": ITEMS,
+                                 "events": ITEMS,
+                                 "score": {
+                                     "type": "integer"
+                                 },
+                             },
+                             "required": ["title", "events", "score"],
+                             "additionalProperties": False,
+                             "$defs": {
+                                 "item": {
+                                     "type": "object",
+                                     "properties": {
+                                         "name": {
+                                             "type": "string"
+                                         },
+                                         "summary": {
+                                             "type": "string"
+                                         },
+                                     },
+                                     "required": ["name"],
+                                 }
+                             },
+                         })
+
+VALUES = {
+    "title": "title",
+    "people": [{
+        "name": "Ada"
+    }],
+    "places": [{
+        "name": "London"
+    }],
+    "events": [],
+    "score": 3,
+}
+
+
+class PartProvider(StaticProvider):
+    """Answers each part with the values of its properties."""
+
+    def __init__(self, broken=None, **kwargs):
+        super().__init__(**kwargs)
+        self.broken = dict(broken or {})
+        self.parts = []
+
+    async def generate(self, prompt, function, language="en", act_as=None):
+        self.call_count += 1
+        properties = list(function.parameters["properties"])
+        self.parts.append(properties)
+        await asyncio.sleep(self.delay)
+        result = {name: VALUES[name] for name in properties}
+        for name in properties:
+            if self.broken.get(name, 0) > 0:
+                self.broken[name] -= 1
+                result[name] = "broken"
+        return result
+
+
+def test_partition_balances_top_level_properties():
+    parts = SchemaPartitioner.partition(WIDE_FUNCTION, max_part_tokens=200)
+
+    assert len(parts) == 3
+    names = [list(part.parameters["properties"]) for part in parts]
+    assert sorted(sum(names, [])) == sorted(VALUES)
+    for part in parts:
+        assert part.parameters["$defs"] == WIDE_FUNCTION.parameters["$defs"]
+        assert part.parameters["additionalProperties"] is False
+        assert set(part.parameters.get("required", [])) <= set(
+            part.parameters["properties"])
+
+
+def test_small_or_coupled_schemas_are_not_split():
+    coupled = Response(name="coupled",
+                       description="coupled",
+                       parameters={
+                           **WIDE_FUNCTION.parameters, "dependentRequired": {
+                               "people": ["places"]
+                           }
+                       })
+
+    assert SchemaPartitioner.partition(FUNCTION) == [FUNCTION]
+    assert SchemaPartitioner.partition(WIDE_FUNCTION) == [WIDE_FUNCTION]
+    assert SchemaPartitioner.partition(coupled,
+                                       max_part_tokens=200) == [coupled]
+
+
+def test_parts_run_concurrently_and_are_merged():
+    provider = PartProvider(delay=0.1)
+    adapter = create_adapter(provider)
+
+    started_at = time.perf_counter()
+    result = adapter.generate_decomposed("prompt",
+                                         WIDE_FUNCTION,
+                                         max_part_tokens=200)
+
+    assert result == VALUES
+    assert provider.call_count == 3
+    assert time.perf_counter() - started_at < 0.25
+
+
+def test_only_failed_parts_are_retried():
+    provider = PartProvider(broken={"score": 1})
+    adapter = create_adapter(provider, max_retry_count=2)
+
+    result = adapter.generate_decomposed("prompt",
+                                         WIDE_FUNCTION,
+                                         max_part_tokens=200)
+
+    assert result == VALUES
+    assert provider.call_count == 4
+    assert sum("score" in part for part in provider.parts) == 2
+
+
+def test_part_that_gives_up_fails_the_request():
+    provider = PartProvider(broken={"score": 5})
+    adapter = create_adapter(provider, max_retry_count=2)
+
+    with pytest.raises(ExceededMaxRetryCountError):
+        adapter.generate_decomposed("prompt",
+                                    WIDE_FUNCTION,
+                                    max_part_tokens=200)
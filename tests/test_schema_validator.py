@@ -0,0 +1,47 @@
+import pytest
+
+from llm_json_adapter import LLMJsonAdapter
+from llm_json_adapter.exceptions import ExceededMaxRetryCountError
+from llm_json_adapter.utilities import SchemaValidator
+
+from .stubs import FUNCTION, SCHEMA, StaticProvider, create_adapter
+
+
+def test_validator_is_cached():
+    SchemaValidator.clear()
+    validator = SchemaValidator.get_validator(SCHEMA)
+    assert validator is not None
+    assert SchemaValidator.get_validator(dict(reversed(
+        SCHEMA.items()))) is validator
+    assert SchemaValidator.size() == 1
+
+
+def test_invalid_schema():
+    assert not SchemaValidator.is_valid_schema({"type": 5})
+    assert not LLMJsonAdapter.validate_jsonschema({"type": 5})
+    assert LLMJsonAdapter.validate_jsonschema(SCHEMA)
+
+
+def test_validator_cache_eviction(monkeypatch):
+    SchemaValidator.clear()
+    monkeypatch.setattr(SchemaValidator, "max_size", 2)
+    for index in range(3):
+        SchemaValidator.get_validator({"type": "object", "title": str(index)})
+    assert SchemaValidator.size() == 2
+
+
+def test_instance_validation():
+    assert SchemaValidator.is_valid({"title": "a"}, SCHEMA)
+    assert not SchemaValidator.is_valid({"title": 1}, SCHEMA)
+    assert SchemaValidator.get_error_message({}, SCHEMA) is not None
+
+
+def test_invalid_result_is_retried():
+    provider = StaticProvider([{"title": 1}, {"title": "ok"}])
+    adapter = create_adapter(provider, max_retry_count=2)
+    assert adapter.generate("prompt", FUNCTION) == {"title": "ok"}
+    assert provider.call_count == 2
+
+    adapter = create_adapter(StaticProvider([{}, {}]), max_retry_count=2)
+    with pytest.raises(ExceededMaxRetryCountError):
+        adapter.generate("prompt", FUNCTION)
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from llm_json_adapter.exceptions import (ExceededMaxRetryCountError,
+                                         RetryableError)
+from llm_json_adapter.utilities import Instrumentation
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+
+def test_concurrent_identical_requests_share_one_call():
+    provider = StaticProvider(delay=0.05)
+    events = []
+    adapter = create_adapter(provider,
+                             single_flight=True,
+                             instrumentation=Instrumentation(
+                                 [lambda name, _: events.append(name)]))
+
+    async def main():
+        return await asyncio.gather(
+            *(adapter.generate_async("same", FUNCTION) for _ in range(5)),
+            adapter.generate_async("other", FUNCTION))
+
+    results = asyncio.run(main())
+
+    assert provider.call_count == 2
+    assert results[:5] == [{"title": "same"}] * 5
+    assert len({id(result) for result in results[:5]}) == 5
+    assert events.count("deduplicated") == 4
+
+
+def test_exceptions_are_shared_with_all_waiters():
+    provider = StaticProvider([RetryableError("broken")], delay=0.05)
+    adapter = create_adapter(provider, max_retry_count=1, single_flight=True)
+
+    async def main():
+        return await asyncio.gather(*(adapter.generate_async("same", FUNCTION)
+                                      for _ in range(3)),
+                                    return_exceptions=True)
+
+    results = asyncio.run(main())
+
+    assert provider.call_count == 1
+    assert all(
+        isinstance(result, ExceededMaxRetryCountError) for result in results)
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    provider = StaticProvider(delay=0.05)
+    adapter = create_adapter(provider, single_flight=True)
+
+    async def main():
+        first = asyncio.create_task(adapter.generate_async("same", FUNCTION))
+        second = asyncio.create_task(adapter.generate_async("same", FUNCTION))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == {"title": "same"}
+    assert provider.call_count == 1
+
+
+def test_call_is_cancelled_when_every_waiter_is_gone():
+    provider = StaticProvider(delay=0.05)
+    adapter = create_adapter(provider, single_flight=True)
+
+    async def main():
+        tasks = [
+            asyncio.create_task(adapter.generate_async("same", FUNCTION))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+        return adapter._single_flight.in_flight
+
+    assert asyncio.run(main()) == 0
+    assert provider.in_flight == 0
+
+
+def test_single_flight_is_opt_in():
+    provider = StaticProvider(delay=0.01)
+    adapter = create_adapter(provider)
+
+    async def main():
+        await asyncio.gather(*(adapter.generate_async("same", FUNCTION)
+                               for _ in range(3)))
+
+    asyncio.run(main())
+
+    assert provider.call_count == 3
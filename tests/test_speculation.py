@@ -0,0 +1,140 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+
+from llm_json_adapter.exceptions import RateLimitError
+from llm_json_adapter.providers.openai import Provider as OpenAIProvider
+from llm_json_adapter.scheduling import SpeculationPolicy
+
+from .stubs import FUNCTION, StaticProvider, create_adapter
+
+
+class DelayedProvider(StaticProvider):
+    """Returns ``(delay, result)`` pairs in call order."""
+
+    async def generate(self, prompt, function, language="en", act_as=None):
+        self.call_count += 1
+        delay, result = self.results.pop(0)
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.in_flight -= 1
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_policy_switches_on_observed_failure_rate():
+    policy = SpeculationPolicy(max_samples=4, min_attempts=10)
+
+    for _ in range(9):
+        policy.record("schema", False)
+    assert policy.get_sample_count("schema") == 1
+
+    policy.record("schema", True)
+    assert policy.get_failure_rate("schema") == 0.9
+    assert policy.get_sample_count("schema") == 4
+
+    for _ in range(90):
+        policy.record("schema", True)
+    assert policy.get_sample_count("schema") == 1
+    assert policy.get_sample_count("other") == 1
+    assert SpeculationPolicy(
+        max_samples=2, failure_rate_threshold=0).get_sample_count("other") == 2
+
+
+def test_first_valid_sample_wins_and_the_rest_are_cancelled():
+    provider = DelayedProvider([
+        (0.01, {
+            "title": 1
+        }),
+        (0.02, {
+            "title": "valid"
+        }),
+        (1.0, {
+            "title": "slow"
+        }),
+    ])
+    adapter = create_adapter(provider,
+                             speculation=SpeculationPolicy(
+                                 max_samples=3, failure_rate_threshold=0))
+
+    started_at = time.perf_counter()
+    result = asyncio.run(adapter.generate_async("prompt", FUNCTION))
+
+    assert result == {"title": "valid"}
+    assert time.perf_counter() - started_at < 0.5
+    assert provider.call_count == 3
+    assert provider.in_flight == 0
+
+
+def test_adaptive_policy_speculates_only_for_failing_schemas():
+    policy = SpeculationPolicy(max_samples=3, min_attempts=4)
+    provider = DelayedProvider([(0.0, {
+        "title": 1
+    })] * 2 + [(0.0, {
+        "title": "ok"
+    })] * 5)
+    adapter = create_adapter(provider, speculation=policy, max_retry_count=3)
+
+    asyncio.run(adapter.generate_async("first", FUNCTION))
+    assert provider.call_count == 3
+
+    for _ in range(4):
+        policy.record(FUNCTION.get_fingerprint(), False)
+    asyncio.run(adapter.generate_async("second", FUNCTION))
+    assert provider.call_count == 6
+
+
+def test_throttling_is_not_counted_against_the_schema():
+    policy = SpeculationPolicy()
+    provider = DelayedProvider([(0.0, RateLimitError("slow down")),
+                                (0.0, {
+                                    "title": "ok"
+                                })])
+    adapter = create_adapter(provider, speculation=policy)
+
+    asyncio.run(adapter.generate_async("prompt", FUNCTION))
+
+    assert policy.get_failure_rate(FUNCTION.get_fingerprint()) == 0.0
+
+
+def test_openai_uses_native_sampling():
+    requests = []
+
+    async def create(**request):
+        requests.append(request)
+        return ChatCompletion.model_validate({
+            "id":
+            "chatcmpl",
+            "object":
+            "chat.completion",
+            "created":
+            0,
+            "model":
+            "gpt-4o-mini",
+            "choices": [{
+                "index": index,
+                "finish_reason": "stop",
+                "message": {
+                    "role": "assistant",
+                    "content": content
+                },
+            } for index, content in enumerate(
+                ["no json", "still no json", '{"title": "third"}'])],
+        })
+
+    adapter = create_adapter(
+        OpenAIProvider(attributes={"api_key": "xxxxxxxx"}),
+        speculation=SpeculationPolicy(max_samples=3, failure_rate_threshold=0))
+    adapter._provider._client = SimpleNamespace(chat=SimpleNamespace(
+        completions=SimpleNamespace(create=create)))
+
+    result = asyncio.run(adapter.generate_async("prompt", FUNCTION))
+
+    assert result == {"title": "third"}
+    assert len(requests) == 1
+    assert requests[0]["n"] == 3
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from llm_json_adapter.exceptions import ExceededMaxRetryCountError
+from llm_json_adapter.objects import Response
+from llm_json_adapter.utilities import IncrementalJsonParser
+
+from .stubs import StaticProvider, create_adapter
+
+ARRAY_FUNCTION = Response(name="test",
+                          description="test",
+                          parameters={
+                              "type": "object",
+                              "properties": {
+                                  "data": {
+                                      "type": "array",
+                                      "items": {
+                                          "type": "object",
+                                          "properties": {
+                                              "title": {
+                                                  "type": "string",
+                                              },
+                                          },
+                                          "required": ["title"],
+                                      },
+                                  },
+                              },
+                              "required": ["data"],
+                          })
+
+
+class StreamingProvider(StaticProvider):
+
+    def __init__(self, texts):
+        super().__init__()
+        self.texts = list(texts)
+        self.consumed = []
+
+    async def generate_stream(self,
+                              prompt,
+                              function,
+                              language="en",
+                              act_as=None):
+        self.call_count += 1
+        text = self.texts.pop(0)
+        for index in range(0, len(text), 3):
+            self.consumed.append(text[index:index + 3])
+            yield text[index:index + 3]
+
+
+def collect(adapter, function):
+
+    async def run():
+        return [
+            event
+            async for event in adapter.generate_stream("prompt", function)
+        ]
+
+    return asyncio.run(run())
+
+
+def test_parser_emits_items_and_fields():
+    parser = IncrementalJsonParser()
+    text = 'Sure\n```json\n{"data": [{"title": "a,]"}, {"title": "b"}], "count": 2}\n```'
+    events = []
+    for char in text:
+        events.extend(parser.feed(char))
+
+    assert [(event.type, event.path) for event in events] == [
+        ("item", ["data", 0]),
+        ("item", ["data", 1]),
+        ("field", ["data"]),
+        ("field", ["count"]),
+    ]
+    assert events[0].value == {"title": "a,]"}
+    assert parser.is_complete
+    assert parser.result == {
+        "data": [{
+            "title": "a,]"
+        }, {
+            "title": "b"
+        }],
+        "count": 2
+    }
+
+
+def test_parser_without_fence():
+    parser = IncrementalJsonParser(fenced=False)
+    events = parser.feed('{"a": [1, 2], "b": "\\"x\\""} trailing')
+    assert [event.value for event in events] == [1, 2, [1, 2], '"x"']
+    assert parser.result == {"a": [1, 2], "b": '"x"'}
+
+
+def test_generate_stream():
+    provider = StreamingProvider(
+        ['```json\n{"data": [{"title": "a"}, {"title": "b"}]}\n```'])
+    events = collect(create_adapter(provider), ARRAY_FUNCTION)
+    assert [event.type
+            for event in events] == ["item", "item", "field", "complete"]
+    assert events[-1].value == {"data": [{"title": "a"}, {"title": "b"}]}
+
+
+def test_generate_stream_aborts_on_schema_violation():
+    invalid = '```json\n{"data": [{"name": "a"}, ' + '{"title": "b"}, ' * 100 + ']}\n```'
+    valid = '```json\n{"data": []}\n```'
+    provider = StreamingProvider([invalid, valid])
+    events = collect(create_adapter(provider), ARRAY_FUNCTION)
+
+    assert [event.type for event in events] == ["retry", "field", "complete"]
+    assert len("".join(provider.consumed)) < len(invalid) + len(valid)
+
+
+def test_generate_stream_exceeds_retry_count():
+    provider = StreamingProvider(["no json", "no json"])
+    with pytest.raises(ExceededMaxRetryCountError):
+        collect(create_adapter(provider, max_retry_count=2), ARRAY_FUNCTION)
@@ -0,0 +1,221 @@
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+
+from llm_json_adapter.objects import Response
+from llm_json_adapter.providers.bedrock import Provider as BedrockProvider
+from llm_json_adapter.providers.google import Provider as GoogleProvider
+from llm_json_adapter.providers.ollama import Provider as OllamaProvider
+from llm_json_adapter.providers.openai import Provider as OpenAIProvider
+
+from .stubs import FUNCTION
+
+OPTIONAL_FUNCTION = Response(name="optional",
+                             description="optional",
+                             parameters={
+                                 "type": "object",
+                                 "properties": {
+                                     "title": {
+                                         "type": "string"
+                                     },
+                                     "note": {
+                                         "type": "string"
+                                     },
+                                 },
+                                 "required": ["title"],
+                             })
+
+UNSUPPORTED_FUNCTION = Response(name="unsupported",
+                                description="unsupported",
+                                parameters={
+                                    "type": "object",
+                                    "properties": {
+                                        "title": {
+                                            "type": "string",
+                                            "not": {
+                                                "const": ""
+                                            },
+                                        },
+                                    },
+                                    "required": ["title"],
+                                })
+
+
+def test_openai_uses_strict_response_format():
+    provider = OpenAIProvider(attributes={
+        "api_key": "xxxxxxxx",
+        "structured_output": True,
+    })
+    parameters = provider.generate_parameters(FUNCTION)
+    assert "tools" not in parameters
+    json_schema = parameters["response_format"]["json_schema"]
+    assert json_schema["strict"] is True
+    assert json_schema["schema"]["additionalProperties"] is False
+
+    assert "tools" in provider.generate_parameters(OPTIONAL_FUNCTION)
+    assert "response_format" not in OpenAIProvider(attributes={
+        "api_key": "xxxxxxxx"
+    }).generate_parameters(FUNCTION)
+
+
+def test_ollama_passes_schema_as_format():
+
+    class StubOllamaClient(object):
+
+        def __init__(self):
+            self.calls = []
+
+        async def chat(self, **kwargs):
+            self.calls.append(kwargs)
+            return {"message": {"content": '{"title": "native"}'}}
+
+    provider = OllamaProvider(attributes={"structured_output": True})
+    provider._client = StubOllamaClient()
+
+    assert asyncio.run(provider.generate("a", FUNCTION)) == {"title": "native"}
+    assert provider._client.calls[0]["format"] == FUNCTION.parameters
+    system = "".join(message["content"]
+                     for message in provider._client.calls[0]["messages"])
+    assert "markdown code block" not in system
+    assert provider.recovery_stats == {"native": 1}
+
+    asyncio.run(provider.generate("a", UNSUPPORTED_FUNCTION))
+    assert "format" not in provider._client.calls[1]
+    system = "".join(message["content"]
+                     for message in provider._client.calls[1]["messages"])
+    assert "markdown code block" in system
+    assert provider.recovery_stats == {"native": 1, "balanced": 1}
+
+
+def test_google_response_schema():
+    provider = GoogleProvider(attributes={
+        "api_key": "xxxxxxxx",
+        "structured_output": True,
+    })
+    config = provider.generate_options(FUNCTION)["generation_config"]
+    assert config["response_mime_type"] == "application/json"
+    assert config["response_schema"] == FUNCTION.parameters
+
+    nullable = Response(name="nullable",
+                        description="nullable",
+                        parameters={
+                            "type": "object",
+                            "properties": {
+                                "title": {
+                                    "type": ["string", "null"]
+                                }
+                            },
+                        })
+    assert provider.generate_options(nullable) == {}
+
+
+def test_google_native_generation_omits_fence_rules():
+
+    class StubGoogleModel(object):
+
+        def __init__(self):
+            self.prompts = []
+
+        async def generate_content_async(self, prompt, **options):
+            self.prompts.append(prompt)
+            return SimpleNamespace(text='{"title": "native"}',
+                                   usage_metadata=None)
+
+    provider = GoogleProvider(attributes={
+        "api_key": "xxxxxxxx",
+        "structured_output": True,
+    })
+    provider._client = StubGoogleModel()
+
+    assert asyncio.run(provider.generate("a", FUNCTION)) == {"title": "native"}
+    assert "markdown code block" not in provider._client.prompts[0]
+    assert provider.recovery_stats == {"native": 1}
+
+
+def test_bedrock_uses_converse_tool_use():
+
+    class StubBedrockClient(object):
+
+        def __init__(self):
+            self.requests = []
+
+        def converse(self, **request):
+            self.requests.append(request)
+            return {
+                "output": {
+                    "message": {
+                        "content": [{
+                            "toolUse": {
+                                "name": "test",
+                                "input": {
+                                    "title": "tool"
+                                },
+                            }
+                        }]
+                    }
+                },
+                "usage": {
+                    "inputTokens": 10,
+                    "outputTokens": 3
+                },
+            }
+
+    provider = BedrockProvider(
+        attributes={
+            "access_key_id": "xxxxxxxx",
+            "secret_access_key": "xxxxxxxx",
+            "structured_output": True,
+        })
+    provider._client = StubBedrockClient()
+
+    assert asyncio.run(provider.generate("a", FUNCTION)) == {"title": "tool"}
+    request = provider._client.requests[0]
+    assert request["toolConfig"]["toolChoice"] == {"tool": {"name": "test"}}
+    assert request["toolConfig"]["tools"][0]["toolSpec"]["inputSchema"] == {
+        "json": FUNCTION.parameters
+    }
+    assert provider.recovery_stats["native"] == 1
+
+    meta = BedrockProvider(
+        attributes={
+            "access_key_id": "xxxxxxxx",
+            "secret_access_key": "xxxxxxxx",
+            "model": "meta.llama3-8b-instruct-v1:0",
+            "structured_output": True,
+        })
+    assert not meta.use_structured_output(FUNCTION)
+
+
+def test_bedrock_without_converse_uses_the_prompt():
+
+    class StubBedrockClient(object):
+
+        def __init__(self):
+            self.bodies = []
+
+        def invoke_model(self, modelId, body):
+            self.bodies.append(json.loads(body))
+            return {
+                "body":
+                io.BytesIO(
+                    json.dumps({
+                        "content": [{
+                            "type": "text",
+                            "text": '{"title": "prompt"}'
+                        }]
+                    }).encode())
+            }
+
+    provider = BedrockProvider(
+        attributes={
+            "access_key_id": "xxxxxxxx",
+            "secret_access_key": "xxxxxxxx",
+            "structured_output": True,
+        })
+    provider._client = StubBedrockClient()
+    provider.clear_prompt_templates()
+
+    assert not provider.use_structured_output(FUNCTION)
+    assert asyncio.run(provider.generate("a", FUNCTION)) == {"title": "prompt"}
+    assert "Json schema" in provider._client.bodies[0]["system"]
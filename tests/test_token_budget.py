@@ -0,0 +1,205 @@
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+
+from openai.types.chat import ChatCompletion
+
+from llm_json_adapter.objects import Response
+from llm_json_adapter.providers.bedrock import Provider as BedrockProvider
+from llm_json_adapter.providers.openai import Provider as OpenAIProvider
+from llm_json_adapter.utilities import TokenEstimator
+
+from .stubs import FUNCTION, StaticProvider
+
+MODEL = "anthropic.claude-3-haiku-20240307-v1:0"
+
+LIST_FUNCTION = Response(name="list",
+                         description="list",
+                         parameters={
+                             "type": "object",
+                             "properties": {
+                                 "items": {
+                                     "type": "array",
+                                     "maxItems": 200,
+                                     "items": {
+                                         "type": "object",
+                                         "properties": {
+                                             "name": {
+                                                 "type": "string",
+                                                 "maxLength": 40
+                                             },
+                                             "count": {
+                                                 "type": "integer"
+                                             },
+                                         },
+                                     },
+                                 },
+                             },
+                         })
+
+
+def test_output_estimate_follows_the_schema():
+    small = TokenEstimator.estimate_output(FUNCTION.parameters)
+    large = TokenEstimator.estimate_output(LIST_FUNCTION.parameters)
+
+    assert 0 < small < 32
+    assert large > 200 * 12
+    assert TokenEstimator.estimate_output({"enum": ["a", "bbbbbbbbbbbb"]}) == 4
+
+
+def test_max_tokens_is_sized_per_request():
+    provider = StaticProvider(attributes={"max_tokens": "auto"})
+
+    assert provider.get_max_tokens(FUNCTION) == provider.min_auto_max_tokens
+    assert provider.get_max_tokens(LIST_FUNCTION) == 4096
+    provider._attributes["max_output_tokens"] = 8192
+    assert 4096 < provider.get_max_tokens(LIST_FUNCTION) <= 8192
+    assert StaticProvider(attributes={
+        "max_tokens": 500
+    }).get_max_tokens(LIST_FUNCTION) == 500
+    assert StaticProvider().get_max_tokens(FUNCTION) is None
+
+
+def test_bedrock_max_tokens_is_capped_per_model_family():
+    attributes = {"access_key_id": "xxxxxxxx", "secret_access_key": "xxxxxxxx"}
+    claude = BedrockProvider(attributes=dict(attributes))
+    llama = BedrockProvider(
+        attributes={
+            **attributes, "model": "meta.llama3-70b-instruct-v1:0"
+        })
+
+    assert claude.get_max_tokens(LIST_FUNCTION) == 4096
+    assert llama.get_max_tokens(LIST_FUNCTION) == 2048
+    messages = llama.generate_chat_prompt("prompt", FUNCTION)
+    body = llama.generate_body_structure("meta.llama3-70b-instruct-v1:0",
+                                         messages)
+    assert body["max_gen_len"] == 2048
+
+
+class TruncatingBedrockClient(object):
+
+    def __init__(self, texts):
+        self.texts = list(texts)
+        self.bodies = []
+
+    def close(self):
+        pass
+
+    def invoke_model(self, modelId, body):
+        self.bodies.append(json.loads(body))
+        text, stop_reason = self.texts.pop(0)
+        response = {
+            "content": [{
+                "type": "text",
+                "text": text
+            }],
+            "stop_reason": stop_reason,
+            "usage": {
+                "input_tokens": 10,
+                "output_tokens": 5
+            },
+        }
+        return {"body": io.BytesIO(json.dumps(response).encode("utf-8"))}
+
+
+def test_bedrock_continues_a_truncated_response():
+    provider = BedrockProvider(attributes={
+        "access_key_id": "xxxxxxxx",
+        "secret_access_key": "xxxxxxxx",
+    })
+    provider._client = TruncatingBedrockClient([
+        ('```json\n{"title": "a long ', "max_tokens"),
+        (' title"}\n```', "end_turn"),
+    ])
+
+    result = asyncio.run(provider.generate("prompt", FUNCTION))
+
+    assert result == {"title": "a long title"}
+    assert provider.recovery_stats["continued"] == 1
+    first, second = provider._client.bodies
+    assert first["max_tokens"] == provider.min_auto_max_tokens
+    assert second["messages"][-1] == {
+        "role": "assistant",
+        "content": '```json\n{"title": "a long'
+    }
+
+
+def test_bedrock_stops_after_max_continuations():
+    provider = BedrockProvider(
+        attributes={
+            "access_key_id": "xxxxxxxx",
+            "secret_access_key": "xxxxxxxx",
+            "max_continuations": 1,
+        })
+    provider._client = TruncatingBedrockClient([
+        ('{"title": "a', "max_tokens"),
+        ('b', "max_tokens"),
+    ])
+
+    asyncio.run(provider.generate("prompt", FUNCTION))
+
+    assert len(provider._client.bodies) == 2
+
+
+def test_llama_prefill_leaves_the_assistant_turn_open():
+    provider = StaticProvider()
+    text = provider.convert_to_llama_presentation([{
+        "role": "user",
+        "content": "prompt"
+    }, {
+        "role": "assistant",
+        "content": "{"
+    }])
+
+    assert text.endswith("<|start_header_id|>assistant<|end_header_id|>\n{")
+
+
+def create_completion(content, finish_reason):
+    return ChatCompletion.model_validate({
+        "id":
+        "chatcmpl",
+        "object":
+        "chat.completion",
+        "created":
+        0,
+        "model":
+        "gpt-4o-mini",
+        "choices": [{
+            "index": 0,
+            "finish_reason": finish_reason,
+            "message": {
+                "role": "assistant",
+                "content": content
+            },
+        }],
+    })
+
+
+def test_openai_continues_a_truncated_response():
+    requests = []
+    responses = [
+        create_completion('{"title": "first ', "length"),
+        create_completion(' half"}', "stop"),
+    ]
+
+    async def create(**request):
+        requests.append(request)
+        return responses.pop(0)
+
+    provider = OpenAIProvider(attributes={
+        "api_key": "xxxxxxxx",
+        "max_tokens": 300
+    })
+    provider._client = SimpleNamespace(chat=SimpleNamespace(
+        completions=SimpleNamespace(create=create)))
+
+    result = asyncio.run(provider.generate("prompt", FUNCTION))
+
+    assert result == {"title": "first half"}
+    assert requests[0]["max_tokens"] == 300
+    assert "tools" in requests[0] and "tools" not in requests[1]
+    assert requests[1]["messages"][-2] == {
+        "role": "assistant",
+        "content": '{"title": "first'
+    }